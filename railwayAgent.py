@@ -1,663 +1,915 @@
-#-----------------------------------------------------------------------------
-# Name:        railwayAgent.py
-#
-# Purpose:     This module is the agents module to init different items in the 
-#              railway system map. All the items on the Map are agent objects, each 
-#              agent's update() function is a self-driven function to update the 
-#              item's state.
-# 
-# Author:      Yuancheng Liu
-#
-# Version:     v0.1.2
-# Created:     2023/05/26
-# Copyright:   Copyright (c) 2023 LiuYuancheng
-# License:     MIT License
-#-----------------------------------------------------------------------------
-
-import math
-import random
-from random import randint
-import railwayPWSimuGlobal as gv
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class AgentTarget(object):
-    """ Create a agent target to generate all the elements in the metro system, 
-        all the other 'things' in the system will be inheritance from this module.
-    """
-    def __init__(self, parent, tgtID, pos, tType):
-        self.parent = parent
-        self.id = tgtID
-        self.pos = pos      # target init position on the map.
-        self.tType = tType  # 2 letter agent types.<railwayGlobal.py>
-
-#--AgentTarget-----------------------------------------------------------------
-# Define all the get() functions here:
-
-    def getID(self):
-        return self.id
-
-    def getPos(self):
-        return self.pos
-
-    def getType(self):
-        return self.tType
-
-#--AgentTarget-----------------------------------------------------------------
-    def checkNear(self, posX, posY, threshold):
-        """ Check whether a point is near the selected point with the 
-            input threshold value (unit: pixel).
-        """
-        dist = math.sqrt((self.pos[0] - posX)**2 + (self.pos[1] - posY)**2)
-        return dist <= threshold
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class agentEnv(AgentTarget):
-    """ The environment Item shown on the map such as building, IOT, camera."""
-    def __init__(self, parent, tgtID, pos, wxBitMap, size ,tType=gv.ENV_TYPE):
-        super().__init__(parent, tgtID, pos, tType)
-        # build Icon: https://www.freepik.com/premium-vector/isometric-modern-supermarket-buildings-set_10094282.htm
-        self.bitmap = wxBitMap
-        self.size = size
-        self.color = None   
-        self.linkList = None
-
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-    def getColor(self):
-        return self.color
-    
-    def getLink(self):
-        return self.linkList 
-
-    def getSize(self):
-        return self.size
-
-    def getWxBitmap(self):
-        return self.bitmap
-    
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setColor(self, color):
-        self.color = color
-
-    def setLinkList(self, linkList):
-        self.linkList = linkList
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class AgentJunction(AgentTarget):
-    """ The temporary test junction agent to check the train collision. Currently 
-        the junction only support two tracks. YC: will implement multiple trasks (> 3)
-        junctions. 
-        The input parameter parent needs to be a <MapMgr> obj.
-    """
-    def __init__(self, parent, tgtID, pos, TrackID1, TrackID2):
-        super().__init__(parent, tgtID, pos, gv.JUNCTION_TYPE)
-        self.trackid1 = TrackID1
-        self.trackid2 = TrackID2
-        self.detectState = {
-            self.trackid1 : None,
-            self.trackid2 : None,
-        }
-        self.signalList = None
-
-    def _checkTrainEnter(self, trainArea, threshold=15):
-        """ Check whether a train has enter the junction."""
-        u,d,l,r = trainArea
-        x, y = self.getPos()
-        if (l-threshold <= x <= r+threshold) and (u-threshold <= y <= d+threshold):
-            return True
-        return False
-
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-    def getCollition(self):
-        if None in self.detectState.values(): return False
-        return True
-
-    def getCollitionState(self):
-        return self.detectState
-
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setSignalList(self, signalList):
-        self.signalList = signalList
-
-#-----------------------------------------------------------------------------
-    def handleDeadLock(self):
-        """ Check whether there are 2 trains triggered the junction's signal at the 
-            same time.
-            YC: current this function is not used as we set the train priority. But 
-            we may use this function in the future. 
-        """
-        noDeadLock = False
-        if self.signalList:
-            for i, signal in enumerate(self.signalList):
-                if not signal.getState():
-                    noDeadLock = True
-                break
-            if noDeadLock == False:
-                self.signalList[1].startManualOverrideOnDeadlock()
-
-#-----------------------------------------------------------------------------
-    def updateState(self):
-        """ Update the current station of a junction """
-        if self.parent:
-            for trackid in self.detectState.keys():
-                self.detectState[trackid] = None
-                for i, train in enumerate(self.parent.getTrains(trackID=trackid)):
-                    if self._checkTrainEnter(train.getTrainArea()):
-                        self.detectState[trackid] = i
-                        break
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class AgentSensors(AgentTarget):
-    """ The sensors set to show the sensors detection state."""
-    def __init__(self, parent, idx, pos):
-        AgentTarget.__init__(self, parent, idx, pos, gv.SENSOR_TYPE)
-        self.sensorsCount = len(self.pos)
-        self.stateList = [0]*self.sensorsCount # elements state: 1-triggered, 0-not triggered.
-
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-
-    def getActiveIndex(self):
-        """ Return a list of all the actived sensors' index."""
-        idxList = []
-        for i, val in enumerate(self.pos):
-            if val: idxList.append(i)
-        return idxList
-
-    def getSensorCount(self):
-        return self.sensorsCount
-
-    def getSensorState(self, idx):
-        return self.stateList[idx]
-
-    def getSensorsState(self):
-        return self.stateList
-
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setSensorState(self, idx, state):
-        """ Set one sensor's state with an index in the sensor list.
-            Args:
-                idx (int): sensor index.
-                state (int): 0/1
-        """
-        if idx >= self.sensorsCount: return False
-        self.stateList[idx] = state
-        return True
-
-#-----------------------------------------------------------------------------
-    def updateActive(self, trainList):
-        """ Update the sensor triggered state based on the input trains position.
-            Args:
-                trainList (list(<AgentTrain>)): a list of AgentTrain obj.
-        """
-        for i in range(self.sensorsCount):
-            self.stateList[i] = 0
-            x, y = self.pos[i]
-            for trainObj in trainList:
-                (u, d, l, r) = trainObj.getTrainArea()
-                if l <= x <= r and u <= y <= d: 
-                    self.stateList[i] = 1
-                    break
-        
-#-----------------------------------------------------------------------------
-class AgentStation(AgentTarget):
-    """ One train station obj. TODO: this agent is just for testing as it can only 
-        sense/check on pos on one line. Will add sense multiple point on different 
-        tracks later.
-    """
-    def __init__(self, parent, tgtID, pos, layout=gv.LAY_H, signalLayout=gv.LAY_U):
-        super().__init__(parent, tgtID, pos, gv.STATION_TYPE)
-        self.dockCount = gv.gDockTime if gv.gDockTime else random.randint(3, 10)
-        # defines the dock time by refresh cycle (capped at 20)
-        self.emptyCount = gv.gMinTrainDist # defines how long the station has been empty for by refresh cycle 
-        self.trainList = []
-        self.dockState = False
-        self.signalState = False # Train signal to make next train waiting outise the station when some train is docking.
-        self.layout = layout
-        self.labelPos = (-25, -28) # default delta label location on the map
-        self.signalPos = self._getSingalPos(signalLayout)
-
-    def _getSingalPos(self, layout):
-        x, y = self.getPos()
-        if layout == gv.LAY_U:
-            return(x, y-40)
-        elif layout == gv.LAY_D:
-            return(x, y+40)
-        elif layout == gv.LAY_L:
-            return(x-40, y)
-        elif layout == gv.LAY_R:
-            return(x+40, y)
-        gv.gDebugPrint("_getSingalPos(): The input layout is no valid: %s" %str(layout), logType=gv.LOG_WARN)
-        return None    
-    
-    def _checkNearSignal(self, pos, threshold = 20):
-        if self.signalPos is None: 
-            return False
-        dist = math.sqrt((self.signalPos[0] - pos[0])**2 + (self.signalPos[1] - pos[1])**2)
-        return dist <= threshold
-
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-
-    def getDockState(self):
-        return self.dockState
-    
-    def getSignalState(self):
-        return self.signalState
-
-    def getEmptyCount(self):
-        return self.emptyCount    
-
-    def getLayout(self):
-        return self.layout
-
-    def getLabelPos(self):
-        return self.labelPos
-    
-    def getSignalPos(self):
-        return self.signalPos
-
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setCheckTrains(self, TrainList):
-        """ Set the trains may dock in the station.
-            Args:
-                TrainList (list(<AgentTrain>)):  list of AgentTrain obj.
-        """
-        self.trainList = TrainList
-
-    def setDockState(self, dockState):
-        self.dockState = dockState
-
-    def setSignalState(self, signalState):
-        self.signalState = signalState
-
-    def setlabelPos(self, pos):
-        self.labelPos = pos
-
-    def setTrainDockCount(self, dockCount):
-        self.dockCount = dockCount
-
-    def setEmptyCount(self, count):
-        self.emptyCount = count
-
-#-----------------------------------------------------------------------------
-    def updateTrainsDock(self):
-        if len(self.trainList) == 0: return
-        for train in self.trainList:
-            # Check Whether the train can dock inside the station.
-            midPt = train.getTrainPos(idx=2)
-            if self.checkNear(midPt[0], midPt[1], 5):
-                self.dockState = True
-                if gv.gTestMD: self.setSignalState(True)
-                # print("Station: " + str(self.getID()) + " - " + str(self.emptyCount))
-                # Code to avoid train density high, current customer don't want this function, temporary disabled.
-                # if train.getDockCount() == 0: 
-                #     distFromFtTrain = self.emptyCount
-                #     if distFromFtTrain >= gv.gMinTrainDist:
-                #         train.setDockCount(self.dockCount)
-                #     else:
-                #         minDockCount = gv.gMinTrainDist - distFromFtTrain
-                #         train.setDockCount(max(minDockCount, self.dockCount))
-                #     # Reset empty count when station is occupied
-                #     self.emptyCount = 0
-                if train.getDockCount() == 0: train.setDockCount(self.dockCount)
-                return
-            # Check whether the train need to be stopped by the station signal
-            headPt = train.getTrainPos(idx=0) 
-            if self._checkNearSignal(headPt):
-                train.setWaiting(self.signalState) 
-        self.dockState = False
-        if gv.gTestMD: self.setSignalState(False)
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class AgentSignal(AgentTarget):
-    def __init__(self, parent, tgtID, pos, dir=gv.LAY_U, tType=gv.SINGAL_TYPE):
-        """ One signal object to control whether a train can pass / be-blocked at 
-            the intersection. 
-        Args:
-            parent (_type_): _description_
-            tgtID (_type_): _description_
-            pos (_type_): _description_
-            dir (int, optional): _description_. Defaults to 0-up, 1-down, 2-left, 3 right.
-            tType (_type_, optional): _description_. Defaults to gv.SINGAL_TYPE.
-        """
-        super().__init__(parent, tgtID, pos, tType)
-        self.signalOn = False   # signal on (True): train stop, signal off(False): train pass  
-        self.dir = dir          # signal indicator's direction on map. 0-up, 1-down, 2-left, 3-right
-        self.triggerOnSenAgent = None 
-        self.triggerOnIdxList = None
-        self.triggerOffSenAgent = None
-        self.triggerOffIdxList = None
-        
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-    def getState(self):
-        return self.signalOn
-
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setTriggerOnSensors(self, sensorAgent, idxList):
-        self.triggerOnSenAgent = sensorAgent
-        self.triggerOnIdxList = idxList
-
-    def setTriggerOffSensors(self, sensorAgent, idxList):
-        self.triggerOffSenAgent = sensorAgent
-        self.triggerOffIdxList = idxList
-
-    def setState(self, state):
-        self.signalOn = state
-
-#-----------------------------------------------------------------------------
-    def startManualOverrideOnDeadlock(self):
-        """ YC: currently we will now use this function, but may be used in the
-            future.
-        """
-        for idx in self.triggerOffIdxList:
-            self.triggerOffSenAgent.setSensorState(idx, 1)
-        for idx in self.triggerOnIdxList:
-            self.triggerOnSenAgent.setSensorState(idx, 0)
-        self.signalOn = False
-    
-#-----------------------------------------------------------------------------
-    def updateSingalState(self):
-        if self.signalOn:
-            for idx in self.triggerOffIdxList:
-                if self.triggerOffSenAgent.getSensorState(idx): 
-                    self.signalOn = False
-                    break
-        else:
-            for idx in self.triggerOnIdxList:
-                if self.triggerOnSenAgent.getSensorState(idx):
-                    self.signalOn =True
-                    break
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class AgentTrain(AgentTarget):
-    """ Create a train object with its init railway (track) array.
-
-        input:  pos - The init position of the train head.
-                railwayPts - list of railway points.(train will also run under 
-                the list sequence.)
-    """
-    def __init__(self, parent, trainID, initPos, railwayPts, 
-                 trainLen=5, trainSpeed=gv.gTrainDefSpeed, railwayType=gv.RAILWAY_TYPE_CYCLE):
-        """ Init the train control agent object.
-        Args:
-            parent (_type_): parent object.
-            trainID (_type_): train ID.
-            pos (_type_): train initiate position. 
-            railwayPts (_type_): the track path train will follow.
-            trainLen (int, optional): _description_. Defaults to 5.
-            railwayType (_type_, optional): _description_. Defaults to gv.RAILWAY_TYPE_CYCLE.
-        """
-        AgentTarget.__init__(self, parent, trainID, initPos, railwayType)
-        self.railwayPts = railwayPts
-        self.railwayType = railwayType
-        self.trainLen = trainLen
-        self.initPos = initPos
-        self.dirs = [0]*5
-        self.traindir = 1   # follow the railway point with increase order.
-        self.trainDestList = self._getDestList(initPos)
-        # Init the train head and tail points at the horizontal position.
-        #self.pos = [[initPos[0] + 10*i, initPos[1]] for i in range(self.trainLen)]
-        self.pos = self._buildTrainPos()
-        self.trainSpeed = trainSpeed if gv.gTestMD else 0 # train speed: pixel/periodic loop
-        self.dockCount = 0              # refersh cycle number of a train to stop in the station.
-        self.isWaiting = False          # Train waiting at signal or out side the station.
-        self.collsionFlg = False        # Flag to identify whether Train collsion happens.
-        self.emgStop = False if gv.gTestMD else True   # emergency stop.
-
-        self.rfrtSensorFlg = False # realworld detected the front train sensor state
-        # real world train information dict.
-        self.rwInfoDict = {
-            'train_id': self.id,
-            'power': 0,
-            'speed': 0,
-            'voltage': 0,
-            'current': 0,
-            'fsensor': self.rfrtSensorFlg,
-        }
-
-#-----------------------------------------------------------------------------
-    def _buildTrainPos(self):
-        x, y = self.initPos
-        x1, y1 = self.railwayPts[self.trainDestList[0]]
-        i = j = 0
-        if x == x1: j = 1 if y > y1 else -1
-        if y == y1: i = 1 if x > x1  else -1
-        return [[x+10*i*k, y+10*j*k] for k in range(self.trainLen)]
-
-#-----------------------------------------------------------------------------
-    def _getDestList(self, initPos):
-        """ Get the idx list of the target points (train destination) on the track 
-            based on current train pos.
-        """
-        (x0, y0) = initPos
-        for idx in range(len(self.railwayPts)-1):
-            x1, y1 = self.railwayPts[idx]
-            x2, y2 = self.railwayPts[idx+1]
-            if x1 == x0 == x2 or y1 == y0 == y2: return [idx+1]*self.trainLen
-        return [0]*self.trainLen
-            
-#-----------------------------------------------------------------------------
-    def _getDirc(self, srcPt, destPt):
-        """ Get the moving direction. (vector from src point to dest point)"""
-        x = destPt[0] - srcPt[0]
-        y = destPt[1] - srcPt[1]
-        return math.pi-math.atan2(x, y) 
-
-#-----------------------------------------------------------------------------
-    def initDir(self, nextPtIdx):
-        """ Init every train carriage's direction.(Currently not used)"""
-        if nextPtIdx < len(self.railwayPts):
-            self.trainDestList = [nextPtIdx]*len(self.pos)
-            nextPt = self.railwayPts[nextPtIdx]
-            for i in range(len(self.pos)):
-                self.dirs[i] = self._getDirc(self.pos[i], nextPt)
-
-#-----------------------------------------------------------------------------
-    def changedir(self):
-        """ Change the train running direction."""
-        #print(self.trainDestList)
-        self.traindir = -self.traindir
-        for i in range(len(self.trainDestList)):
-            element = self.trainDestList[i]
-            self.trainDestList[i] = (element+self.traindir) % len(self.railwayPts)
-        #print(self.trainDestList)        
-
-#--AgentTrain------------------------------------------------------------------
-    def checkNear(self, posX, posY, threshold):
-        """ Overwrite the parent checknear function to check whether a point
-            is near the train.
-        """
-        for pos in self.pos:
-            dist = math.sqrt((pos[0] - posX)**2 + (pos[1] - posY)**2)
-            if dist <= threshold: return True
-        return False
-
-    def checkTHsensor(self, posX, posY, threshold):
-        """ Check the train head sensor detection."""
-        pos = self.pos[0]
-        dist = math.sqrt((pos[0] - posX)**2 + (pos[1] - posY)**2)
-        return dist <= threshold
-
-#--AgentTrain------------------------------------------------------------------
-    def checkCollFt(self, frontTrain, threshold = 25):
-        """ Check whether their is possible collision to the front train.
-            Args:
-                frontTrain (_type_): _description_
-                threshold (int, optional): collision detection distance. Defaults to 20.
-        """
-        if self.isWaiting: return False
-        ftTail = frontTrain.getTrainPos(idx=-1) # front train tail position.
-        if self.checkNear(ftTail[0], ftTail[1], threshold):
-            if self.trainSpeed >= 0 and self.dockCount==0:
-                self.trainSpeed = 0
-            self.rfrtSensorFlg = True
-            return True # detected will be collision to the front train
-        elif self.trainSpeed == 0 and self.dockCount <= 1:
-            self.setTrainSpeed(10)
-        self.rfrtSensorFlg = False
-        return False
-
-#--AgentTrain------------------------------------------------------------------
-    def checkSignal(self, signalList):
-        """ Check whether the train reach the signal position, if the signal is 
-            on, stop the train to wait.
-        """
-        for singalObj in signalList:
-            x, y = singalObj.getPos()
-            if self.checkNear(x, y, 5) or self.checkTHsensor(x, y, 20):
-                speed = 0 if singalObj.getState() else gv.gTrainDefSpeed
-                self.setTrainSpeed(speed)
-                break
-
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-    
-    def getCollsionFlg(self):
-        return self.collsionFlg
-
-    def getDirs(self):
-        return self.dirs 
-
-    def getDockCount(self):
-        return self.dockCount
-
-    def getTrainArea(self):
-        """ Get the area train covered on the map."""
-        h, t = self.pos[0], self.pos[-1]
-        left, right = min(h[0], t[0])-5, max(h[0], t[0])+5
-        up, down = min(h[1], t[1])-5, max(h[1], t[1])+5
-        return (up, down, left, right)
-
-    def getTrainLength(self):
-        return self.trainLen
-    
-    def getTrainPos(self, idx=None):
-        if isinstance(idx, int) and idx < self.trainLen: return self.pos[idx]
-        return self.pos
-
-    def getTrainSpeed(self):
-        return self.trainSpeed
-
-    def getTrainRealInfo(self):
-        """ Generate the trian's realworld information"""
-        return self.rwInfoDict
-
-    def getPowerState(self):
-        return not (self.emgStop or self.collsionFlg)
-
-    def getEmgStop(self):
-        return self.emgStop
-
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setCollsionFlg(self, state):
-        self.collsionFlg = state
-        if self.collsionFlg: self.setEmgStop(True)
-
-    def setDockCount(self, count):
-        self.dockCount = count
-        self.trainSpeed =0
-
-    def setEmgStop(self, emgStop):
-        self.emgStop = emgStop
-        self.trainSpeed = 0 if self.emgStop else gv.gTrainDefSpeed
-
-    def setNextPtIdx(self, nextPtIdx):
-        if nextPtIdx < len(self.railwayPts): 
-            self.trainDestList = [nextPtIdx]*len(self.pos)
-
-    def setRailWayPts(self, railwayPts):
-        """ change the train's railway points list.(before train pass the fork)"""
-        self.railwayPts = railwayPts
-
-    def setTrainSpeed(self, speed):
-        if self.emgStop: return
-        self.trainSpeed = speed
-
-    def setWaiting(self, waitFlg):
-        if self.isWaiting == waitFlg: return
-        self.isWaiting = waitFlg
-        speed = 0 if waitFlg else gv.gTrainDefSpeed
-        self.setTrainSpeed(speed)
-
-#--AgentTrain------------------------------------------------------------------
-    def resetTrain(self):
-        """ reset the train to the init position."""
-        self.trainDestList = self._getDestList(self.initPos)
-        self.pos = self._buildTrainPos()
-        self.emgStop = False
-        self.collsionFlg = False
-        self.isWaiting = False
-        self.trainSpeed = gv.gTrainDefSpeed
-        self.dockCount = 0
-        self.rwInfoDict = {
-            'train_id': self.id,
-            'power': 0,
-            'speed': 0,
-            'voltage': 0,
-            'current': 0,
-            'fsensor': self.rfrtSensorFlg,
-        }
-
-#--AgentTrain------------------------------------------------------------------
-    def updateTrainPos(self):
-        """ Update the current train positions on the map. This function will be 
-            called periodicly.
-        """
-        if self.emgStop or self.isWaiting: return
-        # if dockCount == 1 also move the train to simulate the train start.
-        if self.dockCount == 0 or self.dockCount ==1:
-            # Train running on the railway:
-            for i, trainPt in enumerate(self.pos):
-                # The next railway point idx train going to approch.
-                nextPtIdx = self.trainDestList[i]
-                nextPt = self.railwayPts[nextPtIdx]
-                dist = math.sqrt((trainPt[0] - nextPt[0])**2 + (trainPt[1] - nextPt[1])**2)
-                if dist <= self.trainSpeed:
-                    # Go to the next check point if the distance is less than 1 speed unit.
-                    trainPt[0], trainPt[1] = nextPt[0], nextPt[1]
-                    # Update the next train distination if the train already get its next dist.
-                    nextPtIdx = self.trainDestList[i] = (nextPtIdx + self.traindir) % len(self.railwayPts)
-                    nextPt = self.railwayPts[nextPtIdx]
-                    #self.dirs[i] = self._getDirc(trainPt, nextPt)
-                else:
-                    # Move one speed unit.
-                    scale = float(self.trainSpeed)/float(dist)
-                    trainPt[0] += int((nextPt[0]-trainPt[0])*scale)
-                    trainPt[1] += int((nextPt[1]-trainPt[1])*scale)
-            if self.dockCount == 1: 
-                self.dockCount -= 1
-                if self.trainSpeed == 0: self.trainSpeed = gv.gTrainDefSpeed
-        else:  # Train stop at the station.
-            self.dockCount -= 1
-
-#--AgentTrain------------------------------------------------------------------
-    def updateRealWordInfo(self):
-        """ Update the own real world information."""
-        rSpeedVal = randint(0, 5) if self.trainSpeed == 0 else randint(56, 100)
-        self.rwInfoDict['speed'] = rSpeedVal if self.getPowerState() else 0
-        self.rwInfoDict['voltage'] = 750 - randint(0, 20) if self.getPowerState() else 0
-        rCrtVal = randint(10, 30) if self.trainSpeed == 0 else randint(150, 200)
-        self.rwInfoDict['current'] = rCrtVal if self.getPowerState() else 0
-        self.rwInfoDict['fsensor'] = self.rfrtSensorFlg
-        
+#-----------------------------------------------------------------------------
+# Name:        railwayAgent.py
+#
+# Purpose:     This module is the agents module to init different items in the 
+#              railway system map. All the items on the Map are agent objects, each 
+#              agent's update() function is a self-driven function to update the 
+#              item's state.
+# 
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1.2
+# Created:     2023/05/26
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import math
+import random
+from array import array
+import railwayPWSimuGlobal as gv
+from railwayBitset import Bitset
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AgentTarget(object):
+    """ Create a agent target to generate all the elements in the metro system, 
+        all the other 'things' in the system will be inheritance from this module.
+        All the agents use __slots__ (no per-instance __dict__) to keep large map
+        fleets small, the subclass needs to declare its own attributes in __slots__.
+    """
+    __slots__ = ('parent', 'id', 'pos', 'tType')
+
+    def __init__(self, parent, tgtID, pos, tType):
+        self.parent = parent
+        self.id = tgtID
+        self.pos = pos      # target init position on the map.
+        self.tType = tType  # 2 letter agent types.<railwayGlobal.py>
+
+#--AgentTarget-----------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getID(self):
+        return self.id
+
+    def getPos(self):
+        return self.pos
+
+    def getType(self):
+        return self.tType
+
+#--AgentTarget-----------------------------------------------------------------
+    def checkNear(self, posX, posY, threshold):
+        """ Check whether a point is near the selected point with the 
+            input threshold value (unit: pixel).
+        """
+        dist = math.sqrt((self.pos[0] - posX)**2 + (self.pos[1] - posY)**2)
+        return dist <= threshold
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class agentEnv(AgentTarget):
+    """ The environment Item shown on the map such as building, IOT, camera."""
+    __slots__ = ('imgPath', 'bitmap', 'size', 'color', 'linkList')
+
+    def __init__(self, parent, tgtID, pos, imgPath, size ,tType=gv.ENV_TYPE):
+        super().__init__(parent, tgtID, pos, tType)
+        # build Icon: https://www.freepik.com/premium-vector/isometric-modern-supermarket-buildings-set_10094282.htm
+        self.imgPath = imgPath  # icon image file, loaded by the map view.
+        self.bitmap = None
+        self.size = size
+        self.color = None   
+        self.linkList = None
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+    def getColor(self):
+        return self.color
+
+    def getImgPath(self):
+        return self.imgPath
+    
+    def getLink(self):
+        return self.linkList 
+
+    def getSize(self):
+        return self.size
+
+    def getWxBitmap(self):
+        return self.bitmap
+    
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setColor(self, color):
+        self.color = color
+
+    def setWxBitmap(self, bitmap):
+        self.bitmap = bitmap
+
+    def setLinkList(self, linkList):
+        self.linkList = linkList
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AgentJunction(AgentTarget):
+    """ The temporary test junction agent to check the train collision. Currently 
+        the junction only support two tracks. YC: will implement multiple trasks (> 3)
+        junctions. 
+        The input parameter parent needs to be a <MapMgr> obj.
+    """
+    __slots__ = ('trackid1', 'trackid2', 'detectState', 'signalList', 'trackWindows')
+
+    def __init__(self, parent, tgtID, pos, TrackID1, TrackID2):
+        super().__init__(parent, tgtID, pos, gv.JUNCTION_TYPE)
+        self.trackid1 = TrackID1
+        self.trackid2 = TrackID2
+        self.detectState = {
+            self.trackid1 : None,
+            self.trackid2 : None,
+        }
+        self.signalList = None
+        self.trackWindows = {}  # track ID -> (start, end) junction arc range on the track.
+
+    def _checkTrainEnter(self, trainArea, threshold=15):
+        """ Check whether a train has enter the junction."""
+        u,d,l,r = trainArea
+        x, y = self.getPos()
+        if (l-threshold <= x <= r+threshold) and (u-threshold <= y <= d+threshold):
+            return True
+        return False
+
+    def _checkTrainInWindow(self, arcRanges, window, total):
+        """ Check whether the train's arc ranges on the track overlap the junction
+            arc window (the window may cross the track start point).
+        """
+        start, end = window
+        for low, high in arcRanges:
+            for offset in (-total, 0, total):
+                if low <= end + offset and high >= start + offset: return True
+        return False
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+    def getCollition(self):
+        if None in self.detectState.values(): return False
+        return True
+
+    def getCollitionState(self):
+        return self.detectState
+
+    def getTrackWindows(self):
+        return self.trackWindows
+
+    def checkRouteTrain(self, train):
+        """ Check whether a dispatch route train (not in the tracks' train lists) 
+            has entered the junction, all the carriages' bounding box is used.
+        """
+        x0, y0, x1, y1 = train.getTrainBBox()
+        return self._checkTrainEnter((y0, y1, x0, x1))
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setSignalList(self, signalList):
+        self.signalList = signalList
+
+    def setTrackWindows(self, trackWindows):
+        self.trackWindows = trackWindows
+
+#-----------------------------------------------------------------------------
+    def handleDeadLock(self):
+        """ Check whether there are 2 trains triggered the junction's signal at the 
+            same time.
+            YC: current this function is not used as we set the train priority. But 
+            we may use this function in the future. 
+        """
+        noDeadLock = False
+        if self.signalList:
+            for i, signal in enumerate(self.signalList):
+                if not signal.getState():
+                    noDeadLock = True
+                break
+            if noDeadLock == False:
+                self.signalList[1].startManualOverrideOnDeadlock()
+
+#-----------------------------------------------------------------------------
+    def updateState(self, trainArcs=None):
+        """ Update the current station of a junction, the train is in the junction
+            if it covers the junction's arc window on its track (the bounding box 
+            check is used if the track has no window or lookahead index).
+            Args:
+                trainArcs (dict, optional): track ID -> (track arc length, [the trains'
+                    arc ranges list, ...]) calculated once per tick by the MapMgr.
+        """
+        if self.parent:
+            for trackid in self.detectState.keys():
+                self.detectState[trackid] = None
+                window = self.trackWindows.get(trackid)
+                total, arcList = (trainArcs or {}).get(trackid, (None, None))
+                for i, train in enumerate(self.parent.getTrains(trackID=trackid)):
+                    if self._checkTrainInWindow(arcList[i], window, total) if window and arcList \
+                            else self._checkTrainEnter(train.getTrainArea()):
+                        self.detectState[trackid] = i
+                        break
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AgentSensors(AgentTarget):
+    """ The sensors set to show the sensors detection state."""
+    __slots__ = ('sensorsCount', 'stateList', 'changedMask')
+
+    def __init__(self, parent, idx, pos):
+        AgentTarget.__init__(self, parent, idx, pos, gv.SENSOR_TYPE)
+        self.sensorsCount = len(self.pos)
+        # elements state (packed bits): 1-triggered, 0-not triggered.
+        self.stateList = Bitset(self.sensorsCount)
+        self.changedMask = 0    # xor of the state before and after the last updateActive().
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getActiveIndex(self):
+        """ Return a list of all the actived sensors' index."""
+        return self.stateList.getSetIndex()
+
+    def getActiveCount(self):
+        return self.stateList.popcount()
+
+    def getChangedMask(self):
+        """ Return the int mask of the sensors changed state in the last update."""
+        return self.changedMask
+
+    def getSensorCount(self):
+        return self.sensorsCount
+
+    def getSensorState(self, idx):
+        return self.stateList[idx]
+
+    def getSensorsState(self):
+        """ Return the sensors state <railwayBitset.Bitset> (works as a list of 0/1)."""
+        return self.stateList
+
+    def getSensorsView(self):
+        """ Return the read only memoryview of the packed sensors state bytes."""
+        return self.stateList.getView()
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setSensorState(self, idx, state):
+        """ Set one sensor's state with an index in the sensor list.
+            Args:
+                idx (int): sensor index.
+                state (int): 0/1
+        """
+        if idx >= self.sensorsCount: return False
+        self.stateList[idx] = state
+        return True
+
+#-----------------------------------------------------------------------------
+    def updateActive(self, trainList):
+        """ Update the sensor triggered state based on the input trains position.
+            Args:
+                trainList (list(<AgentTrain>)): a list of AgentTrain obj.
+        """
+        areas = [trainObj.getTrainArea() for trainObj in trainList]
+        mask = 0
+        for i in range(self.sensorsCount):
+            x, y = self.pos[i]
+            for (u, d, l, r) in areas:
+                if l <= x <= r and u <= y <= d: 
+                    mask |= 1 << i
+                    break
+        self.changedMask = self.stateList.diff(mask)
+        self.stateList.setInt(mask)
+        
+#-----------------------------------------------------------------------------
+class AgentStation(AgentTarget):
+    """ One train station obj. TODO: this agent is just for testing as it can only 
+        sense/check on pos on one line. Will add sense multiple point on different 
+        tracks later.
+    """
+    __slots__ = ('dockCount', 'emptyCount', 'trainList', 'dockState', 'signalState', 
+                 'layout', 'labelPos', 'signalPos', 'dockTrain')
+
+    def __init__(self, parent, tgtID, pos, layout=gv.LAY_H, signalLayout=gv.LAY_U):
+        super().__init__(parent, tgtID, pos, gv.STATION_TYPE)
+        self.dockCount = gv.gDockTime if gv.gDockTime else random.randint(3, 10)
+        # defines the dock time by refresh cycle (capped at 20)
+        self.emptyCount = gv.gMinTrainDist # defines how long the station has been empty for by refresh cycle 
+        self.trainList = []
+        self.dockState = False
+        self.dockTrain = None   # the docked train, not docked again until it leaves.
+        self.signalState = False # Train signal to make next train waiting outise the station when some train is docking.
+        self.layout = layout
+        self.labelPos = (-25, -28) # default delta label location on the map
+        self.signalPos = self._getSingalPos(signalLayout)
+
+    def _getSingalPos(self, layout):
+        x, y = self.getPos()
+        if layout == gv.LAY_U:
+            return(x, y-40)
+        elif layout == gv.LAY_D:
+            return(x, y+40)
+        elif layout == gv.LAY_L:
+            return(x-40, y)
+        elif layout == gv.LAY_R:
+            return(x+40, y)
+        gv.gDebugPrint("_getSingalPos(): The input layout is no valid: %s" %str(layout), logType=gv.LOG_WARN)
+        return None    
+    
+    def _checkNearSignal(self, pos, threshold = 20):
+        if self.signalPos is None: 
+            return False
+        dist = math.sqrt((self.signalPos[0] - pos[0])**2 + (self.signalPos[1] - pos[1])**2)
+        return dist <= threshold
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getDockState(self):
+        return self.dockState
+    
+    def getSignalState(self):
+        return self.signalState
+
+    def getEmptyCount(self):
+        return self.emptyCount    
+
+    def getLayout(self):
+        return self.layout
+
+    def getLabelPos(self):
+        return self.labelPos
+    
+    def getSignalPos(self):
+        return self.signalPos
+
+    def getTrainDockCount(self):
+        return self.dockCount
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setCheckTrains(self, TrainList):
+        """ Set the trains may dock in the station.
+            Args:
+                TrainList (list(<AgentTrain>)):  list of AgentTrain obj.
+        """
+        self.trainList = TrainList
+
+    def setDockState(self, dockState):
+        self.dockState = dockState
+
+    def setSignalState(self, signalState):
+        self.signalState = signalState
+
+    def setlabelPos(self, pos):
+        self.labelPos = pos
+
+    def setTrainDockCount(self, dockCount):
+        self.dockCount = dockCount
+
+    def setEmptyCount(self, count):
+        self.emptyCount = count
+
+#-----------------------------------------------------------------------------
+    def updateTrainsDock(self, candidates=None):
+        """ Update the station dock state and the trains dock/waiting state.
+            Args:
+                candidates (list(<AgentTrain>), optional): trains (in the check trains
+                    order) which may be near the station or its signal, all the check 
+                    trains will be checked if not set. Defaults to None.
+        """
+        if len(self.trainList) == 0: return
+        for train in (self.trainList if candidates is None else candidates):
+            # Check Whether the train can dock inside the station.
+            midPt = train.getTrainPos(idx=2)
+            if self.checkNear(midPt[0], midPt[1], 5):
+                self.dockState = True
+                if gv.gTestMD: self.setSignalState(True)
+                # print("Station: " + str(self.getID()) + " - " + str(self.emptyCount))
+                # Code to avoid train density high, current customer don't want this function, temporary disabled.
+                # if train.getDockCount() == 0: 
+                #     distFromFtTrain = self.emptyCount
+                #     if distFromFtTrain >= gv.gMinTrainDist:
+                #         train.setDockCount(self.dockCount)
+                #     else:
+                #         minDockCount = gv.gMinTrainDist - distFromFtTrain
+                #         train.setDockCount(max(minDockCount, self.dockCount))
+                #     # Reset empty count when station is occupied
+                #     self.emptyCount = 0
+                # a short (scaled time) step may not move the leaving train out of the
+                # dock range, the stopped train is docked again.
+                leaving = train is self.dockTrain and train.getTrainSpeed() > 0
+                if train.getDockCount() == 0 and not leaving: train.setDockCount(self.dockCount)
+                self.dockTrain = train
+                return
+            # Check whether the train need to be stopped by the station signal
+            headPt = train.getTrainPos(idx=0) 
+            if self._checkNearSignal(headPt):
+                train.setWaiting(self.signalState) 
+        self.dockState = False
+        self.dockTrain = None
+        if gv.gTestMD: self.setSignalState(False)
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AgentSignal(AgentTarget):
+    __slots__ = ('signalOn', 'dir', 'triggerOnSenAgent', 'triggerOnIdxList', 
+                 'triggerOffSenAgent', 'triggerOffIdxList')
+
+    def __init__(self, parent, tgtID, pos, dir=gv.LAY_U, tType=gv.SINGAL_TYPE):
+        """ One signal object to control whether a train can pass / be-blocked at 
+            the intersection. 
+        Args:
+            parent (_type_): _description_
+            tgtID (_type_): _description_
+            pos (_type_): _description_
+            dir (int, optional): _description_. Defaults to 0-up, 1-down, 2-left, 3 right.
+            tType (_type_, optional): _description_. Defaults to gv.SINGAL_TYPE.
+        """
+        super().__init__(parent, tgtID, pos, tType)
+        self.signalOn = False   # signal on (True): train stop, signal off(False): train pass  
+        self.dir = dir          # signal indicator's direction on map. 0-up, 1-down, 2-left, 3-right
+        self.triggerOnSenAgent = None 
+        self.triggerOnIdxList = None
+        self.triggerOffSenAgent = None
+        self.triggerOffIdxList = None
+        
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+    def getState(self):
+        return self.signalOn
+
+    def getTriggerOnSensors(self):
+        return (self.triggerOnSenAgent, self.triggerOnIdxList)
+
+    def getTriggerOffSensors(self):
+        return (self.triggerOffSenAgent, self.triggerOffIdxList)
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setTriggerOnSensors(self, sensorAgent, idxList):
+        self.triggerOnSenAgent = sensorAgent
+        self.triggerOnIdxList = idxList
+
+    def setTriggerOffSensors(self, sensorAgent, idxList):
+        self.triggerOffSenAgent = sensorAgent
+        self.triggerOffIdxList = idxList
+
+    def setState(self, state):
+        self.signalOn = state
+
+#-----------------------------------------------------------------------------
+    def startManualOverrideOnDeadlock(self):
+        """ YC: currently we will now use this function, but may be used in the
+            future.
+        """
+        for idx in self.triggerOffIdxList:
+            self.triggerOffSenAgent.setSensorState(idx, 1)
+        for idx in self.triggerOnIdxList:
+            self.triggerOnSenAgent.setSensorState(idx, 0)
+        self.signalOn = False
+    
+#-----------------------------------------------------------------------------
+    def updateSingalState(self):
+        if self.signalOn:
+            for idx in self.triggerOffIdxList:
+                if self.triggerOffSenAgent.getSensorState(idx): 
+                    self.signalOn = False
+                    break
+        else:
+            for idx in self.triggerOnIdxList:
+                if self.triggerOnSenAgent.getSensorState(idx):
+                    self.signalOn =True
+                    break
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AgentTrain(AgentTarget):
+    """ Create a train object with its init railway (track) array.
+
+        input:  pos - The init position of the train head.
+                railwayPts - list of railway points.(train will also run under 
+                the list sequence.)
+        The carriages position self.pos is a packed int array [x0, y0, x1, y1, ...]
+        used inside the agent only, and the real world information is saved in the
+        rw* attributes, the getter functions still return the [x, y] points list and
+        the info dict.
+    """
+    __slots__ = ('railwayPts', 'railwayType', 'trainLen', 'initPos', 'dirs', 'traindir', 
+                 'trainDestList', 'trainSpeed', 'dockCount', 'isWaiting', 'collsionFlg',
+                 'emgStop', 'rfrtSensorFlg', 'rwPower', 'rwSpeed', 'rwVoltage', 'rwCurrent', 
+                 'rwFsensor', 'posVer', 'geoVer', 'geoArea', 'geoBox', 'geoPts', 'loopStart', 'moveRem', 
+                 'dockRem')
+
+    def __init__(self, parent, trainID, initPos, railwayPts, 
+                 trainLen=5, trainSpeed=gv.gTrainDefSpeed, railwayType=gv.RAILWAY_TYPE_CYCLE):
+        """ Init the train control agent object.
+        Args:
+            parent (_type_): parent object.
+            trainID (_type_): train ID.
+            pos (_type_): train initiate position. 
+            railwayPts (_type_): the track path train will follow.
+            trainLen (int, optional): _description_. Defaults to 5.
+            railwayType (_type_, optional): _description_. Defaults to gv.RAILWAY_TYPE_CYCLE.
+        """
+        AgentTarget.__init__(self, parent, trainID, initPos, railwayType)
+        self.railwayPts = railwayPts
+        self.railwayType = railwayType
+        self.trainLen = trainLen
+        self.initPos = initPos
+        self.dirs = [0]*5
+        self.traindir = 1   # follow the railway point with increase order.
+        self.loopStart = 0  # railway point idx the train goes back to after the last point.
+        self.trainDestList = self._getDestList(initPos)
+        # Init the train head and tail points at the horizontal position.
+        #self.pos = [[initPos[0] + 10*i, initPos[1]] for i in range(self.trainLen)]
+        self.pos = self._buildTrainPos()
+        # Derived geometry (area, carriage points) cache, rebuilt when the position
+        # version posVer is changed (train moved).
+        self.posVer = 0
+        self.geoVer = -1
+        self.geoArea = None
+        self.geoBox = None
+        self.geoPts = None
+        self.trainSpeed = trainSpeed if gv.gTestMD else 0 # train speed: pixel/default time step
+        self.moveRem = 0.0  # moving distance fraction carried to the next scaled step.
+        self.dockRem = 0.0  # docking time (default steps) fraction of the scaled steps.
+        self.dockCount = 0              # refersh cycle number of a train to stop in the station.
+        self.isWaiting = False          # Train waiting at signal or out side the station.
+        self.collsionFlg = False        # Flag to identify whether Train collsion happens.
+        self.emgStop = False if gv.gTestMD else True   # emergency stop.
+
+        self.rfrtSensorFlg = False # realworld detected the front train sensor state
+        # real world train information.
+        self._resetRealWordInfo()
+
+#-----------------------------------------------------------------------------
+    def _buildTrainPos(self):
+        x, y = self.initPos
+        x1, y1 = self.railwayPts[self.trainDestList[0]]
+        i = j = 0
+        if x == x1: j = 1 if y > y1 else -1
+        if y == y1: i = 1 if x > x1  else -1
+        pos = array('i', bytes(8*self.trainLen))
+        for k in range(self.trainLen):
+            pos[2*k], pos[2*k+1] = x+10*i*k, y+10*j*k
+        return pos
+
+    def _updateGeometry(self):
+        """ Rebuild the derived geometry cache from the current carriage positions."""
+        pos = self.pos
+        self.geoPts = [[pos[i], pos[i+1]] for i in range(0, len(pos), 2)]
+        hx, hy, tx, ty = pos[0], pos[1], pos[-2], pos[-1]
+        left, right = min(hx, tx)-5, max(hx, tx)+5
+        up, down = min(hy, ty)-5, max(hy, ty)+5
+        self.geoArea = (up, down, left, right)
+        xList, yList = pos[0::2], pos[1::2]
+        self.geoBox = (min(xList)-5, min(yList)-5, max(xList)+5, max(yList)+5)
+        self.geoVer = self.posVer
+
+    def _resetRealWordInfo(self):
+        self.rwPower = self.rwSpeed = self.rwVoltage = self.rwCurrent = 0
+        self.rwFsensor = self.rfrtSensorFlg
+
+#-----------------------------------------------------------------------------
+    def _getDestList(self, initPos):
+        """ Get the idx list of the target points (train destination) on the track 
+            based on current train pos.
+        """
+        (x0, y0) = initPos
+        for idx in range(len(self.railwayPts)-1):
+            x1, y1 = self.railwayPts[idx]
+            x2, y2 = self.railwayPts[idx+1]
+            if x1 == x0 == x2 or y1 == y0 == y2: return array('i', [idx+1]*self.trainLen)
+        return array('i', [0]*self.trainLen)
+            
+#-----------------------------------------------------------------------------
+    def _getDirc(self, srcPt, destPt):
+        """ Get the moving direction. (vector from src point to dest point)"""
+        x = destPt[0] - srcPt[0]
+        y = destPt[1] - srcPt[1]
+        return math.pi-math.atan2(x, y) 
+
+#-----------------------------------------------------------------------------
+    def initDir(self, nextPtIdx):
+        """ Init every train carriage's direction.(Currently not used)"""
+        if nextPtIdx < len(self.railwayPts):
+            self.trainDestList = array('i', [nextPtIdx]*self.trainLen)
+            nextPt = self.railwayPts[nextPtIdx]
+            for i in range(self.trainLen):
+                self.dirs[i] = self._getDirc(self.getTrainPos(idx=i), nextPt)
+
+#-----------------------------------------------------------------------------
+    def changedir(self):
+        """ Change the train running direction."""
+        #print(self.trainDestList)
+        self.traindir = -self.traindir
+        for i in range(len(self.trainDestList)):
+            element = self.trainDestList[i]
+            self.trainDestList[i] = (element+self.traindir) % len(self.railwayPts)
+        #print(self.trainDestList)        
+
+#--AgentTrain------------------------------------------------------------------
+    def checkNear(self, posX, posY, threshold):
+        """ Overwrite the parent checknear function to check whether a point
+            is near the train.
+        """
+        pos = self.pos
+        for i in range(0, len(pos), 2):
+            dist = math.sqrt((pos[i] - posX)**2 + (pos[i+1] - posY)**2)
+            if dist <= threshold: return True
+        return False
+
+    def checkTHsensor(self, posX, posY, threshold):
+        """ Check the train head sensor detection."""
+        pos = self.pos
+        dist = math.sqrt((pos[0] - posX)**2 + (pos[1] - posY)**2)
+        return dist <= threshold
+
+#--AgentTrain------------------------------------------------------------------
+    def checkCollFt(self, frontTrain, threshold = 25):
+        """ Check whether their is possible collision to the front train.
+            Args:
+                frontTrain (_type_): _description_
+                threshold (int, optional): collision detection distance. Defaults to 20.
+        """
+        if self.isWaiting: return False
+        ftTail = frontTrain.getTrainPos(idx=-1) # front train tail position.
+        if self.checkNear(ftTail[0], ftTail[1], threshold):
+            if self.trainSpeed >= 0 and self.dockCount==0:
+                self.trainSpeed = 0
+            self.rfrtSensorFlg = True
+            return True # detected will be collision to the front train
+        elif self.trainSpeed == 0 and self.dockCount <= 1:
+            self.setTrainSpeed(10)
+        self.rfrtSensorFlg = False
+        return False
+
+#--AgentTrain------------------------------------------------------------------
+    def checkFrontGap(self, speedCap):
+        """ Apply the front train gap check result of railwayCollision (same rules
+            as checkCollFt(), but resume the train with the graded speed cap).
+            Args:
+                speedCap (int): max speed allowed by the gap to the front train, 0
+                    if the train is too close to the front train.
+            Returns:
+                bool: True if the train is too close to the front train.
+        """
+        if self.isWaiting: return False
+        if speedCap == 0:
+            if self.trainSpeed >= 0 and self.dockCount==0:
+                self.trainSpeed = 0
+            self.rfrtSensorFlg = True
+            return True
+        elif self.dockCount <= 1 and self.trainSpeed != speedCap:
+            self.setTrainSpeed(speedCap)
+        self.rfrtSensorFlg = False
+        return False
+
+#--AgentTrain------------------------------------------------------------------
+    def checkSignal(self, signalList):
+        """ Check whether the train reach the signal position, if the signal is 
+            on, stop the train to wait.
+        """
+        for singalObj in signalList:
+            x, y = singalObj.getPos()
+            if self.checkNear(x, y, 5) or self.checkTHsensor(x, y, 20):
+                speed = 0 if singalObj.getState() else gv.gTrainDefSpeed
+                self.setTrainSpeed(speed)
+                break
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+    
+    def getCollsionFlg(self):
+        return self.collsionFlg
+
+    def getDirs(self):
+        return self.dirs 
+
+    def getDestList(self):
+        """ Return the next railway point index of each carriage."""
+        return self.trainDestList
+
+    def getLoopStart(self):
+        return self.loopStart
+
+    def getTrainDir(self):
+        return self.traindir
+
+    def getDockCount(self):
+        return self.dockCount
+
+    def getFrontSensorFlg(self):
+        return self.rfrtSensorFlg
+
+    def getTrainArea(self):
+        """ Get the area train covered on the map."""
+        if self.geoVer != self.posVer: self._updateGeometry()
+        return self.geoArea
+
+    def getTrainBBox(self):
+        """ Get the bounding box (x0, y0, x1, y1) of all the carriages (the train
+            area only covers the head and the tail).
+        """
+        if self.geoVer != self.posVer: self._updateGeometry()
+        return self.geoBox
+
+    def getTrainLength(self):
+        return self.trainLen
+    
+    def getPos(self):
+        """ Overwrite the parent getPos function to return the list of all the 
+            carriages' [x, y] (same as getTrainPos()).
+        """
+        return self.getTrainPos()
+
+    def getTrainPos(self, idx=None):
+        """ Return the carriage [x, y] of <idx> (negative idx count from the tail), 
+            or the list of all the carriages' [x, y] if idx is None (the list is the
+            cached geometry, the caller should not modify it).
+        """
+        if self.geoVer != self.posVer: self._updateGeometry()
+        if isinstance(idx, int) and idx < self.trainLen: return self.geoPts[idx]
+        return self.geoPts
+
+    def getTrainSpeed(self):
+        return self.trainSpeed
+
+    def getTrainRealInfo(self):
+        """ Generate the trian's realworld information"""
+        return {
+            'train_id': self.id,
+            'power': self.rwPower,
+            'speed': self.rwSpeed,
+            'voltage': self.rwVoltage,
+            'current': self.rwCurrent,
+            'fsensor': self.rwFsensor,
+        }
+
+    def getPowerState(self):
+        return not (self.emgStop or self.collsionFlg)
+
+    def getEmgStop(self):
+        return self.emgStop
+
+    def getWaitingState(self):
+        return self.isWaiting
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setCollsionFlg(self, state):
+        self.collsionFlg = state
+        if self.collsionFlg: self.setEmgStop(True)
+
+    def setDockCount(self, count):
+        self.dockCount = count
+        self.trainSpeed =0
+
+    def setEmgStop(self, emgStop):
+        self.emgStop = emgStop
+        self.trainSpeed = 0 if self.emgStop else gv.gTrainDefSpeed
+
+    def setNextPtIdx(self, nextPtIdx):
+        if nextPtIdx < len(self.railwayPts): 
+            self.trainDestList = array('i', [nextPtIdx]*self.trainLen)
+
+    def setRailWayPts(self, railwayPts):
+        """ change the train's railway points list.(before train pass the fork)"""
+        self.railwayPts = railwayPts
+
+    def setRoutePts(self, railwayPts, destList, loopStart=0):
+        """ Change the train's railway points list to a route: the train runs the
+            points once and then loops from the point idx <loopStart> to the end.
+            Args:
+                railwayPts (list): route points list.
+                destList (list): next railway point idx of each carriage in the list.
+                loopStart (int, optional): loop start idx. Defaults to 0.
+        """
+        self.railwayPts = railwayPts
+        self.trainDestList = array('i', destList)
+        self.loopStart = loopStart
+
+    def setRealWordInfo(self, speed, voltage, current):
+        """ Set the real world information generated by railwayTrainRtu.
+            Returns:
+                bool: the front sensor state.
+        """
+        self.rwSpeed, self.rwVoltage, self.rwCurrent = speed, voltage, current
+        self.rwFsensor = self.rfrtSensorFlg
+        return self.rwFsensor
+
+    def setTrainSpeed(self, speed):
+        if self.emgStop: return
+        self.trainSpeed = speed
+
+    def setWaiting(self, waitFlg):
+        if self.isWaiting == waitFlg: return
+        self.isWaiting = waitFlg
+        speed = 0 if waitFlg else gv.gTrainDefSpeed
+        self.setTrainSpeed(speed)
+
+#--AgentTrain------------------------------------------------------------------
+    def resetTrain(self):
+        """ reset the train to the init position."""
+        self.trainDestList = self._getDestList(self.initPos)
+        self.pos = self._buildTrainPos()
+        self.posVer += 1
+        self.emgStop = False
+        self.collsionFlg = False
+        self.isWaiting = False
+        self.trainSpeed = gv.gTrainDefSpeed
+        self.dockCount = 0
+        self.moveRem = self.dockRem = 0.0
+        self._resetRealWordInfo()
+
+#--AgentTrain------------------------------------------------------------------
+    def advanceTrainPos(self, steps):
+        """ Run <steps> updateTrainPos() (default step) at once with the same result,
+            the docking count down and the carriages moving along the horizontal or 
+            vertical track segments are calculated in closed form (the other cases 
+            are moved step by step).
+        """
+        if steps <= 0 or self.emgStop or self.isWaiting: return
+        if self.dockCount > 1:
+            count = min(steps, self.dockCount - 1)
+            self.dockCount -= count
+            steps -= count
+        if steps and self.dockCount == 1:
+            self.updateTrainPos()
+            steps -= 1
+        speed = self.trainSpeed
+        if steps <= 0: return
+        if not isinstance(speed, int) or speed <= 0:
+            for _ in range(steps): self.updateTrainPos()
+            return
+        pos = self.pos
+        self.posVer += 1
+        for i in range(self.trainLen):
+            left = steps
+            while left > 0:
+                nextPt = self.railwayPts[self.trainDestList[i]]
+                x, y = pos[2*i], pos[2*i+1]
+                if x != nextPt[0] and y != nextPt[1]:
+                    # not horizontal/vertical, the int move is not linear in steps.
+                    self._moveCarriage(i, speed)
+                    left -= 1
+                    continue
+                dist = abs(nextPt[0] - x) + abs(nextPt[1] - y)
+                need = max(1, -(-dist//speed))  # steps to reach the point.
+                if left >= need:
+                    self._moveCarriage(i, dist)
+                    left -= need
+                else:
+                    self._moveCarriage(i, left*speed)
+                    left = 0
+
+    def _moveCarriage(self, i, stepDist):
+        """ Move the carriage <i> stepDist pixels to its next railway point, or to
+            the point (then to the next point) if the distance is not more than stepDist.
+        """
+        pos = self.pos
+        # The next railway point idx train going to approch.
+        nextPtIdx = self.trainDestList[i]
+        nextPt = self.railwayPts[nextPtIdx]
+        x, y = pos[2*i], pos[2*i+1]
+        dist = math.sqrt((x - nextPt[0])**2 + (y - nextPt[1])**2)
+        if dist <= stepDist:
+            # Go to the next check point if the distance is less than 1 speed unit.
+            pos[2*i], pos[2*i+1] = nextPt[0], nextPt[1]
+            # Update the next train distination if the train already get its next dist.
+            nextPtIdx += self.traindir
+            if nextPtIdx >= len(self.railwayPts): nextPtIdx = self.loopStart
+            elif self.traindir < 0 and nextPtIdx < self.loopStart: nextPtIdx = len(self.railwayPts) - 1
+            self.trainDestList[i] = nextPtIdx
+        else:
+            # Move one speed unit (multiply 1st to avoid the float ratio error).
+            pos[2*i] = x + int((nextPt[0]-x)*stepDist/dist)
+            pos[2*i+1] = y + int((nextPt[1]-y)*stepDist/dist)
+
+#--AgentTrain------------------------------------------------------------------
+    def updateTrainPos(self, scale=1.0):
+        """ Update the current train positions on the map. This function will be 
+            called periodicly.
+            Args:
+                scale (float, optional): step time / the default step time, the train
+                    moves trainSpeed*scale pixels (the pixel fraction is carried to 
+                    the next step) and the docking count down is in the default step
+                    time. Defaults to 1.0.
+        """
+        if self.emgStop or self.isWaiting: return
+        # if dockCount == 1 also move the train to simulate the train start.
+        if self.dockCount == 0 or self.dockCount ==1:
+            # Train running on the railway:
+            stepDist = self.trainSpeed
+            if scale != 1.0:
+                stepDist = self.trainSpeed*scale + self.moveRem
+                self.moveRem = stepDist - int(stepDist)
+                stepDist = int(stepDist)
+            self.posVer += 1
+            for i in range(self.trainLen): self._moveCarriage(i, stepDist)
+            if self.dockCount == 1: 
+                self.dockCount -= 1
+                if self.trainSpeed == 0: self.trainSpeed = gv.gTrainDefSpeed
+        else:  # Train stop at the station.
+            if scale != 1.0:
+                self.dockRem += scale
+                if self.dockRem < 1: return
+                self.dockRem -= 1
+            self.dockCount -= 1
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayAssetLoader.py
+#
+# Purpose:     This module is used by the map view (PanelMap) to load the map icon
+#              images in the background: all the image files are decoded (and
+#              scaled to the display size) to wx.Image in a thread pool, the scaled
+#              images are saved in an on disk cache folder so the next launch only
+#              decodes the small cached files. The simulation model (MapMgr) only
+#              keeps the image file path, so it does not need wx or the image decode.
+#              The wx.Bitmap conversion is done by the caller in the UI thread.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import wx
+import railwayPWSimuGlobal as gv
+
+DEF_WORKERS = 4
+CACHE_FD = '.cache'     # scaled images cache sub folder of the image folder.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AssetLoader(object):
+    """ Decode the image files to wx.Image in a thread pool with the scaled image
+        disk cache.
+    """
+    def __init__(self, cacheDir=None, workers=DEF_WORKERS):
+        self.cacheDir = cacheDir or os.path.join(gv.IMG_FD, CACHE_FD)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assetLoad')
+        self.futures = {}   # icon key -> future of the wx.Image (None if load failed).
+
+    def _getCachePath(self, imgPath, size):
+        name = os.path.splitext(os.path.basename(imgPath))[0]
+        mtime = int(os.path.getmtime(imgPath))
+        return os.path.join(self.cacheDir, '%s_%dx%d_%d.png' % (name, size[0], size[1], mtime))
+
+    def _loadImage(self, imgPath, size):
+        """ Decode one image file (scaled to size if set), run in the pool thread."""
+        try:
+            if size:
+                cachePath = self._getCachePath(imgPath, size)
+                if os.path.exists(cachePath): return wx.Image(cachePath, wx.BITMAP_TYPE_PNG)
+            image = wx.Image(imgPath, wx.BITMAP_TYPE_ANY)
+            if not image.IsOk(): return None
+            if size and (image.GetWidth(), image.GetHeight()) != tuple(size):
+                image = image.Scale(size[0], size[1], wx.IMAGE_QUALITY_HIGH)
+                try:
+                    if not os.path.exists(self.cacheDir): os.makedirs(self.cacheDir)
+                    image.SaveFile(cachePath, wx.BITMAP_TYPE_PNG)
+                except Exception as err:
+                    gv.gDebugPrint("AssetLoader: can not cache %s: %s" % (cachePath, str(err)),
+                                   logType=gv.LOG_WARN)
+            return image
+        except Exception as err:
+            gv.gDebugPrint("AssetLoader: load image %s failed: %s" % (imgPath, str(err)),
+                           logType=gv.LOG_WARN)
+            return None
+
+#-----------------------------------------------------------------------------
+    def submit(self, key, imgPath, size=None):
+        """ Start loading one image in the background.
+            Args:
+                key (str): icon key.
+                imgPath (str): image file path.
+                size (tuple, optional): display (width, height), None to keep the
+                    image size. Defaults to None.
+        """
+        if key in self.futures or not imgPath or not os.path.exists(imgPath): return
+        self.futures[key] = self.pool.submit(self._loadImage, imgPath, size)
+
+    def getImages(self):
+        """ Wait for all the submitted images and return {icon key: wx.Image}."""
+        images = {}
+        for key, future in self.futures.items():
+            image = future.result()
+            if image: images[key] = image
+        return images
+
+    def close(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,107 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayBitset.py
+#
+# Purpose:     This module provides a packed bitset used to save the train
+#              detection sensors state. Bit i is saved in byte i//8 bit i%8 (little
+#              endian), so the whole set can be converted to/from a python int to
+#              do the bulk operations (clear, set by mask, popcount, xor diff) and
+#              the readers can get the raw buffer as a memoryview without copy.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+WORD_BYTES = 8  # buffer is padded to 64 bits words.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class Bitset(object):
+    """ Fixed size packed bitset, element access works like a list of 0/1 ints."""
+    __slots__ = ('size', 'buf')
+
+    def __init__(self, size):
+        self.size = size
+        self.buf = bytearray(-(-size//(WORD_BYTES*8))*WORD_BYTES)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        val = self.toInt()
+        return ((val >> i) & 1 for i in range(self.size))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.size))]
+        if idx < 0: idx += self.size
+        if not 0 <= idx < self.size: raise IndexError('bitset index out of range')
+        return (self.buf[idx >> 3] >> (idx & 7)) & 1
+
+    def __setitem__(self, idx, val):
+        if idx < 0: idx += self.size
+        if not 0 <= idx < self.size: raise IndexError('bitset index out of range')
+        if val:
+            self.buf[idx >> 3] |= 1 << (idx & 7)
+        else:
+            self.buf[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getBits(self, idxList):
+        """ Return the 0/1 list of the bits in idxList (any order)."""
+        val = self.toInt()
+        return [(val >> i) & 1 for i in idxList]
+
+    def getRange(self, start, end):
+        """ Return bits [start, end) as an int (bit 0 = element start)."""
+        return (self.toInt() >> start) & ((1 << (end - start)) - 1)
+
+    def getSetIndex(self):
+        """ Return the index list of all the set bits."""
+        val = self.toInt()
+        idxList = []
+        while val:
+            low = val & -val
+            idxList.append(low.bit_length() - 1)
+            val ^= low
+        return idxList
+
+    def getView(self):
+        """ Return a read only memoryview of the packed bytes."""
+        return memoryview(self.buf).toreadonly()
+
+    def getWords(self):
+        """ Return a read only memoryview of the 64 bits words (native byte order)."""
+        return memoryview(self.buf).cast('Q').toreadonly()
+
+    def popcount(self):
+        return bin(self.toInt()).count('1')
+
+    def toInt(self):
+        return int.from_bytes(self.buf, 'little')
+
+    def diff(self, mask):
+        """ Return the xor (changed bits) between the bitset and an int mask."""
+        return self.toInt() ^ mask
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def clear(self):
+        self.buf[:] = bytes(len(self.buf))
+
+    def setInt(self, mask):
+        """ Replace all the bits with an int mask (bits over the size are dropped)."""
+        mask &= (1 << self.size) - 1
+        self.buf[:] = mask.to_bytes(len(self.buf), 'little')
+
+    def setMask(self, mask, val=1):
+        """ Set (val=1) or clear (val=0) all the bits in the int mask."""
+        cur = self.toInt()
+        self.setInt(cur | mask if val else cur & ~mask)
@@ -0,0 +1,111 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayCollision.py
+#
+# Purpose:     This module provides the predictive train collision avoidance on
+#              one track: the trains are sorted by their head arc position along
+#              the track once per tick, so each train's front train and the exact
+#              gap (arc distance from its head to the front train's tail) are found
+#              in O(n log n). The train speed is then capped by the gap and the
+#              time-to-collision (graded braking) instead of stop/start at a fixed
+#              distance.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import math
+
+STOP_GAP = 25       # stop the train if the gap to the front train is less (pixel).
+BRAKE_GAP = 75      # start braking if the gap to the front train is less (pixel).
+TTC_TICKS = 4       # brake if the train will reach the STOP_GAP in less ticks.
+MIN_SPEED = 2       # lowest braking speed before the train stops (pixel/tick).
+AHEAD_WIDTH = 15    # half width of the straight path checked ahead of the train head (pixel).
+
+#-----------------------------------------------------------------------------
+def getSpeedCap(gap, speed, frontSpeed, defSpeed):
+    """ Return the speed cap (pixel/tick) of a train with the gap to its front train.
+        Args:
+            gap (float): arc distance from the train head to the front train tail.
+            speed (int): the train's current speed.
+            frontSpeed (int): the front train's current speed.
+            defSpeed (int): the train's default (full) speed.
+        Returns:
+            int: 0 if the train needs to stop, else the max speed allowed.
+    """
+    free = gap - STOP_GAP
+    if free <= 0: return 0
+    cap = defSpeed
+    if gap < BRAKE_GAP:
+        # brake linearly with the gap in the braking zone.
+        cap = min(cap, defSpeed*free/(BRAKE_GAP - STOP_GAP))
+    closing = speed - frontSpeed
+    if closing > 0 and free/closing < TTC_TICKS:
+        # will reach the stop gap soon: follow the front train speed.
+        cap = min(cap, frontSpeed + free/TTC_TICKS)
+    return max(MIN_SPEED, int(cap))
+
+#-----------------------------------------------------------------------------
+def getFrontTrainsState(look, trains, defSpeed):
+    """ Find each train's front train on one track and its speed cap.
+        Args:
+            look (<railwayLookahead.TrackLookahead>): the track's arc index.
+            trains (list(<AgentTrain>)): the trains on the track.
+            defSpeed (int): trains default speed.
+        Returns:
+            list: [(frontTrain, gap, speedCap), ...] in the input trains order,
+                (None, None, defSpeed) if the train has no front train.
+    """
+    result = [(None, None, defSpeed)]*len(trains)
+    total = look.total
+    groups = {}     # running direction -> [(headArc, trainIdx, tailArc), ...]
+    for i, train in enumerate(trains):
+        destList, trainDir = train.getDestList(), train.getTrainDir()
+        headArc = look.getArcPos(train.getTrainPos(idx=0), destList[0], trainDir)
+        tailArc = look.getArcPos(train.getTrainPos(idx=-1), destList[-1], trainDir)
+        groups.setdefault(trainDir, []).append((headArc*trainDir, i, tailArc*trainDir))
+    for trainDir, items in groups.items():
+        if len(items) < 2: continue
+        items.sort()
+        for j, (headArc, i, _) in enumerate(items):
+            _, frontIdx, frontTail = items[(j+1) % len(items)]
+            gap = (frontTail - headArc) % total
+            train, frontTrain = trains[i], trains[frontIdx]
+            if gap < BRAKE_GAP:
+                # the carriages cut the track curve, keep the straight distance gap.
+                head, tail = train.getTrainPos(idx=0), frontTrain.getTrainPos(idx=-1)
+                gap = min(gap, math.hypot(tail[0]-head[0], tail[1]-head[1]))
+            cap = getSpeedCap(gap, train.getTrainSpeed(), frontTrain.getTrainSpeed(), defSpeed)
+            result[i] = (frontTrain, gap, cap)
+    return result
+
+#-----------------------------------------------------------------------------
+def getAheadGap(train, other):
+    """ Return the straight distance from the train head to the nearest carriage of
+        the other train in the train's path ahead, used for the trains which are not
+        in the same track arc index (the dispatch route trains). The path follows
+        the head carriage direction and gets wider with the distance to cover the
+        track curve.
+        Args:
+            train (<AgentTrain>): the checking train.
+            other (<AgentTrain>): the other train.
+        Returns:
+            float: the gap, None if no carriage of the other train is ahead.
+    """
+    pts = train.getTrainPos()
+    if len(pts) < 2: return None
+    (hx, hy), (bx, by) = pts[0], pts[1]
+    length = math.hypot(hx-bx, hy-by)
+    if not length: return None
+    dx, dy = (hx-bx)/length, (hy-by)/length
+    gap = None
+    for x, y in other.getTrainPos():
+        ahead = (x-hx)*dx + (y-hy)*dy
+        if ahead <= 0 or abs((x-hx)*dy - (y-hy)*dx) > AHEAD_WIDTH + ahead/2: continue
+        dist = math.hypot(x-hx, y-hy)
+        if gap is None or dist < gap: gap = dist
+    return gap
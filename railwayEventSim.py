@@ -0,0 +1,213 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayEventSim.py
+#
+# Purpose:     This module provides the quiet steps fast forward engine for the
+#              headless batch runs of the small/sparse maps. It gives the same map
+#              state as calling MapMgr.periodic() every step, but after a full step 
+#              which changed nothing except the train positions, each train's next
+#              event step is calculated (the step it may reach a sensor, junction,
+#              signal, station dock/signal point, the front train's braking distance,
+#              or finish the station docking) and the map jumps to the nearest event
+#              of all the trains: the trains are advanced in closed form by
+#              AgentTrain.advanceTrainPos() and the sensor/signal/station/junction
+#              checks are skipped.
+#              The trains can not move more than trainSpeed per step, so the event
+#              step is found from the distance between the train's bounding box and
+#              the object (conservative, an event may be found a few steps early).
+#              Limits: 
+#                - The jump is to the nearest event of all the trains (not a per
+#                  train event schedule), a busy map with many trains (or a train
+#                  on a dispatch route) gets few or no skipped steps.
+#                - The skipped steps are not saved in the state history/telemetry
+#                  store and do not generate the trains real world (RTU) data, run
+#                  MapMgr.periodic() if every step's records are needed.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import math
+import time
+
+import railwayPWSimuGlobal as gv
+import railwayLookahead as lookahead
+import railwayCollision as collision
+
+DEF_TICK_TIME = 0.1     # simulation time (sec) of one step.
+NO_EVENT = float('inf')
+MAX_CHECK_BACKOFF = 16  # max steps run without the quiet step check.
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _getBoxSteps(area, pos, speed, margin=0):
+    """ Return the steps before the (area + margin) box starts/stops covering pos.
+        Args:
+            area (tuple): train area (up, down, left, right).
+            pos (tuple): object (x, y).
+            speed (int): max moving distance per step.
+            margin (int, optional): box extend distance. Defaults to 0.
+    """
+    u, d, l, r = area
+    x, y = pos
+    outDist = max(l - margin - x, x - r - margin, u - margin - y, y - d - margin)
+    if outDist > 0: return math.ceil(outDist/speed) - 1
+    return math.floor(-outDist/speed) # pos inside the box, steps until it leaves.
+
+def _getNearSteps(area, pos, speed, threshold):
+    """ Return the steps before any carriage (inside area) may be within threshold
+        distance to pos.
+    """
+    u, d, l, r = area
+    dx = max(l - pos[0], 0, pos[0] - r)
+    dy = max(u - pos[1], 0, pos[1] - d)
+    dist = math.hypot(dx, dy)
+    if dist <= threshold: return 0
+    return math.ceil((dist - threshold)/speed) - 1
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class EventSimulator(object):
+    """ Event driven simulation engine works on the MapMgr."""
+    def __init__(self, mapMgr, tickTime=DEF_TICK_TIME):
+        self.mapMgr = mapMgr
+        self.tickTime = tickTime
+        self.fullSteps = 0  # steps run with MapMgr.periodic().
+        self.skipSteps = 0  # steps jumped with the trains moving only.
+
+    def _getState(self):
+        """ Return the discrete state (everything except the train positions and
+            the docking count down) of the map.
+        """
+        state = []
+        for trains in self.mapMgr.getTrains().values():
+            for train in trains:
+                state.append((train.getTrainSpeed(), train.getEmgStop(), train.getWaitingState(),
+                              train.getCollsionFlg(), train.getFrontSensorFlg(),
+                              min(train.getDockCount(), 2)))
+        for sensorAgent in self.mapMgr.getSensors().values():
+            state.append(sensorAgent.getSensorsState().toInt())
+        for signals in self.mapMgr.getSignals().values():
+            state.append(tuple(signal.getState() for signal in signals))
+        for stations in self.mapMgr.getStations().values():
+            state.append(tuple((station.getDockState(), station.getSignalState()) for station in stations))
+        for junction in self.mapMgr.getJunction():
+            state.append(tuple(junction.getCollitionState().values()))
+        return state
+
+#-----------------------------------------------------------------------------
+    def _getTrainEventStep(self, key, train, frontState):
+        """ Return the number of steps the train can move before its next event."""
+        dockCount = train.getDockCount()
+        if dockCount > 1: return dockCount - 2  # docking count down.
+        if dockCount == 1: return 0             # train starts from the station.
+        speed = train.getTrainSpeed()
+        frontTrain, gap, _ = frontState
+        if frontTrain and gap is None: return 0 # track without the arc index.
+        if train.getEmgStop() or train.getWaitingState() or speed == 0:
+            # stopped train: only the front train moving away changes its state.
+            if frontTrain and frontTrain.getTrainSpeed() and gap < collision.BRAKE_GAP: return 0
+            return NO_EVENT
+        if speed != gv.gTrainDefSpeed: return 0  # braking.
+        steps = NO_EVENT
+        if frontTrain:
+            brakeGap = collision.BRAKE_GAP + lookahead.ARC_MARGIN
+            if gap <= brakeGap: return 0
+            steps = math.ceil((gap - brakeGap)/speed) - 1
+        area = train.getTrainArea()
+        sensorAgent = self.mapMgr.getSensors().get(key)
+        for pos in (sensorAgent.getPos() if sensorAgent else []):
+            steps = min(steps, _getBoxSteps(area, pos, speed))
+        for junction in self.mapMgr.getJunction():
+            if key in junction.getCollitionState():
+                steps = min(steps, _getBoxSteps(area, junction.getPos(), speed, margin=lookahead.JUNCTION_RANGE))
+        for signal in self.mapMgr.getSignals().get(key, []):
+            steps = min(steps, _getNearSteps(area, signal.getPos(), speed, lookahead.SIGNAL_RANGE))
+        for station in self.mapMgr.getStations().get(key, []):
+            steps = min(steps, _getNearSteps(area, station.getPos(), speed, lookahead.DOCK_RANGE))
+            if station.getSignalPos():
+                steps = min(steps, _getNearSteps(area, station.getSignalPos(), speed,
+                                                 lookahead.STATION_SIG_RANGE))
+        return max(0, steps)
+
+    def getNextEventStep(self):
+        """ Return the number of steps all the trains can move before the nearest event."""
+        # a train on a dispatch route may enter its destination track in any step.
+        if self.mapMgr.getRouteTrains(): return 0
+        steps = NO_EVENT
+        for key, trains in self.mapMgr.getTrains().items():
+            if not trains: continue
+            frontStates = self.mapMgr.getFrontTrainsState(key) if len(trains) > 1 \
+                else [(None, None, gv.gTrainDefSpeed)]
+            for train, frontState in zip(trains, frontStates):
+                steps = min(steps, self._getTrainEventStep(key, train, frontState))
+                if steps == 0: return 0
+        return steps
+
+#-----------------------------------------------------------------------------
+    def _moveTrains(self, steps):
+        """ Run <steps> quiet steps: only the trains move (or count down the docking)
+            and the empty stations count the empty steps.
+        """
+        for trains in self.mapMgr.getTrains().values():
+            for train in trains:
+                train.advanceTrainPos(steps)
+                self.mapMgr.spatialIdx.update(train, train.getTrainBBox())
+        for stations in self.mapMgr.getStations().values():
+            for station in stations:
+                if not station.getDockState():
+                    station.setEmptyCount(station.getEmptyCount() + steps)
+
+    def run(self, steps, startTime=None):
+        """ Simulate <steps> steps, the skipped quiet steps do not add the state 
+            history/telemetry records and the trains RTU data.
+            Args:
+                steps (int): number of steps (MapMgr.periodic() calls) to simulate.
+                startTime (float, optional): simulation time of the 1st step. Defaults
+                    to None (current time).
+            Returns:
+                float: simulation time after the last step.
+        """
+        # run one step per periodic() call, the MapMgr fixed step setting is restored
+        # after the run.
+        stepT, timeWarp = self.mapMgr.getTimeStep()
+        self.mapMgr.setTimeStep(None)
+        try:
+            simTime = time.time() if startTime is None else startTime
+            done = wait = backoff = 0
+            state = None
+            while done < steps:
+                if wait == 0 and state is None: state = self._getState()
+                self.mapMgr.periodic(simTime)
+                simTime += self.tickTime
+                done += 1
+                self.fullSteps += 1
+                if wait:
+                    wait -= 1
+                    continue
+                lastState, state = state, self._getState()
+                skip = 0
+                if done < steps and state == lastState:
+                    # the last step only moved the trains, jump to the next event.
+                    skip = min(self.getNextEventStep(), steps - done)
+                if skip > 0:
+                    self._moveTrains(skip)
+                    simTime += skip*self.tickTime
+                    done += skip
+                    self.skipSteps += skip
+                    backoff = 0
+                else:
+                    # busy map, check the quiet steps less often.
+                    backoff = min(2*backoff or 1, MAX_CHECK_BACKOFF)
+                    wait, state = backoff, None
+        finally:
+            self.mapMgr.setTimeStep(stepT, timeWarp)
+        return simTime
+
+    def getStepCount(self):
+        """ Return (full steps, skipped steps)."""
+        return (self.fullSteps, self.skipSteps)
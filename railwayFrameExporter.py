@@ -0,0 +1,467 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayFrameExporter.py
+#
+# Purpose:     This module is used to run the railway map simulation headless (no
+#              wx display) and export the map frames as a PNG sequence. The map
+#              snapshot is converted to the scene description (railwayMapScene)
+#              and rasterized by a pure-Python offscreen raster backend, the frames
+#              are rendered and written by a process pool. The alert and env item
+#              icons are decoded by the pure-Python PNG reader (8 bits per channel,
+#              not interlaced, other image formats are skipped) once per worker.
+#
+#              Usage: python railwayFrameExporter.py -t 100000 -s 50 -o ./frames
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import time
+import zlib
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import railwayPWSimuGlobal as gv
+import railwayMapScene as scene
+
+DEF_FRAME_SIZE = (1600, 920)    # same as the railwayPanelMap's panel size.
+DEF_TICK_TIME = 0.1             # simulation time (sec) of one MapMgr.periodic() call.
+PNG_SIG = b'\x89PNG\r\n\x1a\n'
+ALPHA_MIN = 128                 # icon pixels with lower alpha are transparent.
+
+# RGB value of the color names used by the scene.
+COLOR_TABLE = {
+    'BLACK': (0, 0, 0),
+    'WHITE': (255, 255, 255),
+    'RED': (255, 0, 0),
+    'GREEN': (0, 255, 0),
+    'BLUE': (0, 0, 255),
+    'YELLOW': (255, 255, 0),
+    'GRAY': (128, 128, 128),
+    'GREY': (128, 128, 128),
+    'ORANGE': (255, 165, 0),
+    'PINK': (255, 192, 203),
+    'PURPLE': (160, 32, 240),
+    'CYAN': (0, 255, 255),
+    'BROWN': (165, 42, 42),
+}
+
+# 5x7 bitmap font, each glyph is 5 columns, bit0 is the top row. Lower case
+# letters are drawn with the upper case glyph.
+FONT_5X7 = {
+    ' ': (0x00, 0x00, 0x00, 0x00, 0x00), '%': (0x23, 0x13, 0x08, 0x64, 0x62),
+    '&': (0x36, 0x49, 0x55, 0x22, 0x50), '(': (0x00, 0x1C, 0x22, 0x41, 0x00),
+    ')': (0x00, 0x41, 0x22, 0x1C, 0x00), ',': (0x00, 0x50, 0x30, 0x00, 0x00),
+    '-': (0x08, 0x08, 0x08, 0x08, 0x08), '.': (0x00, 0x60, 0x60, 0x00, 0x00),
+    '/': (0x20, 0x10, 0x08, 0x04, 0x02), ':': (0x00, 0x36, 0x36, 0x00, 0x00),
+    '[': (0x00, 0x7F, 0x41, 0x41, 0x00), ']': (0x00, 0x41, 0x41, 0x7F, 0x00),
+    '_': (0x40, 0x40, 0x40, 0x40, 0x40),
+    '0': (0x3E, 0x51, 0x49, 0x45, 0x3E), '1': (0x00, 0x42, 0x7F, 0x40, 0x00),
+    '2': (0x42, 0x61, 0x51, 0x49, 0x46), '3': (0x21, 0x41, 0x45, 0x4B, 0x31),
+    '4': (0x18, 0x14, 0x12, 0x7F, 0x10), '5': (0x27, 0x45, 0x45, 0x45, 0x39),
+    '6': (0x3C, 0x4A, 0x49, 0x49, 0x30), '7': (0x01, 0x71, 0x09, 0x05, 0x03),
+    '8': (0x36, 0x49, 0x49, 0x49, 0x36), '9': (0x06, 0x49, 0x49, 0x29, 0x1E),
+    'A': (0x7E, 0x11, 0x11, 0x11, 0x7E), 'B': (0x7F, 0x49, 0x49, 0x49, 0x36),
+    'C': (0x3E, 0x41, 0x41, 0x41, 0x22), 'D': (0x7F, 0x41, 0x41, 0x22, 0x1C),
+    'E': (0x7F, 0x49, 0x49, 0x49, 0x41), 'F': (0x7F, 0x09, 0x09, 0x09, 0x01),
+    'G': (0x3E, 0x41, 0x49, 0x49, 0x7A), 'H': (0x7F, 0x08, 0x08, 0x08, 0x7F),
+    'I': (0x00, 0x41, 0x7F, 0x41, 0x00), 'J': (0x20, 0x40, 0x41, 0x3F, 0x01),
+    'K': (0x7F, 0x08, 0x14, 0x22, 0x41), 'L': (0x7F, 0x40, 0x40, 0x40, 0x40),
+    'M': (0x7F, 0x02, 0x0C, 0x02, 0x7F), 'N': (0x7F, 0x04, 0x08, 0x10, 0x7F),
+    'O': (0x3E, 0x41, 0x41, 0x41, 0x3E), 'P': (0x7F, 0x09, 0x09, 0x09, 0x06),
+    'Q': (0x3E, 0x41, 0x51, 0x21, 0x5E), 'R': (0x7F, 0x09, 0x19, 0x29, 0x46),
+    'S': (0x46, 0x49, 0x49, 0x49, 0x31), 'T': (0x01, 0x01, 0x7F, 0x01, 0x01),
+    'U': (0x3F, 0x40, 0x40, 0x40, 0x3F), 'V': (0x1F, 0x20, 0x40, 0x20, 0x1F),
+    'W': (0x3F, 0x40, 0x38, 0x40, 0x3F), 'X': (0x63, 0x14, 0x08, 0x14, 0x63),
+    'Y': (0x07, 0x08, 0x70, 0x08, 0x07), 'Z': (0x61, 0x51, 0x49, 0x45, 0x43),
+}
+
+_GLYPH_SPANS = {}   # (char, scale) -> glyph fill rects [(dx, dy, w, h), ...]
+_ICON_CACHE = {}    # (imgPath, size) -> icon image loaded in this process.
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _getGlyphSpans(char, scale):
+    """ Return the (cached) fill rects of one 5x7 font glyph, the set bits of each 
+        glyph row are merged to horizontal spans.
+    """
+    key = (char, scale)
+    if key not in _GLYPH_SPANS:
+        glyph = FONT_5X7.get(char.upper(), FONT_5X7[' '])
+        spans = []
+        for row in range(7):
+            col = 0
+            while col < 5:
+                if glyph[col] >> row & 1:
+                    start = col
+                    while col < 5 and glyph[col] >> row & 1: col += 1
+                    spans.append((start*scale, row*scale, (col-start)*scale, scale))
+                col += 1
+        _GLYPH_SPANS[key] = spans
+    return _GLYPH_SPANS[key]
+
+def _unfilterPng(raw, width, height, bpp):
+    """ Reverse the PNG row filters, return the pixel bytes."""
+    stride = width*bpp
+    pixels = bytearray()
+    prev = bytearray(stride)
+    for row in range(height):
+        offset = row*(stride+1)
+        ftype, line = raw[offset], bytearray(raw[offset+1:offset+1+stride])
+        if ftype == 1:
+            for i in range(bpp, stride): line[i] = (line[i] + line[i-bpp]) & 0xFF
+        elif ftype == 2:
+            for i in range(stride): line[i] = (line[i] + prev[i]) & 0xFF
+        elif ftype == 3:
+            for i in range(stride):
+                left = line[i-bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif ftype == 4:
+            for i in range(stride):
+                a = line[i-bpp] if i >= bpp else 0
+                b, c = prev[i], (prev[i-bpp] if i >= bpp else 0)
+                p = a + b - c
+                pa, pb, pc = abs(p-a), abs(p-b), abs(p-c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+                line[i] = (line[i] + pred) & 0xFF
+        pixels += line
+        prev = line
+    return pixels
+
+#-----------------------------------------------------------------------------
+def parseColor(color):
+    """ Convert a scene color (name, '#RRGGBB' or (r, g, b)) to a 3 bytes RGB
+        value, the unknown color names are converted to white.
+    """
+    if isinstance(color, (tuple, list)): return bytes(color[:3])
+    color = str(color)
+    if color.startswith('#') and len(color) == 7:
+        return bytes.fromhex(color[1:])
+    return bytes(COLOR_TABLE.get(color.upper(), COLOR_TABLE['WHITE']))
+
+#-----------------------------------------------------------------------------
+def writePng(filePath, width, height, rgbBuf):
+    """ Write a RGB (8 bits per channel) raw buffer to a PNG file."""
+    def _chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+    rowLen = width*3
+    view = memoryview(rgbBuf)
+    raw = b''.join(b'\x00' + view[i:i+rowLen] for i in range(0, rowLen*height, rowLen))
+    with open(filePath, 'wb') as fh:
+        fh.write(PNG_SIG)
+        fh.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        fh.write(_chunk(b'IDAT', zlib.compress(raw, 6)))
+        fh.write(_chunk(b'IEND', b''))
+
+def readPng(filePath):
+    """ Decode a PNG file (8 bits per channel, not interlaced).
+        Returns:
+            tuple: (width, height, RGBA bytes) or None if the format is not supported.
+    """
+    with open(filePath, 'rb') as fh:
+        data = fh.read()
+    if data[:8] != PNG_SIG: return None
+    pos, header, palette, trns, idat = 8, None, None, b'', []
+    while pos + 8 <= len(data):
+        length, tag = struct.unpack('>I4s', data[pos:pos+8])
+        chunk = data[pos+8:pos+8+length]
+        pos += length + 12
+        if tag == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif tag == b'PLTE':
+            palette = chunk
+        elif tag == b'tRNS':
+            trns = chunk
+        elif tag == b'IDAT':
+            idat.append(chunk)
+        elif tag == b'IEND':
+            break
+    if header is None: return None
+    width, height, depth, colorType, _, _, interlace = header
+    bpp = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(colorType)
+    if depth != 8 or interlace or bpp is None or (colorType == 3 and not palette): return None
+    pixels = _unfilterPng(zlib.decompress(b''.join(idat)), width, height, bpp)
+    rgba = bytearray(width*height*4)
+    if colorType == 6:
+        rgba[:] = pixels
+    elif colorType == 2:
+        for i in range(3): rgba[i::4] = pixels[i::3]
+        rgba[3::4] = b'\xff'*(width*height)
+    elif colorType in (0, 4):
+        for i in range(3): rgba[i::4] = pixels[0::bpp]
+        rgba[3::4] = pixels[1::2] if colorType == 4 else b'\xff'*(width*height)
+    else:
+        alpha = trns + b'\xff'*(256-len(trns))
+        for i, idx in enumerate(pixels):
+            rgba[i*4:i*4+3] = palette[idx*3:idx*3+3]
+            rgba[i*4+3] = alpha[idx]
+    return (width, height, rgba)
+
+def loadIcon(imgPath, size=None):
+    """ Load an icon image for the RasterCanvas.drawImage(): the image is scaled
+        to size (nearest pixel), the semi transparent pixels are blended with the
+        map background color and the pixels with alpha < ALPHA_MIN are not drawn.
+        Returns:
+            tuple: (width, height, RGB bytes, rowSpans) or None if the image file
+                can not be decoded.
+    """
+    image = readPng(imgPath) if os.path.exists(imgPath) else None
+    if image is None: return None
+    srcW, srcH, rgba = image
+    w, h = size or (srcW, srcH)
+    bg = scene.BG_COLOR
+    rgbBuf = bytearray(w*h*3)
+    rowSpans = []
+    for row in range(h):
+        srcRow = row*srcH//h*srcW
+        spans, start = [], None
+        for col in range(w):
+            src = (srcRow + col*srcW//w)*4
+            alpha = rgba[src+3]
+            if alpha >= ALPHA_MIN:
+                if start is None: start = col
+                dst = (row*w + col)*3
+                for i in range(3):
+                    rgbBuf[dst+i] = (rgba[src+i]*alpha + bg[i]*(255-alpha))//255
+            elif start is not None:
+                spans.append((start, col))
+                start = None
+        if start is not None: spans.append((start, w))
+        rowSpans.append(spans)
+    return (w, h, bytes(rgbBuf), rowSpans)
+
+def getIconSpecs(mapMgr):
+    """ Return the {icon key: (imgPath, size)} of the alert and env item icons 
+        used by the scene 'bitmap' operations.
+    """
+    iconSpecs = {'alert': (os.path.join(gv.IMG_FD, 'alert.png'), None)}
+    for item in mapMgr.getEnvItems():
+        if item.getImgPath(): iconSpecs[item.getID()] = (item.getImgPath(), tuple(item.getSize()))
+    return iconSpecs
+
+def loadIcons(iconSpecs):
+    """ Return the {icon key: icon image} of the icon specs, each image file is
+        only decoded once per process.
+    """
+    icons = {}
+    for key, (imgPath, size) in iconSpecs.items():
+        cacheKey = (imgPath, size)
+        if cacheKey not in _ICON_CACHE:
+            try:
+                _ICON_CACHE[cacheKey] = loadIcon(imgPath, size)
+            except Exception as err:
+                _ICON_CACHE[cacheKey] = None
+                gv.gDebugPrint("loadIcons(): decode %s failed: %s" % (imgPath, str(err)),
+                               logType=gv.LOG_WARN)
+            if _ICON_CACHE[cacheKey] is None:
+                gv.gDebugPrint("loadIcons(): icon %s is not drawn, %s is not a supported PNG file."
+                               % (key, imgPath), logType=gv.LOG_WARN)
+        if _ICON_CACHE[cacheKey]: icons[key] = _ICON_CACHE[cacheKey]
+    return icons
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class RasterCanvas(object):
+    """ Pure-Python offscreen RGB raster canvas implementing the primitives used
+        by the scene draw operations.
+    """
+    def __init__(self, width, height, bgColor=scene.BG_COLOR):
+        self.width = width
+        self.height = height
+        self.buf = bytearray(parseColor(bgColor)*(width*height))
+
+    def getBuffer(self):
+        return self.buf
+
+#-----------------------------------------------------------------------------
+    def fillRect(self, x, y, w, h, rgb):
+        """ Fill a rectangle area (clipped to the canvas) with the RGB color."""
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        x1, y1 = min(self.width, int(x+w)), min(self.height, int(y+h))
+        if x0 >= x1 or y0 >= y1: return
+        span = rgb*(x1-x0)
+        for row in range(y0, y1):
+            offset = (row*self.width + x0)*3
+            self.buf[offset:offset+len(span)] = span
+
+    def drawLine(self, x1, y1, x2, y2, rgb, width=1, dash=False):
+        """ Draw a line with the pen width, the dash line is drawn as 8 pixels on
+            and 4 pixels off.
+        """
+        half = width//2
+        if x1 == x2 or y1 == y2:
+            if not dash:
+                self.fillRect(min(x1, x2)-half, min(y1, y2)-half, abs(x2-x1)+width, abs(y2-y1)+width, rgb)
+                return
+        steps = max(abs(x2-x1), abs(y2-y1))
+        for i in range(steps+1):
+            if dash and i % 12 >= 8: continue
+            x = x1 + (x2-x1)*i//steps if steps else x1
+            y = y1 + (y2-y1)*i//steps if steps else y1
+            self.fillRect(x-half, y-half, width, width, rgb)
+
+    def drawRect(self, x, y, w, h, pen, brush):
+        """ Draw a rectangle with the scene pen and brush."""
+        if brush: self.fillRect(x, y, w, h, parseColor(brush))
+        color, width, style = pen
+        rgb, dash = parseColor(color), style == scene.PEN_DASH
+        x2, y2 = x+w-1, y+h-1
+        for (ax, ay, bx, by) in ((x, y, x2, y), (x2, y, x2, y2), (x, y2, x2, y2), (x, y, x, y2)):
+            self.drawLine(ax, ay, bx, by, rgb, width, dash)
+
+    def drawCircle(self, x, y, radius, pen, brush):
+        """ Draw a circle with the scene pen and brush."""
+        rSqr = radius*radius
+        fill = parseColor(brush) if brush else None
+        edge = parseColor(pen[0])
+        for dy in range(-radius, radius+1):
+            dx = int((rSqr - dy*dy)**0.5)
+            if fill: self.fillRect(x-dx, y+dy, 2*dx+1, 1, fill)
+            self.fillRect(x-dx, y+dy, 1, 1, edge)
+            self.fillRect(x+dx, y+dy, 1, 1, edge)
+
+    def drawText(self, x, y, text, rgb, pointSize):
+        """ Draw the text with the 5x7 bitmap font scaled to the font point size."""
+        scale = max(1, int(round(pointSize/8.0)))
+        for char in str(text):
+            for dx, dy, w, h in _getGlyphSpans(char, scale):
+                self.fillRect(x+dx, y+dy, w, h, rgb)
+            x += 6*scale
+
+    def drawImage(self, x, y, image):
+        """ Draw a (width, height, rgbBytes[, rowSpans]) image, rowSpans is the
+            list of the opaque (start, end) columns of each row (see loadIcon()), 
+            the whole image is opaque if not set.
+        """
+        w, h, rgbBuf = image[:3]
+        rowSpans = image[3] if len(image) > 3 else None
+        for row in range(h):
+            ty = y + row
+            if not 0 <= ty < self.height: continue
+            for start, end in (rowSpans[row] if rowSpans else ((0, w),)):
+                x0, x1 = max(0, x+start), min(self.width, x+end)
+                if x0 >= x1: continue
+                src = (row*w + x0-x)*3
+                dst = (ty*self.width + x0)*3
+                self.buf[dst:dst+(x1-x0)*3] = rgbBuf[src:src+(x1-x0)*3]
+
+#-----------------------------------------------------------------------------
+def renderScene(sceneOps, frameSize, icons=None):
+    """ Rasterize the scene draw operations to a RasterCanvas.
+        Args:
+            sceneOps (list): operations from railwayMapScene.buildScene().
+            frameSize (tuple): (width, height) of the frame.
+            icons (dict, optional): icon key to the image of drawImage(), the
+                'bitmap' operations without icon are skipped. Defaults to None.
+    """
+    canvas = RasterCanvas(frameSize[0], frameSize[1])
+    icons = icons or {}
+    for op in sceneOps:
+        opType = op[0]
+        if opType == 'rect':
+            canvas.drawRect(*op[1:])
+        elif opType == 'line':
+            _, x1, y1, x2, y2, (color, width, style) = op
+            canvas.drawLine(x1, y1, x2, y2, parseColor(color), width, style == scene.PEN_DASH)
+        elif opType == 'lines':
+            _, points, (color, width, style) = op
+            for i in range(len(points)-1):
+                (x1, y1), (x2, y2) = points[i], points[i+1]
+                canvas.drawLine(x1, y1, x2, y2, parseColor(color), width, style == scene.PEN_DASH)
+        elif opType == 'circle':
+            canvas.drawCircle(*op[1:])
+        elif opType == 'text':
+            _, x, y, text, color, (size, bold) = op
+            canvas.drawText(x, y, text, parseColor(color), size)
+        elif opType == 'bitmap':
+            _, x, y, key = op
+            if key in icons: canvas.drawImage(x, y, icons[key])
+    return canvas
+
+#-----------------------------------------------------------------------------
+def exportFrame(snapshot, frameSize, filePath, iconSpecs=None):
+    """ Build, rasterize and save one frame. This function runs in the exporter's
+        process pool workers.
+        Args:
+            iconSpecs (dict, optional): icons to draw from getIconSpecs(). Defaults to None.
+    """
+    icons = loadIcons(iconSpecs) if iconSpecs else None
+    canvas = renderScene(scene.buildScene(snapshot, frameSize), frameSize, icons=icons)
+    writePng(filePath, frameSize[0], frameSize[1], canvas.getBuffer())
+    return filePath
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class FrameExporter(object):
+    """ Run the map manager simulation without display and export one PNG frame
+        every <stride> ticks. The snapshots are taken in the simulation loop and
+        the frames are rendered in parallel by a process pool.
+    """
+    def __init__(self, mapMgr, outDir, stride=1, frameSize=DEF_FRAME_SIZE,
+                 workers=None, tickTime=DEF_TICK_TIME):
+        """ Init the exporter.
+            Args:
+                mapMgr (railwayMapMgr.MapMgr): the map manager to simulate.
+                outDir (str): folder to save the PNG files.
+                stride (int, optional): export one frame every <stride> ticks. Defaults to 1.
+                frameSize (tuple, optional): frame size. Defaults to DEF_FRAME_SIZE.
+                workers (int, optional): process pool size. Defaults to None (cpu count).
+                tickTime (float, optional): simulation time of one tick. Defaults to DEF_TICK_TIME.
+        """
+        self.mapMgr = mapMgr
+        self.outDir = outDir
+        self.stride = max(1, int(stride))
+        self.frameSize = frameSize
+        self.workers = workers or os.cpu_count() or 1
+        self.tickTime = tickTime
+        self.iconSpecs = getIconSpecs(mapMgr)
+        if not os.path.exists(self.outDir): os.makedirs(self.outDir)
+
+    def run(self, ticks, startTime=None):
+        """ Simulate <ticks> ticks and export the frames.
+            Returns:
+                int: number of frames exported.
+        """
+        simTime = time.time() if startTime is None else startTime
+        frameCount = 0
+        pending = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for tick in range(ticks):
+                self.mapMgr.periodic(simTime)
+                if tick % self.stride == 0:
+                    snapshot = self.mapMgr.getSnapshot()
+                    snapshot['toggle'] = bool(frameCount % 2)
+                    snapshot['time'] = simTime
+                    filePath = os.path.join(self.outDir, 'frame_%07d.png' % frameCount)
+                    pending.append(executor.submit(exportFrame, snapshot, self.frameSize, filePath,
+                                                   self.iconSpecs))
+                    frameCount += 1
+                    # limit the queued snapshots if the rendering can not catch up.
+                    if len(pending) >= 2*self.workers:
+                        pending.pop(0).result()
+                simTime += self.tickTime
+            for future in pending: future.result()
+        gv.gDebugPrint("Exported %s frames to %s" % (str(frameCount), self.outDir), logType=gv.LOG_INFO)
+        return frameCount
+
+#-----------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description='Export the railway map frames as PNG files.')
+    parser.add_argument('-t', '--ticks', type=int, default=1000, help='number of simulation ticks.')
+    parser.add_argument('-s', '--stride', type=int, default=10, help='export one frame every N ticks.')
+    parser.add_argument('-o', '--out', default='frames', help='output folder.')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='number of render processes.')
+    args = parser.parse_args()
+    import railwayMapMgr
+    gv.iMapMgr = railwayMapMgr.MapMgr(None)
+    exporter = FrameExporter(gv.iMapMgr, args.out, stride=args.stride, workers=args.workers)
+    exporter.run(args.ticks)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayInterlock.py
+#
+# Purpose:     This module provides the cross line interlocking and priority rule
+#              engine. The rules are declared as data (line ID + item index) and
+#              compiled once into bitmasks over the packed line states (bit i = the
+#              line's signal/sensor i), so all the rules of one target line are
+#              evaluated with a few integer operations per tick:
+#              - signal conflict: turn off the target line's signal if it and ALL
+#                the other line's signals in the rule are on (junction interlock).
+#              - sensor priority: clear the target line's sensor if it and ANY of
+#                the other line's sensors in the rule are on (low priority line).
+#              - signal priority: the junction signals to update when a line moved.
+#              A new junction only needs a new rule entry.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+# target line -> [(target idx, other line, (other idxs)), ...]
+# ccline has the lowest priority: turn off the cc line signal if both are on.
+SIGNAL_CONFLICT_RULES = {
+    'ccline': [
+        (0, 'nsline', (0, 1)),
+        (1, 'nsline', (2,)),
+        (2, 'nsline', (3,)),
+        (3, 'weline', (6, 7)),
+        (4, 'weline', (4, 5)),
+        (5, 'weline', (2, 3)),
+        (6, 'weline', (0, 1)),
+    ]
+}
+
+# ccline has the lowest priority: clear the cc line sensor if the other line's
+# sensor is on.
+SENSOR_PRIORITY_RULES = {
+    'ccline': [
+        (0, 'nsline', (0,)),
+        (2, 'nsline', (4,)),
+        (4, 'nsline', (2,)),
+        (6, 'nsline', (2,)),
+        (8, 'weline', (7, 9)),
+        (10, 'weline', (5, 11)),
+        (12, 'weline', (3, 13)),
+        (14, 'weline', (1, 15)),
+    ]
+}
+
+# moved line -> the lines whose junction signals need to be updated.
+SIGNAL_PRIORITY = {
+    'weline': ('ccline',),
+    'nsline': ('ccline',),
+    'ccline': ('weline', 'nsline'),
+}
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def packStates(states):
+    """ Pack a list of bool/int states to an int (bit i = states[i])."""
+    val = 0
+    for i, state in enumerate(states):
+        if state: val |= 1 << i
+    return val
+
+def getMaskIdx(mask):
+    """ Return the index list of the set bits of the mask."""
+    idxList = []
+    while mask:
+        low = mask & -mask
+        idxList.append(low.bit_length() - 1)
+        mask ^= low
+    return idxList
+
+def compileRules(rules):
+    """ Compile the rules to bitmasks.
+        Args:
+            rules (dict): target line -> [(target idx, other line, (other idxs)), ...]
+        Returns:
+            dict: target line -> [(target bit, other line, other mask), ...]
+    """
+    compiled = {}
+    for key, ruleList in rules.items():
+        compiled[key] = [(1 << idx, otherKey, sum(1 << i for i in set(idxs)))
+                         for idx, otherKey, idxs in ruleList]
+    return compiled
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class InterlockEngine(object):
+    """ Evaluate the compiled interlocking/priority rules on the packed states."""
+    def __init__(self, conflictRules=SIGNAL_CONFLICT_RULES, sensorRules=SENSOR_PRIORITY_RULES,
+                 sigPriority=SIGNAL_PRIORITY):
+        self.conflictRules = compileRules(conflictRules)
+        self.sensorRules = compileRules(sensorRules)
+        self.sigPriority = dict(sigPriority)
+
+    def _evalRules(self, compiled, states, matchAll):
+        """ Return {target line: mask of the target bits to clear}."""
+        result = {}
+        for key, ruleList in compiled.items():
+            target = states.get(key, 0)
+            if not target: continue
+            clearMask = 0
+            for bit, otherKey, mask in ruleList:
+                if target & bit:
+                    other = states.get(otherKey, 0) & mask
+                    if (other == mask) if matchAll else other: clearMask |= bit
+            if clearMask: result[key] = clearMask
+        return result
+
+#-----------------------------------------------------------------------------
+    def getSignalConflicts(self, signalStates):
+        """ Return {line: mask of the signals to turn off}.
+            Args:
+                signalStates (dict): line -> packed signals state int.
+        """
+        return self._evalRules(self.conflictRules, signalStates, True)
+
+    def getSensorOverrides(self, sensorStates):
+        """ Return {line: mask of the sensors to clear}.
+            Args:
+                sensorStates (dict): line -> packed sensors state int.
+        """
+        return self._evalRules(self.sensorRules, sensorStates, False)
+
+    def getSignalUpdateList(self, signals, junctionSigIdxDict):
+        """ Return {moved line: [<AgentSignal>, ...]} the junction signals need to be
+            updated after the line moved, in the rule order.
+        """
+        updateDict = {}
+        for key, lineKeys in self.sigPriority.items():
+            updateDict[key] = [signal for lineKey in lineKeys
+                               for idx, signal in enumerate(signals.get(lineKey, []))
+                               if idx in junctionSigIdxDict.get(lineKey, ())]
+        return updateDict
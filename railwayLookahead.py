@@ -0,0 +1,131 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayLookahead.py
+#
+# Purpose:     This module provides the per track ordered lookahead index of the
+#              trackside objects (signals, station dock points and station signal
+#              points). Each object is saved as the track arc length interval(s)
+#              where the track is within the object's check distance, sorted by
+#              the arc position. A train only needs to bisect its own arc position
+#              range to get the few objects it may reach, the exact distance checks
+#              in the agents are then done on these candidates only.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import math
+from bisect import bisect_left, bisect_right
+
+# Extra distance (pixel) added to the check radius to cover the int rounding of
+# the carriage position on the track.
+ARC_MARGIN = 2
+SIGNAL_RANGE = 20   # AgentTrain.checkSignal() max check distance (head sensor).
+DOCK_RANGE = 5      # AgentStation.updateTrainsDock() dock check distance.
+STATION_SIG_RANGE = 20  # AgentStation._checkNearSignal() default threshold.
+JUNCTION_RANGE = 15     # AgentJunction._checkTrainEnter() default threshold.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class _ArcIntervals(object):
+    """ Sorted arc intervals (start, end, objIdx) of one object kind."""
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals)
+        self.starts = [item[0] for item in self.intervals]
+        self.maxLen = max([e-s for s, e, _ in self.intervals] + [0])
+
+    def query(self, sStart, sEnd, result):
+        """ Add the objIdx of the intervals overlap [sStart, sEnd] to result set."""
+        lo = bisect_left(self.starts, sStart - self.maxLen)
+        hi = bisect_right(self.starts, sEnd)
+        for start, end, objIdx in self.intervals[lo:hi]:
+            if end >= sStart: result.add(objIdx)
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class TrackLookahead(object):
+    """ Lookahead index of one track (cycle railway points list)."""
+    def __init__(self, railwayPts):
+        self.railwayPts = railwayPts
+        self.cumS = []  # arc length at each railway point.
+        self.segLen = []
+        total = 0
+        for i, pt in enumerate(railwayPts):
+            nextPt = railwayPts[(i+1) % len(railwayPts)]
+            self.cumS.append(total)
+            self.segLen.append(math.hypot(nextPt[0]-pt[0], nextPt[1]-pt[1]))
+            total += self.segLen[-1]
+        self.total = total
+        self.kinds = {}     # kind -> _ArcIntervals
+
+    def _getArcIntervals(self, pos, radius):
+        """ Return the arc intervals where the track is within radius to pos."""
+        intervals = []
+        for i, (x1, y1) in enumerate(self.railwayPts):
+            x2, y2 = self.railwayPts[(i+1) % len(self.railwayPts)]
+            length = self.segLen[i]
+            if length == 0: continue
+            ux, uy = (x2-x1)/length, (y2-y1)/length
+            proj = (pos[0]-x1)*ux + (pos[1]-y1)*uy          # projection on the segment line.
+            dist = abs((pos[0]-x1)*uy - (pos[1]-y1)*ux)    # distance to the segment line.
+            if dist > radius: continue
+            half = math.sqrt(radius**2 - dist**2)
+            u0, u1 = max(0, proj-half), min(length, proj+half)
+            if u0 <= u1: intervals.append((self.cumS[i]+u0, self.cumS[i]+u1))
+        return intervals
+
+    def getNearestArc(self, pos):
+        """ Return the arc position of the track point nearest to pos."""
+        bestDist, bestArc = None, 0
+        for i, (x1, y1) in enumerate(self.railwayPts):
+            x2, y2 = self.railwayPts[(i+1) % len(self.railwayPts)]
+            length = self.segLen[i]
+            if length == 0: continue
+            proj = min(max(((pos[0]-x1)*(x2-x1) + (pos[1]-y1)*(y2-y1))/length, 0), length)
+            dist = math.hypot(x1 + (x2-x1)*proj/length - pos[0], y1 + (y2-y1)*proj/length - pos[1])
+            if bestDist is None or dist < bestDist: bestDist, bestArc = dist, self.cumS[i] + proj
+        return bestArc
+
+#-----------------------------------------------------------------------------
+    def addObjects(self, kind, posList, radius):
+        """ Index a list of object positions (None position is skipped) as <kind>."""
+        intervals = []
+        for objIdx, pos in enumerate(posList):
+            if pos is None: continue
+            for start, end in self._getArcIntervals(pos, radius + ARC_MARGIN):
+                intervals.append((start, end, objIdx))
+        self.kinds[kind] = _ArcIntervals(intervals)
+
+    def getArcPos(self, pos, nextPtIdx, trainDir):
+        """ Return the arc position of a carriage at pos moving to railway point
+            nextPtIdx in trainDir (1: points increase order, -1: decrease order).
+        """
+        num = len(self.railwayPts)
+        segStart = (nextPtIdx - 1) % num if trainDir > 0 else nextPtIdx
+        x, y = self.railwayPts[segStart]
+        return self.cumS[segStart] + math.hypot(pos[0]-x, pos[1]-y)
+
+    def getTrainArcRange(self, train):
+        """ Return the list of (start, end) arc ranges covered by the train."""
+        destList, trainDir = train.getDestList(), train.getTrainDir()
+        arcList = [self.getArcPos(pos, destList[i], trainDir)
+                   for i, pos in enumerate(train.getTrainPos())]
+        low, high = min(arcList), max(arcList)
+        if high - low > self.total/2:
+            # the train is crossing the track start point.
+            return [(0, max(s for s in arcList if s < self.total/2)),
+                    (min(s for s in arcList if s >= self.total/2), self.total)]
+        return [(low, high)]
+
+    def query(self, kind, arcRanges):
+        """ Return the sorted objIdx list of <kind> which overlaps the arc ranges."""
+        result = set()
+        if kind in self.kinds:
+            for start, end in arcRanges:
+                if start > end: start, end = end, start
+                self.kinds[kind].query(start, end, result)
+        return sorted(result)
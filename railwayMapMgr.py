@@ -1,602 +1,1344 @@
-#!/usr/bin/python
-#-----------------------------------------------------------------------------
-# Name:        railwayMgr.py
-#
-# Purpose:     The management module to control all the components on the map 
-#              and update the components state. 
-# 
-# Author:      Yuancheng Liu
-#
-# Version:     v0.1.3
-# Created:     2023/05/29
-# Copyright:   Copyright (c) 2023 LiuYuancheng
-# License:     MIT License
-#-----------------------------------------------------------------------------
-
-import os
-import json
-import wx
-from collections import OrderedDict
-
-import railwayPWSimuGlobal as gv
-import railwayAgent as agent
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class MapMgr(object):
-    """ Map manager to init/control differet elements state on the map."""
-    def __init__(self, parent):
-        """ Init all the elements on the map. All the parameters are public to 
-            other module.
-        """
-        self.tracks = OrderedDict()
-        self.trains = OrderedDict()
-        self.sensors = OrderedDict()
-        self.signals = OrderedDict()
-        self.stations = OrderedDict()
-
-        self.junctionSenIdxDict = {} 
-        self.blockSenIdxDict= {}
-        self.junctionSigIdxDict = {}
-        self.blockSigIdxDict = {}
-        
-        self.junctions = []
-        self.envItems = [] # Currently we only have building item so use list instead of dict()
-
-        self._initTandT()
-        self._initSensors()
-        self._initSignal()
-        self._initStation()
-        self._initEnv()
-        self._initJunction()
-
-        gv.gDebugPrint('Map display management controller inited', logType=gv.LOG_INFO)
-
-#-----------------------------------------------------------------------------
-    def _initTandT(self):
-        """ This is a private Train&Tracks data init function, currently the data 
-            is hardcoded. It will be replaced by loading a config file before the 
-            whole program init.(load to a gv.gxx parameter)
-        """
-        # Init WE-Line and the trains on it.
-        key = 'weline'
-        self.tracks[key] = {
-            'name': key,
-            'color': gv.gTrackConfig[key]['color'],
-            'type': gv.RAILWAY_TYPE_CYCLE,
-            'points': [(50, 200), (100, 200), (100, 600), (600, 600), (600, 800),
-                       (900, 800), (900, 400), (1550, 400), (1550, 450), (950, 450),
-                       (950, 850), (550, 850), (550, 650), (50, 650)]
-        }
-        trackTrainCfg_we = [{'id': 'we01', 'head': (50, 200), 'nextPtIdx': 1, 'len': 5}, 
-                            {'id': 'we02', 'head': (460, 600),'nextPtIdx': 7, 'len': 5},
-                            {'id': 'we03', 'head': (1500, 400), 'nextPtIdx': 3, 'len': 5},
-                            {'id': 'we04', 'head': (800, 850), 'nextPtIdx': 11, 'len': 5}]
-        #if gv.gCollsionTestFlg: trackTrainCfg_we[1] = {'id': 'we02', 'head': (480, 600), 'nextPtIdx': 3, 'len': 5}
-        self.trains[key] = self._getTrainsList(trackTrainCfg_we, self.tracks[key]['points'])
-        # Init NS-Line and the trains on it.
-        key = 'nsline'
-        self.tracks[key] = {
-            'name' : key,
-            'color': gv.gTrackConfig[key]['color'],
-            'type': gv.RAILWAY_TYPE_CYCLE,
-            'points': [(300, 50), (1200, 50), (1200, 300), (800, 300), (800, 600), (700, 600), 
-                       (700, 100), (400, 100), (400, 450), (300, 450)]
-        }
-        trackTrainCfg_ns = [{'id': 'ns01', 'head': (1000, 50), 'nextPtIdx': 1, 'len': 4},
-                            {'id': 'ns02', 'head': (1100, 300), 'nextPtIdx': 3, 'len': 4},
-                            {'id': 'ns03', 'head': (600, 100), 'nextPtIdx': 7, 'len': 4}]
-
-        self.trains[key] = self._getTrainsList(trackTrainCfg_ns, self.tracks[key]['points'])
-        # Init CC-Line and the trains on it.
-        key = 'ccline'
-        self.tracks[key] = {
-            'name' : key,
-            'color': gv.gTrackConfig[key]['color'],
-            'type': gv.RAILWAY_TYPE_CYCLE,
-            'points': [(200, 200), (1400, 200), (1400, 700), (200, 700)]
-        }
-        trackTrainCfg_cc = [  {'id': 'cc01', 'head': (1100, 200), 'nextPtIdx': 1, 'len': 5},
-                            {'id': 'cc02', 'head': (1300, 700), 'nextPtIdx': 3, 'len': 5},
-                            {'id': 'cc03', 'head': (300, 700), 'nextPtIdx': 3, 'len': 5}]
-        #if gv.gCollsionTestFlg: trackTrainCfg_cc[2] = {'id': 'cc03', 'head': (700, 700), 'nextPtIdx': 3, 'len': 6}
-        #if gv.gTrainDistTestFlag:
-        #    trackTrainCfg_cc[0]['head'] = (510, 700)
-        #    trackTrainCfg_cc[1]['head'] = (430, 700)
-        #    trackTrainCfg_cc[2]['head'] = (300, 700)
-        self.trains[key] = self._getTrainsList(trackTrainCfg_cc, self.tracks[key]['points'])
-        # Init the maintance line 
-        key = 'mtline'
-        self.tracks[key] = {
-            'name' : key,
-            'color': gv.gTrackConfig[key]['color'],
-            'type': gv.RAILWAY_TYPE_CYCLE,
-            'points': [(460, 320), (640, 320), (640, 480), (460, 480)]
-        }
-        self.trains[key] = self._getTrainsList([], [])
-
-#-----------------------------------------------------------------------------
-    def _initSensors(self):
-        """ Init all the train detection sensors on the map. """
-        # Init all the WE-Line sensors
-        sensorPos_we= [
-            (100, 400), (170, 600), (270, 600), (600, 670), (600, 770), (900, 730),
-            (900, 630), (1370, 400), (1470, 400), (1430, 450), (1330, 450), 
-            (950, 670), (950, 770), (550, 730), (550, 650), (230, 650), (130, 650),
-            # Add the track block sensors:
-            (600, 600), (1140, 400), (950, 480), (640, 850)
-            ]
-        self.junctionSenIdxDict['weline'] = (0, 17)
-        self.sensors['weline'] = agent.AgentSensors(self, 'we', sensorPos_we)
-        # Init all the NS-line sensors
-        sensorPos_ns = [
-            (300, 230), (300, 130), (1200, 170), (1200, 270), (700, 230), (700, 130),
-            (400, 170), (400, 270),
-            # Add the track block sensors:
-            (300, 340), (760, 50), (800, 400)
-            ]
-        self.junctionSenIdxDict['nsline'] = (0, 8)
-        self.sensors['nsline'] = agent.AgentSensors(self, 'ns', sensorPos_ns)
-        # Init all the CC-Line sensors.
-        sensorPos_cc = [
-            (270, 200), (480, 200), (670, 200), (770, 200), 
-            (1170, 200), (1270, 200), (1400, 370), (1400, 500), 
-            (980, 700), (830, 700), (630, 700), (460, 700),
-            (200, 700), (200, 530), 
-            # Add the track block sensors:
-            (200, 360), (600, 200), (1080, 200),(1400, 260), (1320, 700)
-            ]
-        self.junctionSenIdxDict['ccline'] = (0, 14)
-        self.sensors['ccline'] = agent.AgentSensors(self, 'cc', sensorPos_cc)
-        # Init all the MT-Line sensors
-        sensorPos_mt = [
-            (640, 340), (640, 460)
-            ]
-        self.junctionSenIdxDict['mtline'] = (0, 2)
-        self.sensors['mtline'] = agent.AgentSensors(self, 'mt', sensorPos_mt)
-
-#-----------------------------------------------------------------------------
-    def _initSignal(self):
-        # Set all the signal on track weline
-        trackSignalConfig_we = [
-            {'id': 'we-0', 'pos':(160, 600), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(12,), 'offIdx':(13,) }, 
-            {'id': 'we-1', 'pos':(240, 650), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(12,), 'offIdx':(13,) },
-            {'id': 'we-2', 'pos':(600, 660), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(10,), 'offIdx':(11,) },
-            {'id': 'we-3', 'pos':(550, 740), 'dir': gv.LAY_L, 'tiggerS': self.sensors['ccline'], 'onIdx':(10,), 'offIdx':(11,) },
-            {'id': 'we-4', 'pos':(900, 740), 'dir': gv.LAY_L, 'tiggerS': self.sensors['ccline'], 'onIdx':(8,), 'offIdx':(9,) },
-            {'id': 'we-5', 'pos':(950, 660), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(8,), 'offIdx':(9,) },
-            {'id': 'we-6', 'pos':(1360, 400), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(6,), 'offIdx':(7,) },
-            {'id': 'we-7', 'pos':(1440, 450), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(6,), 'offIdx':(7,) },
-            # Add the track block control signal
-            {'id': 'we-8', 'pos':(100, 340), 'dir': gv.LAY_R, 'tiggerS': self.sensors['weline'], 'onIdx':(0,), 'offIdx':(1,) },
-            {'id': 'we-9', 'pos':(540, 600), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(17,), 'offIdx':(3,) },
-            {'id': 'we-10', 'pos':(880, 800), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(5,), 'offIdx':(6,) },
-            {'id': 'we-11', 'pos':(1080, 400), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(18,), 'offIdx':(7,) },
-            {'id': 'we-12', 'pos':(980, 450), 'dir': gv.LAY_D, 'tiggerS': self.sensors['weline'], 'onIdx':(19,), 'offIdx':(11,) },
-            {'id': 'we-13', 'pos':(700, 850), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(20,), 'offIdx':(13,) },
-
-        ]
-        self.blockSenIdxDict ['weline'] = (0,1,17,3,5,6,18,7,19,11,20,13)
-        self.signals['weline'] = []
-        for info in trackSignalConfig_we:
-            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
-            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
-            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
-            self.signals['weline'].append(signal)
-        self.junctionSigIdxDict['weline'] = (0,1,2,3,4,5,6,7)
-        self.blockSigIdxDict['weline'] = (8,9,10,11,12,13)
-
-        # Set all the signal on track nsline
-        trackSignalConfig_ns = [
-            {'id': 'ns-0', 'pos':(300, 240), 'dir': gv.LAY_L, 'tiggerS': self.sensors['ccline'], 'onIdx':(0,), 'offIdx':(1,) },
-            {'id': 'ns-1', 'pos':(400, 160), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(0,), 'offIdx':(1,) },
-            {'id': 'ns-2', 'pos':(700, 240), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(2,), 'offIdx':(3,) },
-            {'id': 'ns-3', 'pos':(1200, 160), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(4,), 'offIdx':(5,) },
-            # Add the track block control signal
-            {'id': 'ns-4', 'pos':(300, 400), 'dir': gv.LAY_R, 'tiggerS': self.sensors['nsline'], 'onIdx':(8,), 'offIdx':(1,) },
-            {'id': 'ns-5', 'pos':(700, 50), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(9,), 'offIdx':(2,) },
-            {'id': 'ns-6', 'pos':(800, 340), 'dir': gv.LAY_R, 'tiggerS': self.sensors['nsline'], 'onIdx':(10,), 'offIdx':(4,) },
-        ]
-        self.blockSenIdxDict['nsline'] = (8,1,9,2,10,4)
-        self.signals['nsline'] = []
-        for info in trackSignalConfig_ns:
-            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
-            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
-            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
-            self.signals['nsline'].append(signal)
-
-        self.junctionSigIdxDict['nsline'] = (0,1,2,3)
-        self.blockSigIdxDict['nsline'] =(4,5,6)
-
-        # set all the signal on track ccline
-        trackSignalConfig_cc = [
-            {'id': 'cc-0', 'pos':(260, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(0, 6), 'offIdx':(1, 7) },
-            {'id': 'cc-1', 'pos':(660, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(4,), 'offIdx':(5,) },
-            {'id': 'cc-2', 'pos':(1160, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(2,), 'offIdx':(3,) },
-            {'id': 'cc-3', 'pos':(1400, 360), 'dir': gv.LAY_R, 'tiggerS': self.sensors['weline'], 'onIdx':(7,9), 'offIdx':(8,10) },
-            {'id': 'cc-4', 'pos':(990, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(5,11), 'offIdx':(6,12) },
-            {'id': 'cc-5', 'pos':(640, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(3,13), 'offIdx':(4,14) },
-            {'id': 'cc-6', 'pos':(210, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(1, 15), 'offIdx':(2,16) },
-            # Add the track block control signal
-            {'id': 'cc-7', 'pos':(200, 420), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(14,), 'offIdx':(0,) },
-            {'id': 'cc-8', 'pos':(540, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(15,), 'offIdx':(2,) },
-            {'id': 'cc-9', 'pos':(1020, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(16,), 'offIdx':(4,) },
-            {'id': 'cc-10', 'pos':(1400, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(17,), 'offIdx':(6,) },
-            {'id': 'cc-11', 'pos':(1380, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(18,), 'offIdx':(8,) },
-            {'id': 'cc-12', 'pos':(265, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(12,), 'offIdx':(13,) },
-        ]
-        self.blockSenIdxDict['ccline'] = (14,0,15,2,16,4,17,6,18,8,12,13)
-        self.signals['ccline'] = []
-        for info in trackSignalConfig_cc:
-            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
-            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
-            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
-            self.signals['ccline'].append(signal)
-
-        self.junctionSigIdxDict['ccline'] = (0,1,2,3,4,5,6)
-        self.blockSigIdxDict['ccline'] = (7,8,9,10,11,12)
-
-        # set all the singal on track mtline
-        trackSignalConfig_mt = [
-            {'id': 'mt-0', 'pos':(460, 400), 'dir': gv.LAY_R, 'tiggerS': self.sensors['mtline'], 'onIdx':(0,), 'offIdx':(1,) }
-        ]
-        self.signals['mtline'] = []
-        for info in trackSignalConfig_mt:
-            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
-            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
-            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
-            self.signals['mtline'].append(signal)
-
-#---------------------------------------------------------------------------
-    def _initStation(self):
-        """ Init the station based on the configuration file, YC: this function is used to replace the old 
-            _initstation() function which did the hard code station in the code.
-        """
-        for key in gv.gTrackConfig.keys():
-            stationCfgFile = gv.gTrackConfig[key]['stationCfg']
-            stationCfgPath = os.path.join(gv.CFG_FD, stationCfgFile)
-            if os.path.exists(stationCfgPath):
-                with open(stationCfgPath) as json_file:
-                    trackStationList = json.load(json_file)
-                    self.stations[key] = []
-                    for info in trackStationList:
-                        layoutParm = info['layout'] if 'layout' in info.keys() else gv.LAY_H
-                        signalParm = info['signalLayout'] if 'signalLayout' in info.keys() else gv.LAY_L
-                        station = agent.AgentStation(self, info['id'], info['pos'], layout=layoutParm, signalLayout=signalParm)
-                        station.setCheckTrains(self.trains[key])
-                        if 'labelPos' in info.keys(): station.setlabelPos(info['labelPos'])
-                        self.stations[key].append(station)
-            else:
-                gv.gDebugPrint("The station configure file is not exist, expected file path: %s" % str(stationCfgPath),
-                               logType=gv.LOG_WARN)
-
-#-----------------------------------------------------------------------------
-    def _initStation_old(self):
-        """ Init all the train stations. [This function is replayed by the station configure files] """
-        # Init all stations on weline.
-        trackStation_we = [{'id': 'Tuas_Link', 'pos': (80, 200), 'layout': gv.LAY_H},
-                           {'id': 'Jurong_East', 'pos': (360, 600), 'layout': gv.LAY_H},
-                           {'id': 'Outram_Park', 'pos': (750, 800), 'layout': gv.LAY_H},
-                           {'id': 'City_Hall', 'pos': (900, 500), 'layout': gv.LAY_V, 'labelPos':(-70, -10)},
-                           {'id': 'Paya_Lebar', 'pos': (1250, 400), 'layout': gv.LAY_H },
-                           {'id': 'Changi_Airport', 'pos': (1550, 430), 'layout': gv.LAY_V, 'labelPos':(-70, -60)},
-                           {'id': 'Lavender', 'pos': (1100, 450), 'layout': gv.LAY_H},
-                           {'id': 'Raffles_Place', 'pos': (850, 850), 'layout': gv.LAY_H},
-                           {'id': 'Clementi', 'pos': (430, 650), 'layout': gv.LAY_H},
-                           {'id': 'Boon_Lay', 'pos': (50, 450), 'layout': gv.LAY_V, 'labelPos':(20, -10)}]
-        self.stations['weline'] = []
-        for info in trackStation_we:
-            station = agent.AgentStation(self, info['id'], info['pos'], layout=info['layout'])
-            station.setCheckTrains(self.trains['weline'])
-            if 'labelPos' in info.keys(): station.setlabelPos(info['labelPos'])
-            self.stations['weline'].append(station)
-        
-        # Init all stations on nsline
-        trackStation_ns = [{'id': 'Jurong_East', 'pos': (360, 450)},
-                           {'id': 'Woodlands', 'pos': (430, 50)},
-                           {'id': 'Yishun', 'pos': (1040, 50)},
-                           {'id': 'Orchard', 'pos': (980, 300)},
-                           {'id': 'City_Hall', 'pos': (750, 600)},
-                           {'id': 'Bishan', 'pos': (550, 100)}]
-        self.stations['nsline'] = []
-        for info in trackStation_ns:
-            station = agent.AgentStation(self, info['id'], info['pos'])
-            station.setCheckTrains(self.trains['nsline'])
-            self.stations['nsline'].append(station)
-
-        # Init all stations on ccline
-        trackStation_cc = [{'id': 'Buona_Vista', 'pos': (320, 700), 'layout': gv.LAY_H},
-                           {'id': 'Farrer_Road', 'pos': (200, 300), 'layout': gv.LAY_V, 'labelPos':(20, -10) },
-                           {'id': 'Serangoon', 'pos': (930, 200), 'layout': gv.LAY_H},
-                           {'id': 'Nicoll_Highway', 'pos': (1400, 600), 'layout': gv.LAY_V, 'labelPos':(20, -10)},
-                           {'id': 'Bayfront', 'pos': (1160, 700),'layout': gv.LAY_H},
-                           {'id': 'Harbourfront', 'pos': (710, 700),'layout': gv.LAY_H}]
-        self.stations['ccline'] = []
-        for info in trackStation_cc:
-            station = agent.AgentStation(self, info['id'], info['pos'], layout=info['layout'])
-            station.setCheckTrains(self.trains['ccline'])
-            if 'labelPos' in info.keys(): station.setlabelPos(info['labelPos'])
-            self.stations['ccline'].append(station)
-
-#-----------------------------------------------------------------------------
-    def _initJunction(self):
-        juncType1 = ('nsline', 'ccline')
-        juncType2 = ('weline', 'ccline')
-        metroJunctions = [ 
-            {'pos':(300, 200), 'tracks':juncType1, 'Idx1': (0,), 'Idx2': (0,)}, 
-            {'pos':(400, 200), 'tracks':juncType1, 'Idx1': (1,), 'Idx2': (0,)},
-            {'pos':(700, 200), 'tracks':juncType1, 'Idx1': (2,), 'Idx2': (1,)}, 
-            {'pos':(1200, 200), 'tracks':juncType1, 'Idx1': (3,), 'Idx2': (2,)},
-            {'pos':(1400, 400), 'tracks':juncType2, 'Idx1': (6,), 'Idx2': (3,)}, 
-            {'pos': (1400, 450), 'tracks':juncType2, 'Idx1': (7,), 'Idx2': (3,)},
-            {'pos':(950, 700), 'tracks':juncType2, 'Idx1': (5,), 'Idx2': (4,)}, 
-            {'pos':(900, 700), 'tracks':juncType2, 'Idx1': (4,), 'Idx2': (4,)},
-            {'pos':(600, 700), 'tracks':juncType2, 'Idx1': (2,), 'Idx2': (5,)},
-            {'pos':(550, 700), 'tracks':juncType2, 'Idx1': (3,), 'Idx2': (5,)},
-            {'pos':(200, 650), 'tracks':juncType2, 'Idx1': (1,), 'Idx2': (6,)}, 
-            {'pos':(200, 600), 'tracks':juncType2, 'Idx1': (0,), 'Idx2': (6,)}            
-
-        ]
-        for i, info in enumerate(metroJunctions):
-            track1Id = info['tracks'][0]
-            track2Id = info['tracks'][1]
-            #signalList = []
-            junction = agent.AgentJunction(self, 'jc-%s' % str(i), info['pos'], track1Id, track2Id)
-            # YC TODO : temporary disabled the junction deadlock check function as we will 
-            # add the train priority check part.
-            # Set the signals related to each other in each junction  
-            # for j, signal in enumerate(self.signals[track1Id]):
-            #     if j in info['Idx1']:
-            #         signalList.append(signal)
-            # for j, signal in enumerate(self.signals[track2Id]):
-            #     if j in info['Idx2']:
-            #         signalList.append(signal)
-            # junction.setSignalList(signalList)         
-            self.junctions.append(junction)
-
-#-----------------------------------------------------------------------------
-    def _initEnv(self):
-        """ Init all the enviroment Items on the map such as IOT device or camera."""
-        envCfg = [ {'id':'Industry Area', 'img':'factory_0.png', 'pos':(100, 90), 'size':(120, 120)},
-                   {'id':'Airport', 'img':'airport.jpg', 'pos':(1500, 240), 'size':(160, 100)},
-                   {'id':'JurongEast-Jem', 'img':'city_0.png', 'pos':(360, 520), 'size':(80, 80)},
-                   {'id':'CityHall-01', 'img':'city_2.png', 'pos':(750, 520), 'size':(90, 80)},
-                   {'id':'CityHall-02', 'img':'city_1.png', 'pos':(850, 600), 'size':(80, 60)},
-                   {'id':'Hospital', 'img':'hospitalIcon.png', 'pos':(1080, 540), 'size':(120, 80)},
-
-                   {'id':'Legend', 'img':'legend.png', 'pos':(1450, 820), 'size':(200, 150)},
-                   {'id':'Track-Junction-PLCs', 'img': 'plcIcon2.png', 'pos':(50, 780), 'size':(60,50)},
-                   {'id':'Track-Station-PLCs', 'img': 'plcIcon2.png', 'pos':(50, 860), 'size':(60,50)},
-                   {'id':'Train-Ctrl-PLCs', 'img': 'plcIcon2.png', 'pos':(310, 780), 'size':(60,50)},
-                   {'id':'Track-Block-PLCs', 'img': 'plcIcon2.png', 'pos':(310, 860), 'size':(60,50)},
-                   {'id':'Train-Ctrl-RTUs', 'img': 'rtuIcon2.png', 'pos':(1100, 780), 'size':(60,50)},
-                   {'id':'Date & Time', 'img': 'time.png', 'pos':(1270, 50), 'size':(30,30)}
-                   ]
-        for info in envCfg:
-            imgPath = os.path.join(gv.IMG_FD, info['img'])
-            if os.path.exists(imgPath):
-                bitmap = wx.Bitmap(imgPath)
-                building = agent.agentEnv(self, info['id'], info['pos'], bitmap, info['size'] )
-                self.envItems.append(building)
-        
-        labelCfg = [
-                {'id': 'West-East Line [WE]', 'img': None, 'pos': (550, 550), 'size': (180, 30),
-                'color': gv.gTrackConfig['weline']['color'], 'link':((550, 550), (550, 600))},
-                {'id': 'North-South [NS]', 'img': None, 'pos': (850, 100), 'size': (180, 30),
-                'color': gv.gTrackConfig['nsline']['color'], 'link':((850, 100), (850, 50))},
-                {'id': 'Circle Line [CC]', 'img': None, 'pos': (1260, 650), 'size': (180, 30),
-                'color': gv.gTrackConfig['ccline']['color'], 'link':((1260, 650), (1260, 700))},
-                {'id': 'Maintenance Line [MT]', 'img': None, 'pos': (550, 280), 'size': (190, 30),
-                'color': gv.gTrackConfig['mtline']['color'], 'link':((550, 280), (550, 320))}
-        ]
-        for info in labelCfg:
-            label = agent.agentEnv(self, info['id'], info['pos'], None, info['size'], tType=gv.LABEL_TYPE )
-            if 'link' in info.keys(): label.setLinkList(info['link'])
-            if 'color' in info.keys(): label.setColor(info['color'])
-            self.envItems.append(label)
-
-#-----------------------------------------------------------------------------
-    def _getTrainsList(self, trainCfg, trackPts):
-        """ Build the railwayAgent.TainAgent obj list based on inmput train config information.
-        Args:
-            trainCfg (_type_): _description_
-            trackPts (_type_): _description_
-        Returns:
-            _type_: _description_
-        """
-        trainList = []
-        for trainInfo in trainCfg:
-            trainObj = agent.AgentTrain(self, trainInfo['id'], trainInfo['head'], trackPts, 
-                                        trainLen=trainInfo['len'])
-            trainList.append(trainObj)
-        return trainList
-
-#-----------------------------------------------------------------------------
-    def _updateJunctionState(self):
-        collsionTrainsDict = {
-            'weline' : [], 
-            'nsline' : [],
-            'ccline' : [],
-            'mtline' : [],
-        }
-        for junction in self.junctions:
-            junction.updateState()
-            #if gv.gDeadlockTestFlg:
-            #    junction.handleDeadLock()
-            #gv.gDebugPrint(junction.getCollitionState(), logType=gv.LOG_INFO)
-            if junction.getCollition():
-                colltionState = junction.getCollitionState()
-                for key, val in colltionState.items():
-                    collsionTrainsDict[key].append(val)
-        return collsionTrainsDict
-
-#-----------------------------------------------------------------------------
-    def resetTrainsPos(self, trainDict):
-        for key in trainDict.keys():
-            if key in self.tracks.keys():
-                self.trains[key] = self._getTrainsList(trainDict[key], self.tracks[key]['points'])
-        # reInit the items
-        self._initSensors()
-        self._initSignal()
-        self._initStation()
-        self._initJunction()
-
-#-----------------------------------------------------------------------------
-# Define all the get() functions here:
-
-    def getEnvItems(self):
-        return self.envItems
-
-    def getTracks(self, trackID=None):
-        if trackID and trackID in self.tracks.keys(): return self.tracks[trackID]
-        return self.tracks
-
-    def getTrains(self, trackID=None):
-        if trackID and trackID in self.trains.keys(): return self.trains[trackID]
-        return self.trains
-
-    def getStations(self, trackID=None):
-        if trackID and trackID in self.stations.keys(): return self.stations[trackID]
-        return self.stations
-
-    def getSignals(self, trackID=None):
-        if trackID and trackID in self.signals.keys(): return self.signals[trackID]
-        return self.signals
-
-    def getSensors(self, trackID=None):
-        if trackID and trackID in self.sensors.keys(): return self.sensors[trackID]
-        return self.sensors
-
-    def getJunction(self):
-        return self.junctions
-
-    def getJunctionSenIdxDict(self):
-        return self.junctionSenIdxDict
-
-    def getBlockSenIdxDict(self):
-        return self.blockSenIdxDict
-
-#-----------------------------------------------------------------------------
-# Define all the set() functions here:
-
-    def setStationSignal(self, trackID, stationStatList):
-        if trackID in self.stations.keys():
-            for i, stationAgent in enumerate(self.stations[trackID]):
-                if i < len(stationStatList):
-                    stationAgent.setSignalState(stationStatList[i])
-
-    def setSingals(self, trackID, signalStatList):
-        if trackID in self.signals.keys():
-            for i, singal in enumerate(self.signals[trackID]):
-                if i < len(signalStatList):
-                    singal.setState(signalStatList[i])
-
-    def setBlocks(self, trackID, blockStatList):
-        if trackID in self.blockSigIdxDict.keys():
-            idxList = self.blockSigIdxDict[trackID]
-            for i, singalVal in enumerate(blockStatList):
-                if i < len(idxList):
-                    signal = self.signals[trackID][idxList[i]]
-                    signal.setState(singalVal)
-
-    def setTainsPower(self, trackID, powerStateList):
-        if trackID in self.trains.keys():
-            for i, train in enumerate(self.trains[trackID]):
-                if i < len(powerStateList):
-                    stopflg = not powerStateList[i]
-                    train.setEmgStop(stopflg)
-        # change the trains avoidance config if need
-        if trackID == 'config':
-            gv.gDebugPrint('--> change the CA state: %s' %str(powerStateList[0]), 
-                           logType=gv.LOG_INFO)
-            data = powerStateList[0]
-            gv.gCollAvoid = data
-            gv.iMainFrame.changeCAcheckboxState(gv.gCollAvoid)
-
-    #-----------------------------------------------------------------------------
-    def updateSignalState(self, key):
-        if key == 'mtline': return
-        piority = {
-            'weline': ('ccline',),
-            'nsline': ('ccline',),
-            'ccline': ('weline', 'nsline'),
-            #'mtline': ('mtline',)
-        }
-        for lineKey in piority[key]:
-            for idx, signal in enumerate(self.signals[lineKey]):
-                if idx in self.junctionSigIdxDict[lineKey]:
-                    signal.updateSingalState()
-
-    #-----------------------------------------------------------------------------
-    def autoCorrectSignalState(self):
-        """ Correct the CC line signal if got error, if both signal are on, turn 
-            off the cc line signal to make the cc line train pass 1st. This function
-            actived by the 
-        """
-        checkPair = [
-            ('nsline', (0, 1)),
-            ('nsline', (2,)),
-            ('nsline', (3,)),
-            ('weline', (6, 7)),
-            ('weline', (4, 5)),
-            ('weline', (2, 3)),
-            ('weline', (0, 1))
-        ]
-        for i, signal in enumerate(self.signals['ccline']):
-            if i < len(checkPair):
-                checkRst = signal.getState()
-                if checkRst:
-                    key, val = checkPair[i]
-                    for idx in val:
-                        checkRst = checkRst and self.signals[key][idx].getState()
-                    # If both signal on state happens correct the CC line signal.
-                    if checkRst: 
-                        gv.gDebugPrint("Correct the CC line signal: %s" %str(i), logType=gv.LOG_WARN)
-                        signal.setState(False)
-
-#-----------------------------------------------------------------------------
-    def periodic(self , now):
-        """ Periodicly call back function. This function need to be called before the 
-            railwayPanelMap's periodic().
-        """
-        collsionTrainsDict = self._updateJunctionState()
-        # update the trains position.
-        for key, val in self.trains.items():
-            for i, train in enumerate(val):
-                if len(val) > 1:
-                    # Check train collision if more than 2 trains on the track
-                    frontTrain = val[(i+1)%len(val)] 
-                    # Check the collision to the front train 1st. 
-                    result = train.checkCollFt(frontTrain)
-                    # Handle the collision if the auto avoidance is disabled.
-                    if result and (not gv.gCollAvoid):
-                        train.setEmgStop(True)
-                        train.setCollsionFlg(True)
-                        frontTrain.setEmgStop(True)
-
-                # if collision with the front train, ignore the signal.
-                if not result: train.checkSignal(self.signals[key])        
-                # stop the train if it got collision at any junction.
-                if collsionTrainsDict and i in collsionTrainsDict[key]:
-                    if gv.gCollAvoid:
-                        if key == 'ccline': train.setTrainSpeed(0)
-                    else: 
-                        train.setEmgStop(True)
-                train.updateRealWordInfo()
-                train.updateTrainPos()               
-            # update all the track's sensors state afte all the trains have moved.
-            self.sensors[key].updateActive(val)
-            # updaste all the signal, if test mode (not connect to PLC) call the 
-            # buildin signal control logic, else the data manager will read the signal 
-            # infromation from PLC then do the auto update.
-            if gv.gTestMD or gv.gCollAvoid: self.updateSignalState(key)
-            if gv.gJuncAvoid: self.autoCorrectSignalState()
-
-        # update the station train's docking state
-        for key, val in self.stations.items():
-            for station in val:
-                station.updateTrainsDock()
-                if not station.getDockState():
-                    station.setEmptyCount(station.getEmptyCount() + 1)
-
-
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayMgr.py
+#
+# Purpose:     The management module to control all the components on the map 
+#              and update the components state. 
+# 
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1.3
+# Created:     2023/05/29
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+
+import railwayPWSimuGlobal as gv
+import railwayAgent as agent
+from railwaySpatialIndex import SpatialGrid
+from railwayTickProfiler import TickProfiler
+from railwayStateHistory import StateHistory
+from railwayTelemetryStore import TelemetryStore
+from railwayRuntimeProfiler import gProfiler
+import railwayLookahead as lookahead
+import railwayCollision as collision
+from railwayTrainRtu import TrainRtuGenerator
+import railwayInterlock as interlock
+import railwayTrackCrossing as trackCrossing
+from railwayStationCfg import gStationCfgCache, StationCfgWatcher
+import railwayTrackGraph as trackGraph
+
+IMPORT_T = time.time()  # module import time to measure the start up time.
+DEF_STEP_T = 0.1        # simulation time (sec) of one default step (one old periodic() call).
+MAX_SUB_STEPS = 50      # max fixed steps in one periodic() call, the rest time is run later.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class MapMgr(object):
+    """ Map manager to init/control differet elements state on the map."""
+    def __init__(self, parent):
+        """ Init all the elements on the map. All the parameters are public to 
+            other module.
+        """
+        self.tracks = OrderedDict()
+        self.trains = OrderedDict()     # track ID -> the trains running on the track.
+        # track ID -> the line's trains in a fixed order (train slots) used by the PLC
+        # power control, RTU data and state history, a train keeps its slot when it 
+        # is dispatched to another track.
+        self.trainSlots = OrderedDict()
+        self.sensors = OrderedDict()
+        self.signals = OrderedDict()
+        self.stations = OrderedDict()
+
+        self.junctionSenIdxDict = {} 
+        self.blockSenIdxDict= {}
+        self.junctionSigIdxDict = {}
+        self.blockSigIdxDict = {}
+        # Compiled cross line interlocking/priority rules.
+        self.interlock = interlock.InterlockEngine()
+        self.sigUpdateDict = {} # moved line -> junction signals to update.
+        
+        self.stationCfgs = {}   # track ID -> validated station config list.
+        self.stationWatcher = None  # station config file watcher, None: no hot reload.
+        self.junctions = []
+        # Track topology graph with the switches and the cached route tables.
+        self.trackGraph = None
+        self.blockedEdges = frozenset() # blocked track sections (graph edges).
+        self.routeTrains = []   # trains running on a dispatch route between the tracks.
+        self.envItems = [] # Currently we only have building item so use list instead of dict()
+        self.lookaheads = {}    # track ID -> railwayLookahead.TrackLookahead
+        # Spatial index for the map position hit test (such as map click).
+        self.spatialIdx = SpatialGrid()
+        # Phase level tick profiler, None: profiling disabled.
+        self.profiler = None
+        # Worker pool to step the lines concurrently, None: step lines in sequence.
+        self.linePool = None
+        # Fixed time step clock, stepT None: one default step per periodic() call.
+        self.stepT = None
+        self.stepScale = 1.0    # stepT / DEF_STEP_T, the train speed is per DEF_STEP_T.
+        self.timeWarp = 1.0
+        self.stepAcc = 0.0
+        self.stepLastT = None
+        self.stepLagFlg = False # True: the fixed steps can not catch up the warped time.
+        # Seconds from the module import to the 1st simulation step finished.
+        self.startupT = None
+
+        self._initTandT()
+        self._initTrainSlots()
+        self._initSensors()
+        self._initSignal()
+        self._initInterlock()
+        self._initStation()
+        self._initEnv()
+        self._initJunction()
+        self._initTrackGraph()
+        self._initSpatialIndex()
+        self._initLookahead()
+        # Fixed memory ring buffer of the per tick components state.
+        self.history = StateHistory(self)
+        # On disk telemetry store for long runs, None: not save to disk.
+        self.teleStore = None
+        # Batched trains real world (RTU) data generator.
+        self.trainsRtu = TrainRtuGenerator()
+        self.trainsRtu.reset(self.trainSlots)
+
+        gv.gDebugPrint('Map display management controller inited', logType=gv.LOG_INFO)
+
+#-----------------------------------------------------------------------------
+    def _initTandT(self):
+        """ This is a private Train&Tracks data init function, currently the data 
+            is hardcoded. It will be replaced by loading a config file before the 
+            whole program init.(load to a gv.gxx parameter)
+        """
+        # Init WE-Line and the trains on it.
+        key = 'weline'
+        self.tracks[key] = {
+            'name': key,
+            'color': gv.gTrackConfig[key]['color'],
+            'type': gv.RAILWAY_TYPE_CYCLE,
+            'points': [(50, 200), (100, 200), (100, 600), (600, 600), (600, 800),
+                       (900, 800), (900, 400), (1550, 400), (1550, 450), (950, 450),
+                       (950, 850), (550, 850), (550, 650), (50, 650)]
+        }
+        trackTrainCfg_we = [{'id': 'we01', 'head': (50, 200), 'nextPtIdx': 1, 'len': 5}, 
+                            {'id': 'we02', 'head': (460, 600),'nextPtIdx': 7, 'len': 5},
+                            {'id': 'we03', 'head': (1500, 400), 'nextPtIdx': 3, 'len': 5},
+                            {'id': 'we04', 'head': (800, 850), 'nextPtIdx': 11, 'len': 5}]
+        #if gv.gCollsionTestFlg: trackTrainCfg_we[1] = {'id': 'we02', 'head': (480, 600), 'nextPtIdx': 3, 'len': 5}
+        self.trains[key] = self._getTrainsList(trackTrainCfg_we, self.tracks[key]['points'])
+        # Init NS-Line and the trains on it.
+        key = 'nsline'
+        self.tracks[key] = {
+            'name' : key,
+            'color': gv.gTrackConfig[key]['color'],
+            'type': gv.RAILWAY_TYPE_CYCLE,
+            'points': [(300, 50), (1200, 50), (1200, 300), (800, 300), (800, 600), (700, 600), 
+                       (700, 100), (400, 100), (400, 450), (300, 450)]
+        }
+        trackTrainCfg_ns = [{'id': 'ns01', 'head': (1000, 50), 'nextPtIdx': 1, 'len': 4},
+                            {'id': 'ns02', 'head': (1100, 300), 'nextPtIdx': 3, 'len': 4},
+                            {'id': 'ns03', 'head': (600, 100), 'nextPtIdx': 7, 'len': 4}]
+
+        self.trains[key] = self._getTrainsList(trackTrainCfg_ns, self.tracks[key]['points'])
+        # Init CC-Line and the trains on it.
+        key = 'ccline'
+        self.tracks[key] = {
+            'name' : key,
+            'color': gv.gTrackConfig[key]['color'],
+            'type': gv.RAILWAY_TYPE_CYCLE,
+            'points': [(200, 200), (1400, 200), (1400, 700), (200, 700)]
+        }
+        trackTrainCfg_cc = [  {'id': 'cc01', 'head': (1100, 200), 'nextPtIdx': 1, 'len': 5},
+                            {'id': 'cc02', 'head': (1300, 700), 'nextPtIdx': 3, 'len': 5},
+                            {'id': 'cc03', 'head': (300, 700), 'nextPtIdx': 3, 'len': 5}]
+        #if gv.gCollsionTestFlg: trackTrainCfg_cc[2] = {'id': 'cc03', 'head': (700, 700), 'nextPtIdx': 3, 'len': 6}
+        #if gv.gTrainDistTestFlag:
+        #    trackTrainCfg_cc[0]['head'] = (510, 700)
+        #    trackTrainCfg_cc[1]['head'] = (430, 700)
+        #    trackTrainCfg_cc[2]['head'] = (300, 700)
+        self.trains[key] = self._getTrainsList(trackTrainCfg_cc, self.tracks[key]['points'])
+        # Init the maintance line 
+        key = 'mtline'
+        self.tracks[key] = {
+            'name' : key,
+            'color': gv.gTrackConfig[key]['color'],
+            'type': gv.RAILWAY_TYPE_CYCLE,
+            'points': [(460, 320), (640, 320), (640, 480), (460, 480)]
+        }
+        self.trains[key] = self._getTrainsList([], [])
+
+#-----------------------------------------------------------------------------
+    def _initTrainSlots(self, keys=None):
+        """ Build the train slots of the lines <keys> (all if None) from the trains 
+            running on the tracks, the old slot trains still running on the other 
+            tracks or dispatch routes are kept at the end, the other lines' slots 
+            only drop the trains which are not running any more.
+        """
+        running = set(train for val in self.trains.values() for train in val)
+        running.update(info['train'] for info in self.routeTrains)
+        for key, val in self.trains.items():
+            oldSlots = self.trainSlots.get(key, [])
+            if keys is None or key in keys:
+                self.trainSlots[key] = list(val) + [train for train in oldSlots
+                                                    if train in running and train not in val]
+            else:
+                self.trainSlots[key] = [train for train in oldSlots if train in running]
+
+#-----------------------------------------------------------------------------
+    def _initSensors(self):
+        """ Init all the train detection sensors on the map. """
+        # Init all the WE-Line sensors
+        sensorPos_we= [
+            (100, 400), (170, 600), (270, 600), (600, 670), (600, 770), (900, 730),
+            (900, 630), (1370, 400), (1470, 400), (1430, 450), (1330, 450), 
+            (950, 670), (950, 770), (550, 730), (550, 650), (230, 650), (130, 650),
+            # Add the track block sensors:
+            (600, 600), (1140, 400), (950, 480), (640, 850)
+            ]
+        self.junctionSenIdxDict['weline'] = (0, 17)
+        self.sensors['weline'] = agent.AgentSensors(self, 'we', sensorPos_we)
+        # Init all the NS-line sensors
+        sensorPos_ns = [
+            (300, 230), (300, 130), (1200, 170), (1200, 270), (700, 230), (700, 130),
+            (400, 170), (400, 270),
+            # Add the track block sensors:
+            (300, 340), (760, 50), (800, 400)
+            ]
+        self.junctionSenIdxDict['nsline'] = (0, 8)
+        self.sensors['nsline'] = agent.AgentSensors(self, 'ns', sensorPos_ns)
+        # Init all the CC-Line sensors.
+        sensorPos_cc = [
+            (270, 200), (480, 200), (670, 200), (770, 200), 
+            (1170, 200), (1270, 200), (1400, 370), (1400, 500), 
+            (980, 700), (830, 700), (630, 700), (460, 700),
+            (200, 700), (200, 530), 
+            # Add the track block sensors:
+            (200, 360), (600, 200), (1080, 200),(1400, 260), (1320, 700)
+            ]
+        self.junctionSenIdxDict['ccline'] = (0, 14)
+        self.sensors['ccline'] = agent.AgentSensors(self, 'cc', sensorPos_cc)
+        # Init all the MT-Line sensors
+        sensorPos_mt = [
+            (640, 340), (640, 460)
+            ]
+        self.junctionSenIdxDict['mtline'] = (0, 2)
+        self.sensors['mtline'] = agent.AgentSensors(self, 'mt', sensorPos_mt)
+
+#-----------------------------------------------------------------------------
+    def _initSignal(self):
+        # Set all the signal on track weline
+        trackSignalConfig_we = [
+            {'id': 'we-0', 'pos':(160, 600), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(12,), 'offIdx':(13,) }, 
+            {'id': 'we-1', 'pos':(240, 650), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(12,), 'offIdx':(13,) },
+            {'id': 'we-2', 'pos':(600, 660), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(10,), 'offIdx':(11,) },
+            {'id': 'we-3', 'pos':(550, 740), 'dir': gv.LAY_L, 'tiggerS': self.sensors['ccline'], 'onIdx':(10,), 'offIdx':(11,) },
+            {'id': 'we-4', 'pos':(900, 740), 'dir': gv.LAY_L, 'tiggerS': self.sensors['ccline'], 'onIdx':(8,), 'offIdx':(9,) },
+            {'id': 'we-5', 'pos':(950, 660), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(8,), 'offIdx':(9,) },
+            {'id': 'we-6', 'pos':(1360, 400), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(6,), 'offIdx':(7,) },
+            {'id': 'we-7', 'pos':(1440, 450), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(6,), 'offIdx':(7,) },
+            # Add the track block control signal
+            {'id': 'we-8', 'pos':(100, 340), 'dir': gv.LAY_R, 'tiggerS': self.sensors['weline'], 'onIdx':(0,), 'offIdx':(1,) },
+            {'id': 'we-9', 'pos':(540, 600), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(17,), 'offIdx':(3,) },
+            {'id': 'we-10', 'pos':(880, 800), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(5,), 'offIdx':(6,) },
+            {'id': 'we-11', 'pos':(1080, 400), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(18,), 'offIdx':(7,) },
+            {'id': 'we-12', 'pos':(980, 450), 'dir': gv.LAY_D, 'tiggerS': self.sensors['weline'], 'onIdx':(19,), 'offIdx':(11,) },
+            {'id': 'we-13', 'pos':(700, 850), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(20,), 'offIdx':(13,) },
+
+        ]
+        self.blockSenIdxDict ['weline'] = (0,1,17,3,5,6,18,7,19,11,20,13)
+        self.signals['weline'] = []
+        for info in trackSignalConfig_we:
+            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
+            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
+            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
+            self.signals['weline'].append(signal)
+        self.junctionSigIdxDict['weline'] = (0,1,2,3,4,5,6,7)
+        self.blockSigIdxDict['weline'] = (8,9,10,11,12,13)
+
+        # Set all the signal on track nsline
+        trackSignalConfig_ns = [
+            {'id': 'ns-0', 'pos':(300, 240), 'dir': gv.LAY_L, 'tiggerS': self.sensors['ccline'], 'onIdx':(0,), 'offIdx':(1,) },
+            {'id': 'ns-1', 'pos':(400, 160), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(0,), 'offIdx':(1,) },
+            {'id': 'ns-2', 'pos':(700, 240), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(2,), 'offIdx':(3,) },
+            {'id': 'ns-3', 'pos':(1200, 160), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(4,), 'offIdx':(5,) },
+            # Add the track block control signal
+            {'id': 'ns-4', 'pos':(300, 400), 'dir': gv.LAY_R, 'tiggerS': self.sensors['nsline'], 'onIdx':(8,), 'offIdx':(1,) },
+            {'id': 'ns-5', 'pos':(700, 50), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(9,), 'offIdx':(2,) },
+            {'id': 'ns-6', 'pos':(800, 340), 'dir': gv.LAY_R, 'tiggerS': self.sensors['nsline'], 'onIdx':(10,), 'offIdx':(4,) },
+        ]
+        self.blockSenIdxDict['nsline'] = (8,1,9,2,10,4)
+        self.signals['nsline'] = []
+        for info in trackSignalConfig_ns:
+            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
+            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
+            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
+            self.signals['nsline'].append(signal)
+
+        self.junctionSigIdxDict['nsline'] = (0,1,2,3)
+        self.blockSigIdxDict['nsline'] =(4,5,6)
+
+        # set all the signal on track ccline
+        trackSignalConfig_cc = [
+            {'id': 'cc-0', 'pos':(260, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(0, 6), 'offIdx':(1, 7) },
+            {'id': 'cc-1', 'pos':(660, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(4,), 'offIdx':(5,) },
+            {'id': 'cc-2', 'pos':(1160, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['nsline'], 'onIdx':(2,), 'offIdx':(3,) },
+            {'id': 'cc-3', 'pos':(1400, 360), 'dir': gv.LAY_R, 'tiggerS': self.sensors['weline'], 'onIdx':(7,9), 'offIdx':(8,10) },
+            {'id': 'cc-4', 'pos':(990, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(5,11), 'offIdx':(6,12) },
+            {'id': 'cc-5', 'pos':(640, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(3,13), 'offIdx':(4,14) },
+            {'id': 'cc-6', 'pos':(210, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['weline'], 'onIdx':(1, 15), 'offIdx':(2,16) },
+            # Add the track block control signal
+            {'id': 'cc-7', 'pos':(200, 420), 'dir': gv.LAY_R, 'tiggerS': self.sensors['ccline'], 'onIdx':(14,), 'offIdx':(0,) },
+            {'id': 'cc-8', 'pos':(540, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(15,), 'offIdx':(2,) },
+            {'id': 'cc-9', 'pos':(1020, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(16,), 'offIdx':(4,) },
+            {'id': 'cc-10', 'pos':(1400, 200), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(17,), 'offIdx':(6,) },
+            {'id': 'cc-11', 'pos':(1380, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(18,), 'offIdx':(8,) },
+            {'id': 'cc-12', 'pos':(265, 700), 'dir': gv.LAY_U, 'tiggerS': self.sensors['ccline'], 'onIdx':(12,), 'offIdx':(13,) },
+        ]
+        self.blockSenIdxDict['ccline'] = (14,0,15,2,16,4,17,6,18,8,12,13)
+        self.signals['ccline'] = []
+        for info in trackSignalConfig_cc:
+            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
+            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
+            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
+            self.signals['ccline'].append(signal)
+
+        self.junctionSigIdxDict['ccline'] = (0,1,2,3,4,5,6)
+        self.blockSigIdxDict['ccline'] = (7,8,9,10,11,12)
+
+        # set all the singal on track mtline
+        trackSignalConfig_mt = [
+            {'id': 'mt-0', 'pos':(460, 400), 'dir': gv.LAY_R, 'tiggerS': self.sensors['mtline'], 'onIdx':(0,), 'offIdx':(1,) }
+        ]
+        self.signals['mtline'] = []
+        for info in trackSignalConfig_mt:
+            signal = agent.AgentSignal(self, info['id'], info['pos'], dir=info['dir'])
+            signal.setTriggerOnSensors(info['tiggerS'], info['onIdx'])
+            signal.setTriggerOffSensors(info['tiggerS'], info['offIdx'])
+            self.signals['mtline'].append(signal)
+
+#---------------------------------------------------------------------------
+    def _initInterlock(self):
+        """ Build the junction signals update list of each line from the interlock
+            signal priority rules.
+        """
+        self.sigUpdateDict = self.interlock.getSignalUpdateList(self.signals, self.junctionSigIdxDict)
+
+#---------------------------------------------------------------------------
+    def _initStation(self):
+        """ Init the station based on the configuration file, YC: this function is used to replace the old 
+            _initstation() function which did the hard code station in the code. The
+            files are parsed and validated once by the railwayStationCfg cache.
+        """
+        for key in gv.gTrackConfig.keys():
+            stationCfgPath = self._getStationCfgPath(key)
+            try:
+                trackStationList = gStationCfgCache.load(stationCfgPath)
+            except OSError:
+                gv.gDebugPrint("The station configure file is not exist, expected file path: %s" % str(stationCfgPath),
+                               logType=gv.LOG_WARN)
+                continue
+            except ValueError as err:
+                gv.gDebugPrint("The station configure file %s is invalid: %s" % (str(stationCfgPath), str(err)),
+                               logType=gv.LOG_WARN)
+                continue
+            self.stationCfgs[key] = trackStationList
+            self.stations[key] = [self._buildStation(key, info) for info in trackStationList]
+
+    def _getStationCfgPath(self, key):
+        return os.path.join(gv.CFG_FD, gv.gTrackConfig[key]['stationCfg'])
+
+    def _buildStation(self, key, info):
+        """ Create one station agent from the validated station config."""
+        station = agent.AgentStation(self, info['id'], info['pos'], layout=info['layout'], 
+                                     signalLayout=info['signalLayout'])
+        station.setCheckTrains(self.trains[key])
+        if 'labelPos' in info: station.setlabelPos(info['labelPos'])
+        return station
+
+#-----------------------------------------------------------------------------
+    def _initStation_old(self):
+        """ Init all the train stations. [This function is replayed by the station configure files] """
+        # Init all stations on weline.
+        trackStation_we = [{'id': 'Tuas_Link', 'pos': (80, 200), 'layout': gv.LAY_H},
+                           {'id': 'Jurong_East', 'pos': (360, 600), 'layout': gv.LAY_H},
+                           {'id': 'Outram_Park', 'pos': (750, 800), 'layout': gv.LAY_H},
+                           {'id': 'City_Hall', 'pos': (900, 500), 'layout': gv.LAY_V, 'labelPos':(-70, -10)},
+                           {'id': 'Paya_Lebar', 'pos': (1250, 400), 'layout': gv.LAY_H },
+                           {'id': 'Changi_Airport', 'pos': (1550, 430), 'layout': gv.LAY_V, 'labelPos':(-70, -60)},
+                           {'id': 'Lavender', 'pos': (1100, 450), 'layout': gv.LAY_H},
+                           {'id': 'Raffles_Place', 'pos': (850, 850), 'layout': gv.LAY_H},
+                           {'id': 'Clementi', 'pos': (430, 650), 'layout': gv.LAY_H},
+                           {'id': 'Boon_Lay', 'pos': (50, 450), 'layout': gv.LAY_V, 'labelPos':(20, -10)}]
+        self.stations['weline'] = []
+        for info in trackStation_we:
+            station = agent.AgentStation(self, info['id'], info['pos'], layout=info['layout'])
+            station.setCheckTrains(self.trains['weline'])
+            if 'labelPos' in info.keys(): station.setlabelPos(info['labelPos'])
+            self.stations['weline'].append(station)
+        
+        # Init all stations on nsline
+        trackStation_ns = [{'id': 'Jurong_East', 'pos': (360, 450)},
+                           {'id': 'Woodlands', 'pos': (430, 50)},
+                           {'id': 'Yishun', 'pos': (1040, 50)},
+                           {'id': 'Orchard', 'pos': (980, 300)},
+                           {'id': 'City_Hall', 'pos': (750, 600)},
+                           {'id': 'Bishan', 'pos': (550, 100)}]
+        self.stations['nsline'] = []
+        for info in trackStation_ns:
+            station = agent.AgentStation(self, info['id'], info['pos'])
+            station.setCheckTrains(self.trains['nsline'])
+            self.stations['nsline'].append(station)
+
+        # Init all stations on ccline
+        trackStation_cc = [{'id': 'Buona_Vista', 'pos': (320, 700), 'layout': gv.LAY_H},
+                           {'id': 'Farrer_Road', 'pos': (200, 300), 'layout': gv.LAY_V, 'labelPos':(20, -10) },
+                           {'id': 'Serangoon', 'pos': (930, 200), 'layout': gv.LAY_H},
+                           {'id': 'Nicoll_Highway', 'pos': (1400, 600), 'layout': gv.LAY_V, 'labelPos':(20, -10)},
+                           {'id': 'Bayfront', 'pos': (1160, 700),'layout': gv.LAY_H},
+                           {'id': 'Harbourfront', 'pos': (710, 700),'layout': gv.LAY_H}]
+        self.stations['ccline'] = []
+        for info in trackStation_cc:
+            station = agent.AgentStation(self, info['id'], info['pos'], layout=info['layout'])
+            station.setCheckTrains(self.trains['ccline'])
+            if 'labelPos' in info.keys(): station.setlabelPos(info['labelPos'])
+            self.stations['ccline'].append(station)
+
+#-----------------------------------------------------------------------------
+    def _initJunction(self):
+        """ Init the junctions at all the crossing points of the tracks, the crossings
+            are found by the sweep-line segment intersection (railwayTrackCrossing)
+            so a new track does not need the hand-made junction list. Each junction
+            saves its per track window: the arc range around the crossing used to
+            detect the train in the junction.
+        """
+        self.junctions = []
+        looks = {key: lookahead.TrackLookahead(track['points']) for key, track in self.tracks.items()
+                 if len(track['points']) > 1}
+        polylines = {key: (track['points'], track['type'] == gv.RAILWAY_TYPE_CYCLE)
+                     for key, track in self.tracks.items()}
+        for info in trackCrossing.findCrossings(polylines):
+            trackIDs = [key for key in self.tracks.keys() if key in info['segs']]
+            if len(trackIDs) > 2:
+                gv.gDebugPrint("_initJunction(): junction %s only supports 2 tracks, ignore %s" 
+                               % (str(info['pos']), str(trackIDs[2:])), logType=gv.LOG_WARN)
+            junction = agent.AgentJunction(self, 'jc-%s' % str(len(self.junctions)), info['pos'], 
+                                           trackIDs[0], trackIDs[1])
+            trackWindows = {}
+            for key in trackIDs[:2]:
+                arc = looks[key].getNearestArc(info['pos'])
+                trackWindows[key] = (arc - lookahead.JUNCTION_RANGE, arc + lookahead.JUNCTION_RANGE)
+            junction.setTrackWindows(trackWindows)
+            self.junctions.append(junction)
+
+#-----------------------------------------------------------------------------
+    def _initTrackGraph(self):
+        """ Build the track topology graph with the switches between the tracks, the
+            route tables of all the nodes pairs are computed when the graph is built.
+        """
+        switchCfg = [
+            # nsline (down side) -> mtline top, mtline bottom -> nsline turning point.
+            {'id': 'sw-0', 'from': ('nsline', (400, 240)), 'to': ('mtline', (480, 320))},
+            {'id': 'sw-1', 'from': ('mtline', (520, 480)), 'to': ('nsline', (400, 450))},
+        ]
+        self.trackGraph = trackGraph.TrackGraph()
+        for key, track in self.tracks.items():
+            if len(track['points']) > 1:
+                self.trackGraph.addTrack(key, track['points'], track['type'] == gv.RAILWAY_TYPE_CYCLE)
+        for info in switchCfg:
+            (fromKey, fromPos), (toKey, toPos) = info['from'], info['to']
+            self.trackGraph.addSwitch(info['id'], fromKey, fromPos, toKey, toPos)
+        self.trackGraph.build()
+        self.blockedEdges = frozenset()
+        for info in self.routeTrains:
+            for switchID in info['switches']:
+                self.trackGraph.setSwitchState(switchID, trackGraph.SWITCH_DIVERGE)
+
+#-----------------------------------------------------------------------------
+    def _initEnv(self):
+        """ Init all the enviroment Items on the map such as IOT device or camera."""
+        envCfg = [ {'id':'Industry Area', 'img':'factory_0.png', 'pos':(100, 90), 'size':(120, 120)},
+                   {'id':'Airport', 'img':'airport.jpg', 'pos':(1500, 240), 'size':(160, 100)},
+                   {'id':'JurongEast-Jem', 'img':'city_0.png', 'pos':(360, 520), 'size':(80, 80)},
+                   {'id':'CityHall-01', 'img':'city_2.png', 'pos':(750, 520), 'size':(90, 80)},
+                   {'id':'CityHall-02', 'img':'city_1.png', 'pos':(850, 600), 'size':(80, 60)},
+                   {'id':'Hospital', 'img':'hospitalIcon.png', 'pos':(1080, 540), 'size':(120, 80)},
+
+                   {'id':'Legend', 'img':'legend.png', 'pos':(1450, 820), 'size':(200, 150)},
+                   {'id':'Track-Junction-PLCs', 'img': 'plcIcon2.png', 'pos':(50, 780), 'size':(60,50)},
+                   {'id':'Track-Station-PLCs', 'img': 'plcIcon2.png', 'pos':(50, 860), 'size':(60,50)},
+                   {'id':'Train-Ctrl-PLCs', 'img': 'plcIcon2.png', 'pos':(310, 780), 'size':(60,50)},
+                   {'id':'Track-Block-PLCs', 'img': 'plcIcon2.png', 'pos':(310, 860), 'size':(60,50)},
+                   {'id':'Train-Ctrl-RTUs', 'img': 'rtuIcon2.png', 'pos':(1100, 780), 'size':(60,50)},
+                   {'id':'Date & Time', 'img': 'time.png', 'pos':(1270, 50), 'size':(30,30)}
+                   ]
+        for info in envCfg:
+            imgPath = os.path.join(gv.IMG_FD, info['img'])
+            if os.path.exists(imgPath):
+                # the map view (PanelMap) loads the icon image in the background.
+                building = agent.agentEnv(self, info['id'], info['pos'], imgPath, info['size'] )
+                self.envItems.append(building)
+        
+        labelCfg = [
+                {'id': 'West-East Line [WE]', 'img': None, 'pos': (550, 550), 'size': (180, 30),
+                'color': gv.gTrackConfig['weline']['color'], 'link':((550, 550), (550, 600))},
+                {'id': 'North-South [NS]', 'img': None, 'pos': (850, 100), 'size': (180, 30),
+                'color': gv.gTrackConfig['nsline']['color'], 'link':((850, 100), (850, 50))},
+                {'id': 'Circle Line [CC]', 'img': None, 'pos': (1260, 650), 'size': (180, 30),
+                'color': gv.gTrackConfig['ccline']['color'], 'link':((1260, 650), (1260, 700))},
+                {'id': 'Maintenance Line [MT]', 'img': None, 'pos': (550, 280), 'size': (190, 30),
+                'color': gv.gTrackConfig['mtline']['color'], 'link':((550, 280), (550, 320))}
+        ]
+        for info in labelCfg:
+            label = agent.agentEnv(self, info['id'], info['pos'], None, info['size'], tType=gv.LABEL_TYPE )
+            if 'link' in info.keys(): label.setLinkList(info['link'])
+            if 'color' in info.keys(): label.setColor(info['color'])
+            self.envItems.append(label)
+
+#-----------------------------------------------------------------------------
+    def _initSpatialIndex(self):
+        """ (Re)build the spatial index of all the trains, sensors, signals, stations
+            and junctions. Each item is saved as (agentType, trackID, agentObj, sensorIdx).
+        """
+        self.spatialIdx.clear()
+        for key, val in self.trains.items():
+            for train in val:
+                self.spatialIdx.insert(train, self._getTrainBBox(train), ('train', key, train, None))
+        for info in self.routeTrains:
+            train = info['train']
+            self.spatialIdx.insert(train, self._getTrainBBox(train), ('train', info['dst'], train, None))
+        for key, sensorAgent in self.sensors.items():
+            for idx, pos in enumerate(sensorAgent.getPos()):
+                self.spatialIdx.insert((sensorAgent, idx), (pos[0], pos[1], pos[0], pos[1]),
+                                       ('sensor', key, sensorAgent, idx))
+        for key, val in self.signals.items():
+            for signal in val:
+                x, y = signal.getPos()
+                self.spatialIdx.insert(signal, (x, y, x, y), ('signal', key, signal, None))
+        for key, val in self.stations.items():
+            for station in val:
+                x, y = station.getPos()
+                self.spatialIdx.insert(station, (x, y, x, y), ('station', key, station, None))
+        for junction in self.junctions:
+            x, y = junction.getPos()
+            self.spatialIdx.insert(junction, (x, y, x, y), ('junction', None, junction, None))
+
+    def _initLookahead(self):
+        """ Build the per track ordered index of the signals and the station dock/
+            signal points used to find the objects a train may reach.
+        """
+        self.lookaheads = {}
+        for key, track in self.tracks.items():
+            if len(track['points']) < 2: continue
+            look = lookahead.TrackLookahead(track['points'])
+            look.addObjects('signal', [signal.getPos() for signal in self.signals.get(key, [])],
+                            lookahead.SIGNAL_RANGE)
+            stations = self.stations.get(key, [])
+            look.addObjects('dock', [station.getPos() for station in stations], lookahead.DOCK_RANGE)
+            look.addObjects('stationSignal', [station.getSignalPos() for station in stations],
+                            lookahead.STATION_SIG_RANGE)
+            self.lookaheads[key] = look
+
+    def _getSignalCandidates(self, key, train):
+        """ Return the signals (in the track signal list order) the train may reach."""
+        look = self.lookaheads.get(key)
+        if look is None: return self.signals[key]
+        signals = self.signals[key]
+        return [signals[i] for i in look.query('signal', look.getTrainArcRange(train))]
+
+    def _getStationCandidates(self, key):
+        """ Return dict {stationIdx: [train, ...]} of the trains (in the track trains 
+            order) may dock in the station or reach its signal, None if no index.
+        """
+        look = self.lookaheads.get(key)
+        if look is None: return None
+        result = {}
+        for train in self.trains[key]:
+            destList, trainDir = train.getDestList(), train.getTrainDir()
+            midArc = look.getArcPos(train.getTrainPos(idx=2), destList[2], trainDir)
+            headArc = look.getArcPos(train.getTrainPos(idx=0), destList[0], trainDir)
+            for idx in look.query('dock', [(midArc, midArc)]) + look.query('stationSignal', [(headArc, headArc)]):
+                trainList = result.setdefault(idx, [])
+                if not trainList or trainList[-1] is not train: trainList.append(train)
+        return result
+
+    def getFrontTrainsState(self, key):
+        """ Return the list of (frontTrain, gap, speedCap) of the track's trains, if 
+            the track has no lookahead index the next train in the list is used as 
+            the front train with the old fixed distance check. The dispatch route 
+            trains leaving or entering the track are checked as the front trains 
+            by the straight distance gap.
+        """
+        val = self.trains[key]
+        look = self.lookaheads.get(key)
+        if look:
+            result = collision.getFrontTrainsState(look, val, gv.gTrainDefSpeed)
+        elif len(val) > 1:
+            result = []
+            for i, train in enumerate(val):
+                frontTrain = val[(i+1)%len(val)]
+                ftTail = frontTrain.getTrainPos(idx=-1)
+                nearFlg = train.checkNear(ftTail[0], ftTail[1], collision.STOP_GAP)
+                result.append((frontTrain, None, 0 if nearFlg else gv.gTrainDefSpeed))
+        else:
+            result = [(None, None, gv.gTrainDefSpeed)]*len(val)
+        # a route train is in the destination track's path after its head passed 
+        # the track entry, it waits for the track's trains before the entry.
+        routeTrains = [info['train'] for info in self.routeTrains if key == info['src'] or (key == info['dst']
+                       and info['train'].getDestList()[0] > info['train'].getLoopStart())]
+        if routeTrains:
+            # the route train yields to the line train if their paths cross.
+            result = [self._getObstacleState(train, routeTrains, state, priority=True)
+                      for train, state in zip(val, result)]
+        return result
+
+    def _getObstacleState(self, train, obstacles, state, priority=False):
+        """ Merge the obstacle trains found in the train's path ahead (straight
+            distance) into the train's (frontTrain, gap, speedCap) state.
+            Args:
+                train (<AgentTrain>): the checking train.
+                obstacles (list(<AgentTrain>)): the trains not in the train's track 
+                    arc index (the route trains or a route train's nearby trains).
+                state (tuple): the train's current (frontTrain, gap, speedCap).
+                priority (bool, optional): the train has the right of way, skip the
+                    obstacle which also has the train in its path ahead (crossing 
+                    paths). Defaults to False.
+            Returns:
+                tuple: the (frontTrain, gap, speedCap) with the lowest speed cap.
+        """
+        for obstacle in obstacles:
+            if obstacle is train: continue
+            gap = collision.getAheadGap(train, obstacle)
+            if gap is None or gap >= collision.BRAKE_GAP: continue
+            if priority:
+                backGap = collision.getAheadGap(obstacle, train)
+                if backGap is not None and backGap < collision.BRAKE_GAP: continue
+            cap = collision.getSpeedCap(gap, train.getTrainSpeed(), obstacle.getTrainSpeed(),
+                                        gv.gTrainDefSpeed)
+            if cap < state[2]: state = (obstacle, gap, cap)
+        return state
+
+    def _getTrainBBox(self, train):
+        """ Return the bounding box (x0, y0, x1, y1) of all the train's carriages."""
+        return train.getTrainBBox()
+
+#-----------------------------------------------------------------------------
+    def _getTrainsList(self, trainCfg, trackPts):
+        """ Build the railwayAgent.TainAgent obj list based on inmput train config information.
+        Args:
+            trainCfg (_type_): _description_
+            trackPts (_type_): _description_
+        Returns:
+            _type_: _description_
+        """
+        trainList = []
+        for trainInfo in trainCfg:
+            trainObj = agent.AgentTrain(self, trainInfo['id'], trainInfo['head'], trackPts, 
+                                        trainLen=trainInfo['len'])
+            trainList.append(trainObj)
+        return trainList
+
+#-----------------------------------------------------------------------------
+    def _updateJunctionState(self):
+        collsionTrainsDict = {key: [] for key in self.tracks.keys()}
+        # the trains' arc ranges used by all the junctions' track window check.
+        trainArcs = {key: (look.total, [look.getTrainArcRange(train) for train in self.trains[key]])
+                     for key, look in self.lookaheads.items()}
+        for junction in self.junctions:
+            junction.updateState(trainArcs)
+            #if gv.gDeadlockTestFlg:
+            #    junction.handleDeadLock()
+            #gv.gDebugPrint(junction.getCollitionState(), logType=gv.LOG_INFO)
+            if junction.getCollition():
+                colltionState = junction.getCollitionState()
+                for key, val in colltionState.items():
+                    collsionTrainsDict[key].append(val)
+        # a route train waits outside the junction of its source/destination track 
+        # used by a line train (or another route train), a route train already in
+        # the junction keeps going and the line trains brake by the gap check.
+        for info in self.routeTrains:
+            inJunctions, info['wait'] = [], False
+            for junction in self.junctions:
+                state = junction.getCollitionState()
+                if info['src'] not in state and info['dst'] not in state: continue
+                if not junction.checkRouteTrain(info['train']): continue
+                if junction not in info['junctions'] and (
+                        any(idx is not None for idx in state.values()) or
+                        any(junction in other['junctions'] for other in self.routeTrains if other is not info)):
+                    info['wait'] = True
+                inJunctions.append(junction)
+            if not info['wait']: info['junctions'] = inJunctions
+        return collsionTrainsDict
+
+#-----------------------------------------------------------------------------
+    def resetTrainsPos(self, trainDict):
+        for key in trainDict.keys():
+            if key in self.tracks.keys():
+                self.trains[key] = self._getTrainsList(trainDict[key], self.tracks[key]['points'])
+        # the dispatch routes of the reset lines' trains are dropped.
+        self.routeTrains = [info for info in self.routeTrains if info['src'] not in trainDict]
+        # reInit the items
+        self._initTrainSlots(keys=trainDict.keys())
+        self._initSensors()
+        self._initSignal()
+        self._initInterlock()
+        self._initStation()
+        self._initJunction()
+        self._initTrackGraph()
+        self._initSpatialIndex()
+        self._initLookahead()
+        self.history.reset()
+        self.trainsRtu.reset(self.trainSlots)
+
+    def dispatchTrain(self, trackID, trainIdx, dstKey):
+        """ Send the train to the track <dstKey> by the shortest route in the track 
+            graph (avoid the blocked sections), the route is looked up in the cached
+            route tables. The train leaves the track's running list (it keeps its
+            train slot, so the PLC power control and RTU data still address it) and
+            runs the route as a shunting move until all the carriages are on the 
+            destination track, then it runs as a normal train of the track. The 
+            dispatch is refused if a route switch is set by another route or a 
+            train is near the route path. The shunting move ignores the signals, 
+            but it keeps the gap to the trains ahead, waits outside the occupied
+            junctions and the trains of the source/destination tracks keep the gap
+            to it.
+            Args:
+                trackID (str): the train's track ID.
+                trainIdx (int): train idx in the track's train list.
+                dstKey (str): destination track ID (such as 'mtline').
+            Returns:
+                bool: True if the route is found and the train is dispatched.
+        """
+        if trackID not in self.trains or dstKey not in self.tracks or dstKey == trackID: return False
+        if not 0 <= trainIdx < len(self.trains[trackID]): return False
+        train = self.trains[trackID][trainIdx]
+        if train.getTrainDir() != 1:
+            gv.gDebugPrint("dispatchTrain(): train %s is running reverse, can not dispatch" % train.getID(),
+                           logType=gv.LOG_WARN)
+            return False
+        srcPts, dstPts = self.tracks[trackID]['points'], self.tracks[dstKey]['points']
+        destList = train.getDestList()
+        num, headIdx, tailIdx = len(srcPts), destList[0], destList[-1]
+        startNode = self.trackGraph.getNextNode(trackID, (headIdx-1) % num, train.getTrainPos(idx=0)) \
+            or (trackID, srcPts[headIdx])
+        entry = self.trackGraph.getTrackEntry(startNode, dstKey, self.blockedEdges)
+        route = self.trackGraph.getRoute(startNode, entry, self.blockedEdges) if entry else None
+        if not route:
+            gv.gDebugPrint("dispatchTrain(): no route for train %s to %s" % (train.getID(), dstKey),
+                           logType=gv.LOG_WARN)
+            return False
+        # route points: the track points the carriages have not passed, the route 
+        # nodes, then the destination track points loop starting from the entry.
+        routePts = [srcPts[(tailIdx + k) % num] for k in range((headIdx - tailIdx) % num)]
+        # (route points idx, pos) of the route nodes out of the source track, the
+        # train waits before the point if another train is near it.
+        mergePts = [(len(routePts) + j, node[1]) for j, node in enumerate(route) if node[0] != trackID]
+        routePts.extend([node[1] for node in route[:-1]])
+        loopStart = len(routePts)
+        entryIdx = self.trackGraph.getNodeSegment(entry)
+        if entry[1] == dstPts[entryIdx]:
+            routePts.extend(dstPts[entryIdx:] + dstPts[:entryIdx])
+        else:
+            routePts.extend([entry[1]] + dstPts[entryIdx+1:] + dstPts[:entryIdx+1])
+        switchIDs = self.trackGraph.getRouteSwitches(route)
+        for switchID in switchIDs:
+            if self.trackGraph.getSwitchState(switchID) == trackGraph.SWITCH_DIVERGE:
+                gv.gDebugPrint("dispatchTrain(): switch %s is used by another route" % switchID,
+                               logType=gv.LOG_WARN)
+                return False
+        if not self._checkPathClear(train, [pos for _, pos in mergePts]):
+            gv.gDebugPrint("dispatchTrain(): the route of train %s is occupied" % train.getID(),
+                           logType=gv.LOG_WARN)
+            return False
+        train.setRoutePts(routePts, [(idx - tailIdx) % num for idx in destList], loopStart)
+        for switchID in switchIDs: self.trackGraph.setSwitchState(switchID, trackGraph.SWITCH_DIVERGE)
+        train.setWaiting(False)
+        train.setTrainSpeed(gv.gTrainDefSpeed)  # the shunting move ignores the stop signals.
+        self.trains[trackID].pop(trainIdx)
+        self.routeTrains.append({'train': train, 'src': trackID, 'dst': dstKey, 'entryIdx': entryIdx,
+                                 'switches': switchIDs, 'mergePts': mergePts, 'junctions': [], 'wait': False})
+        self.spatialIdx.remove(train)
+        self.spatialIdx.insert(train, self._getTrainBBox(train), ('train', dstKey, train, None))
+        gv.gDebugPrint("Dispatch train %s from %s to %s by switches %s" % (train.getID(), trackID, dstKey,
+                       str(switchIDs)), logType=gv.LOG_INFO)
+        return True
+
+    def _checkPathClear(self, train, points):
+        """ Check whether no other train is within the braking gap of the route
+            path points out of the source track (the switch points on the other
+            tracks and the destination track entry).
+        """
+        for x, y in points:
+            for _, item in self.spatialIdx.query(x, y, radius=collision.BRAKE_GAP):
+                if item[0] == 'train' and item[2] is not train and \
+                        item[2].checkNear(x, y, collision.BRAKE_GAP): return False
+        return True
+
+    def _finishRoute(self, info):
+        """ Hand over the route train which has fully entered the destination track
+            to the track's train list and set the route switches back to straight.
+        """
+        train, dstKey = info['train'], info['dst']
+        dstPts = self.tracks[dstKey]['points']
+        loopStart = train.getLoopStart()
+        train.setRoutePts(dstPts, [(info['entryIdx'] + idx - loopStart) % len(dstPts)
+                                   for idx in train.getDestList()])
+        for switchID in info['switches']:
+            self.trackGraph.setSwitchState(switchID, trackGraph.SWITCH_STRAIGHT)
+        self.routeTrains.remove(info)
+        self.trains[dstKey].append(train)
+        gv.gDebugPrint("Train %s entered %s" % (train.getID(), dstKey), logType=gv.LOG_INFO)
+
+    def _stepRouteTrains(self):
+        """ Move the trains running on the dispatch routes, a route train keeps the
+            gap to the trains of its source/destination tracks and the other route
+            trains ahead (the earlier dispatched route train has the right of way).
+        """
+        for info in list(self.routeTrains):
+            train = info['train']
+            others = [other['train'] for other in self.routeTrains]
+            idx = others.index(train)
+            state = (None, None, gv.gTrainDefSpeed)
+            state = self._getObstacleState(train, self.trains[info['src']] + self.trains[info['dst']]
+                                           + others[:idx], state)
+            state = self._getObstacleState(train, others[idx+1:], state, priority=True)
+            speedCap = 0 if info['wait'] else state[2]
+            headIdx, (hx, hy) = train.getDestList()[0], train.getTrainPos(idx=0)
+            for ptIdx, (x, y) in info['mergePts']:
+                # stop before the merge point not passed yet if it is occupied.
+                gap = math.hypot(x-hx, y-hy)
+                if ptIdx < headIdx or gap >= collision.BRAKE_GAP or self._checkPathClear(train, [(x, y)]): continue
+                speedCap = min(speedCap, collision.getSpeedCap(gap, train.getTrainSpeed(), 0, gv.gTrainDefSpeed))
+            train.setTrainSpeed(speedCap)
+            train.updateTrainPos(self.stepScale)
+            self.spatialIdx.update(train, self._getTrainBBox(train))
+            if min(train.getDestList()) > train.getLoopStart(): self._finishRoute(info)
+
+#-----------------------------------------------------------------------------
+    def reloadStations(self, key):
+        """ Reload the line's station config file and apply the changed stations only,
+            the unchanged station agents (and their docking state), the trains and 
+            all the other agents are kept. The PLC station data (setStationSignal() 
+            and the DataManager station arrays) is mapped by the station list index,
+            so a config which adds, removes or reorders the stations is refused 
+            (restart the simulation to apply it).
+            Returns:
+                bool: True if the config is loaded and applied.
+        """
+        try:
+            stationList = gStationCfgCache.load(self._getStationCfgPath(key))
+        except (OSError, ValueError) as err:
+            gv.gDebugPrint("reloadStations(): keep the %s stations, config error: %s" % (key, str(err)),
+                           logType=gv.LOG_WARN)
+            return False
+        if [info['id'] for info in stationList] != [info['id'] for info in self.stationCfgs.get(key, [])]:
+            gv.gDebugPrint("reloadStations(): keep the %s stations, the station IDs/order changed" % key,
+                           logType=gv.LOG_WARN)
+            return False
+        oldDict = {}
+        for station, info in zip(self.stations.get(key, []), self.stationCfgs.get(key, [])):
+            oldDict[info['id']] = (station, info)
+        stations = []
+        for info in stationList:
+            station, oldInfo = oldDict.pop(info['id'], (None, None))
+            if station and oldInfo != info:
+                if 'labelPos' in info and dict(oldInfo, labelPos=info['labelPos']) == info:
+                    station.setlabelPos(info['labelPos'])   # only the label moved.
+                else:
+                    self.spatialIdx.remove(station)
+                    station = None
+            if station is None:
+                station = self._buildStation(key, info)
+                x, y = station.getPos()
+                self.spatialIdx.insert(station, (x, y, x, y), ('station', key, station, None))
+            stations.append(station)
+        self.stationCfgs[key], self.stations[key] = stationList, stations
+        look = self.lookaheads.get(key)
+        if look:
+            look.addObjects('dock', [station.getPos() for station in stations], lookahead.DOCK_RANGE)
+            look.addObjects('stationSignal', [station.getSignalPos() for station in stations],
+                            lookahead.STATION_SIG_RANGE)
+        gv.gDebugPrint("Station config of %s reloaded: %s stations" % (key, str(len(stations))),
+                       logType=gv.LOG_INFO)
+        return True
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getEnvItems(self):
+        return self.envItems
+
+    def getTracks(self, trackID=None):
+        if trackID and trackID in self.tracks.keys(): return self.tracks[trackID]
+        return self.tracks
+
+    def getTrains(self, trackID=None):
+        if trackID and trackID in self.trains.keys(): return self.trains[trackID]
+        return self.trains
+
+    def getStations(self, trackID=None):
+        if trackID and trackID in self.stations.keys(): return self.stations[trackID]
+        return self.stations
+
+    def getSignals(self, trackID=None):
+        if trackID and trackID in self.signals.keys(): return self.signals[trackID]
+        return self.signals
+
+    def getSensors(self, trackID=None):
+        if trackID and trackID in self.sensors.keys(): return self.sensors[trackID]
+        return self.sensors
+
+    def getTrackGraph(self):
+        return self.trackGraph
+
+    def getRouteTrains(self):
+        """ Return the list of {'train':, 'src':, 'dst':, 'entryIdx':, 'switches':} of 
+            the trains running on a dispatch route.
+        """
+        return self.routeTrains
+
+    def getJunction(self):
+        return self.junctions
+
+    def getJunctionSenIdxDict(self):
+        return self.junctionSenIdxDict
+
+    def getBlockSenIdxDict(self):
+        return self.blockSenIdxDict
+
+    def getProfiler(self):
+        return self.profiler
+
+    def getHistory(self):
+        return self.history
+
+    def getTrainSlots(self, trackID=None):
+        """ Return the line's trains in the fixed slot order (PLC/RTU/history order),
+            the dispatched trains keep their home line's slot.
+        """
+        if trackID and trackID in self.trainSlots.keys(): return self.trainSlots[trackID]
+        return self.trainSlots
+
+    def getTrainsRtu(self):
+        return self.trainsRtu
+
+    def getTimeStep(self):
+        """ Return (stepT, timeWarp), stepT is None if one step per periodic() call."""
+        return (self.stepT, self.timeWarp)
+
+
+    def getStationWatchInterval(self):
+        """ Return the station config files check interval, None if not watching."""
+        return self.stationWatcher.interval if self.stationWatcher else None
+
+    def getStartupTime(self):
+        """ Return the seconds from the module import to the 1st step finished."""
+        return self.startupT
+
+    def getAgentAt(self, posX, posY, threshold=10):
+        """ Find the nearest train/sensor/signal/station/junction to the map position
+            with in the threshold distance (unit: pixel).
+            Returns:
+                tuple: (agentType, trackID, agentObj, sensorIdx) or None if not found.
+        """
+        hitItem, hitDist = None, threshold**2
+        for _, item in self.spatialIdx.query(posX, posY, radius=threshold):
+            agentType, _, agentObj, idx = item
+            if agentType == 'train':
+                posList = agentObj.getTrainPos()
+            elif agentType == 'sensor':
+                posList = (agentObj.getPos()[idx],)
+            else:
+                posList = (agentObj.getPos(),)
+            for pos in posList:
+                dist = (pos[0] - posX)**2 + (pos[1] - posY)**2
+                if dist <= hitDist: hitItem, hitDist = item, dist
+        return hitItem
+
+    def getAgentInfo(self, item):
+        """ Return the live state of the agent item found by getAgentAt() as a 
+            OrderedDict(): {name: value}.
+        """
+        agentType, key, agentObj, idx = item
+        info = OrderedDict()
+        if agentType == 'train':
+            info['Train'] = '%s [%s]' % (agentObj.getID(), key)
+            info['Speed'] = agentObj.getTrainSpeed()
+            info['Dock count'] = agentObj.getDockCount()
+            info['Waiting'] = agentObj.getWaitingState()
+            info['Emergency stop'] = agentObj.getEmgStop()
+            info['Collision'] = agentObj.getCollsionFlg()
+            info['Power'] = agentObj.getPowerState()
+            for rwKey, rwVal in agentObj.getTrainRealInfo().items():
+                info[rwKey] = rwVal
+        elif agentType == 'sensor':
+            info['Sensor'] = '%s-%s [%s]' % (agentObj.getID(), str(idx), key)
+            info['Position'] = agentObj.getPos()[idx]
+            info['Triggered'] = bool(agentObj.getSensorState(idx))
+        elif agentType == 'signal':
+            info['Signal'] = '%s [%s]' % (agentObj.getID(), key)
+            info['State'] = 'on (stop)' if agentObj.getState() else 'off (pass)'
+            for name, (sensorAgent, idxList) in (('Trigger on', agentObj.getTriggerOnSensors()),
+                                                 ('Trigger off', agentObj.getTriggerOffSensors())):
+                if sensorAgent is None: continue
+                info[name] = ', '.join(['%s-%s(%s)' % (sensorAgent.getID(), str(i),
+                                                       sensorAgent.getSensorState(i)) for i in idxList])
+        elif agentType == 'station':
+            info['Station'] = '%s [%s]' % (agentObj.getID(), key)
+            info['Docking'] = agentObj.getDockState()
+            info['Dock count'] = agentObj.getTrainDockCount()
+            info['Empty count'] = agentObj.getEmptyCount()
+            info['Signal'] = agentObj.getSignalState()
+        elif agentType == 'junction':
+            info['Junction'] = agentObj.getID()
+            info['Collision'] = agentObj.getCollition()
+            for trackID, trainIdx in agentObj.getCollitionState().items():
+                trainID = None if trainIdx is None else self.trains[trackID][trainIdx].getID()
+                info[trackID] = trainID
+        return info
+
+    def getSnapshot(self, view=None, margin=0):
+        """ Return a copy of the current map components state (plain tuples/dicts,
+            no agent reference) so the display/export modules can use it outside
+            the simulation loop and thread.
+            Args:
+                view (tuple, optional): visible map area (x0, y0, x1, y1), if set only
+                    the agents found in the area (+ margin) by the spatial index are
+                    copied: the hidden trains and sensor points are None (to keep the 
+                    list index), the hidden signals/stations/junctions are skipped and
+                    the snapshot 'culled' flag is set. Defaults to None (all agents).
+                margin (int, optional): view area extend distance. Defaults to 0.
+        """
+        visible = None
+        if view:
+            x0, y0, x1, y1 = view
+            visible = set(key for key, _ in self.spatialIdx.queryRect(
+                (x0-margin, y0-margin, x1+margin, y1+margin)))
+        snapshot = {
+            'tracks': OrderedDict(),
+            'trains': OrderedDict(),
+            'sensors': [],
+            'signals': [],
+            'stations': OrderedDict(),
+            'junctions': [],
+            'switches': [],
+            'envItems': [],
+        }
+        for key, info in self.tracks.items():
+            snapshot['tracks'][key] = (info['color'], tuple(info['points']), info['type'])
+
+        def trainState(train):
+            if visible is not None and train not in visible: return None
+            return (tuple(tuple(pt) for pt in train.getTrainPos()), train.getTrainSpeed(),
+                    train.getEmgStop(), train.getCollsionFlg(), train.getPowerState(),
+                    dict(train.getTrainRealInfo()))
+
+        for key, val in self.trains.items():
+            snapshot['trains'][key] = [trainState(train) for train in val]
+        for info in self.routeTrains:
+            snapshot['trains'][info['dst']].append(trainState(info['train']))
+        for key, sensorAgent in self.sensors.items():
+            sensorPos = sensorAgent.getPos()
+            if visible is not None:
+                sensorPos = [pos if (sensorAgent, idx) in visible else None for idx, pos in enumerate(sensorPos)]
+            snapshot['sensors'].append((sensorAgent.getID(), sensorPos, tuple(sensorAgent.getSensorsState())))
+        for key, val in self.signals.items():
+            for signal in val:
+                if visible is not None and signal not in visible: continue
+                snapshot['signals'].append((signal.getID(), signal.getPos(), signal.getState(), signal.dir))
+        for key, val in self.stations.items():
+            snapshot['stations'][key] = [(station.getID(), station.getPos(), station.getLabelPos(),
+                                          station.getDockState(), station.getLayout(),
+                                          station.getSignalState()) for station in val
+                                         if visible is None or station in visible]
+        for junction in self.junctions:
+            if visible is not None and junction not in visible: continue
+            snapshot['junctions'].append((junction.getPos(), junction.getCollition()))
+        for switchID, sw in self.trackGraph.getSwitches().items():
+            snapshot['switches'].append((switchID, sw['from'][1], sw['to'][1], sw['state']))
+        for item in self.envItems:
+            snapshot['envItems'].append((item.getID(), item.getPos(), item.getType(), item.getSize(),
+                                         item.getColor(), item.getLink()))
+        if visible is not None:
+            snapshot['view'] = tuple(view)
+            snapshot['culled'] = True
+        return snapshot
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setTelemetryStore(self, storeDir):
+        """ Start saving every tick record to the memory-mapped telemetry store in
+            <storeDir>, set storeDir to None to stop and close the store.
+        """
+        if self.teleStore: self.teleStore.close()
+        self.teleStore = TelemetryStore(storeDir, columnsFunc=self.history.getColumnNames) if storeDir else None
+
+    def setProfiler(self, enable):
+        """ Enable/disable the periodic() phase profiler, the rolling metrics are
+            cleared when the profiler is disabled.
+        """
+        if enable:
+            if self.profiler is None: self.profiler = TickProfiler()
+        else:
+            self.profiler = None
+
+    def setTimeStep(self, stepT=DEF_STEP_T, timeWarp=1.0):
+        """ Set the fixed time step motion: the train speed is the distance per 
+            DEF_STEP_T so the speed per second is trainSpeed/DEF_STEP_T for any stepT,
+            every periodic() call runs the number of steps of the (warped) time passed
+            since the last call. One call runs at most MAX_SUB_STEPS steps, the rest
+            time is kept and run by the next calls, so the max time warp the sim can
+            follow is MAX_SUB_STEPS*stepT/(periodic() call interval), above it the 
+            simulation time lags behind the warped time (a warning is logged).
+            Args:
+                stepT (float, optional): simulation time (sec) of one step, must be in
+                    (0, DEF_STEP_T] so a step does not move the trains further than the
+                    default step (the sensors/signals/stations are checked every step).
+                    None to run one default step per periodic() call. Defaults to DEF_STEP_T.
+                timeWarp (float, optional): simulation time / real time. Defaults to 1.0.
+        """
+        if stepT is not None and not 0 < stepT <= DEF_STEP_T:
+            raise ValueError("time step %s is not in (0, %s] sec" % (str(stepT), str(DEF_STEP_T)))
+        self.stepT = stepT
+        self.stepScale = 1.0 if stepT is None else stepT/DEF_STEP_T
+        self.timeWarp = max(0.0, float(timeWarp))
+        self.stepAcc = 0.0
+        self.stepLastT = None
+        self.stepLagFlg = False
+
+    def setRtuSeed(self, seed):
+        """ Restart the trains real world data random sequence with the seed."""
+        self.trainsRtu.reset(self.trainSlots, seed=seed)
+
+    def setLineWorkers(self, workers):
+        """ Set the number of worker threads to step the lines concurrently in 
+            periodic(), 0 to step the lines in sequence (default). Both modes give
+            the same result, the pool only helps if the lines' stepping can run in
+            parallel (python build without GIL), the phase profiler only times the
+            whole lines phase in the pool mode.
+        """
+        if self.linePool: self.linePool.shutdown(wait=True)
+        self.linePool = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='lineStep') if workers > 0 else None
+
+    def setStationWatcher(self, interval=None):
+        """ Start watching the station config files (check every <interval> sec) and
+            hot apply the changes in periodic(), None to stop watching.
+        """
+        if self.stationWatcher: self.stationWatcher.stop()
+        self.stationWatcher = None
+        if interval:
+            fileDict = {key: self._getStationCfgPath(key) for key in gv.gTrackConfig.keys()}
+            self.stationWatcher = StationCfgWatcher(fileDict, interval=interval)
+            self.stationWatcher.start()
+
+    def stop(self):
+        """ Stop the map manager's workers and close the telemetry store, call
+            when the application exits.
+        """
+        self.setStationWatcher(None)
+        self.setLineWorkers(0)
+        self.setTelemetryStore(None)
+
+    def setBlockedSection(self, trackID, pos, state):
+        """ Block/unblock the track section (graph edge) at the map position, the 
+            following dispatches are routed around the blocked sections.
+            Returns:
+                bool: False if the position is not on the track.
+        """
+        edge = self.trackGraph.getEdge(trackID, pos)
+        if edge is None: return False
+        self.blockedEdges = self.blockedEdges | {edge} if state else self.blockedEdges - {edge}
+        return True
+
+    def setStationSignal(self, trackID, stationStatList):
+        if trackID in self.stations.keys():
+            for i, stationAgent in enumerate(self.stations[trackID]):
+                if i < len(stationStatList):
+                    stationAgent.setSignalState(stationStatList[i])
+
+    def setSingals(self, trackID, signalStatList):
+        if trackID in self.signals.keys():
+            for i, singal in enumerate(self.signals[trackID]):
+                if i < len(signalStatList):
+                    singal.setState(signalStatList[i])
+
+    def setBlocks(self, trackID, blockStatList):
+        if trackID in self.blockSigIdxDict.keys():
+            idxList = self.blockSigIdxDict[trackID]
+            for i, singalVal in enumerate(blockStatList):
+                if i < len(idxList):
+                    signal = self.signals[trackID][idxList[i]]
+                    signal.setState(singalVal)
+
+    def setTainsPower(self, trackID, powerStateList):
+        if trackID in self.trainSlots.keys():
+            for i, train in enumerate(self.trainSlots[trackID]):
+                if i < len(powerStateList):
+                    stopflg = not powerStateList[i]
+                    train.setEmgStop(stopflg)
+        # change the trains avoidance config if need
+        if trackID == 'config':
+            gv.gDebugPrint('--> change the CA state: %s' %str(powerStateList[0]), 
+                           logType=gv.LOG_INFO)
+            data = powerStateList[0]
+            gv.gCollAvoid = data
+            gv.iMainFrame.changeCAcheckboxState(gv.gCollAvoid)
+
+    #-----------------------------------------------------------------------------
+    def updateSignalState(self, key):
+        """ Update the junction signals of the lines which have priority relation
+            with the moved line <key> (railwayInterlock.SIGNAL_PRIORITY).
+        """
+        for signal in self.sigUpdateDict.get(key, ()):
+            signal.updateSingalState()
+
+    #-----------------------------------------------------------------------------
+    def autoCorrectSignalState(self):
+        """ Correct the CC line signal if got error, if both signal are on, turn 
+            off the cc line signal to make the cc line train pass 1st. The junction
+            conflicts are the railwayInterlock.SIGNAL_CONFLICT_RULES evaluated on 
+            the packed signals state.
+        """
+        signalStates = {}
+        for key, signals in self.signals.items():
+            signalStates[key] = interlock.packStates([signal.getState() for signal in signals])
+        for key, clearMask in self.interlock.getSignalConflicts(signalStates).items():
+            for i in interlock.getMaskIdx(clearMask):
+                gv.gDebugPrint("Correct the CC line signal: %s" %str(i), logType=gv.LOG_WARN)
+                self.signals[key][i].setState(False)
+
+#-----------------------------------------------------------------------------
+    def _stepLine(self, key, collsionTrainsDict, prof=None):
+        """ Move the trains of one line and update the line's sensors, this only 
+            changes the line's own agents so the lines can be stepped concurrently,
+            the shared spatial index and signals are updated at the barrier.
+            Args:
+                key (str): line (track) ID.
+                collsionTrainsDict (dict): junction collision trains idx of all lines.
+                prof (TickProfiler, optional): phase profiler. Defaults to None.
+        """
+        val = self.trains[key]
+        frontStates = self.getFrontTrainsState(key)
+        for i, train in enumerate(val):
+            result = False
+            frontTrain, _, speedCap = frontStates[i]
+            if frontTrain:
+                # Check the gap to the front train (or the route train ahead) 1st. 
+                result = train.checkFrontGap(speedCap)
+                # Handle the collision if the auto avoidance is disabled.
+                if result and (not gv.gCollAvoid):
+                    train.setEmgStop(True)
+                    train.setCollsionFlg(True)
+                    frontTrain.setEmgStop(True)
+            elif 0 < train.getTrainSpeed() < speedCap and train.getDockCount() == 0:
+                # the front train has left the track, release the braking speed.
+                train.setTrainSpeed(speedCap)
+
+            # if collision with the front train, ignore the signal.
+            if not result: 
+                train.checkSignal(self._getSignalCandidates(key, train))
+                # keep the braking speed if the signal released the train.
+                if 0 < speedCap < train.getTrainSpeed(): train.setTrainSpeed(speedCap)
+            # stop the train if it got collision at any junction.
+            if collsionTrainsDict and i in collsionTrainsDict[key]:
+                if gv.gCollAvoid:
+                    if key == 'ccline': train.setTrainSpeed(0)
+                else: 
+                    train.setEmgStop(True)
+            if prof: prof.lap('collision', key)
+            train.updateTrainPos(self.stepScale)
+            if prof: prof.lap('trainPos', key)
+        # update all the track's sensors state afte all the trains have moved.
+        self.sensors[key].updateActive(val)
+        if prof: prof.lap('sensors', key)
+
+    def periodic(self , now):
+        """ Periodicly call back function. This function need to be called before the 
+            railwayPanelMap's periodic().
+        """
+        if self.stepT is None:
+            self._step(now)
+            return
+        # fixed time step: run the steps of the time passed, a big time warp runs 
+        # more steps (not longer steps) so no sensor/signal/station will be skipped.
+        if self.stepLastT is None: self.stepLastT = now
+        self.stepAcc += max(0.0, now - self.stepLastT)*self.timeWarp
+        self.stepLastT = now
+        steps = int(self.stepAcc/self.stepT + 1e-6)
+        lagFlg = steps > MAX_SUB_STEPS
+        if lagFlg:
+            # keep the rest time for the next calls (not dropped) to not block the caller.
+            if not self.stepLagFlg:
+                gv.gDebugPrint("Simulation lags behind the time warp by %s steps." %str(steps-MAX_SUB_STEPS), 
+                               logType=gv.LOG_WARN)
+            steps = MAX_SUB_STEPS
+        self.stepLagFlg = lagFlg
+        stepNow = now - self.stepAcc/self.timeWarp if self.timeWarp else now
+        for _ in range(steps):
+            stepNow += self.stepT/self.timeWarp
+            self._step(stepNow)
+        self.stepAcc = max(0.0, self.stepAcc - steps*self.stepT)
+
+    def _step(self, now):
+        """ Run one simulation step of all the agents."""
+        gProfiler.poll()
+        if self.stationWatcher:
+            for key in self.stationWatcher.popChanged(): self.reloadStations(key)
+        prof = self.profiler
+        if prof: prof.startTick()
+        collsionTrainsDict = self._updateJunctionState()
+        if prof: prof.lap('junction')
+        # step all the lines (concurrently if the worker pool is set), the lines only
+        # share the junctions and the cross line signals which are updated at the 
+        # barrier after all the lines moved, so both modes give the same result.
+        if self.linePool:
+            futures = [self.linePool.submit(self._stepLine, key, collsionTrainsDict)
+                       for key in self.trains.keys()]
+            for future in futures: future.result()
+            if prof: prof.lap('lines')
+        else:
+            for key in self.trains.keys(): self._stepLine(key, collsionTrainsDict, prof=prof)
+        for val in self.trains.values():
+            for train in val: self.spatialIdx.update(train, self._getTrainBBox(train))
+        if prof: prof.lap('spatialIdx')
+        for key in self.trains.keys():
+            # updaste all the signal, if test mode (not connect to PLC) call the 
+            # buildin signal control logic, else the data manager will read the signal 
+            # infromation from PLC then do the auto update.
+            if gv.gTestMD or gv.gCollAvoid: self.updateSignalState(key)
+        if prof: prof.lap('signalUpdate')
+        if gv.gJuncAvoid: self.autoCorrectSignalState()
+        if prof: prof.lap('autoCorrect')
+
+        self._stepRouteTrains()
+        if prof: prof.lap('routeTrains')
+        # generate all the trains' real world data in one batch.
+        self.trainsRtu.update(self.trainSlots)
+        if prof: prof.lap('trainsRtu')
+        # update the station train's docking state
+        for key, val in self.stations.items():
+            stationTrains = self._getStationCandidates(key)
+            for i, station in enumerate(val):
+                station.updateTrainsDock(None if stationTrains is None else stationTrains.get(i, []))
+                if not station.getDockState():
+                    station.setEmptyCount(station.getEmptyCount() + 1)
+        if prof: prof.lap('stationDock')
+        # save the tick state to the history buffer (and the disk store if set).
+        histRec = self.history.record()
+        if self.teleStore and histRec: self.teleStore.append(*histRec)
+        if prof:
+            prof.lap('history')
+            prof.endTick()
+        if self.startupT is None:
+            self.startupT = time.time() - IMPORT_T
+            gv.gDebugPrint("1st simulation step finished %.3f sec after import" % self.startupT,
+                           logType=gv.LOG_INFO)
+
+
@@ -0,0 +1,264 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayMapScene.py
+#
+# Purpose:     This module is used to convert the railway map state snapshot
+#              (MapMgr.getSnapshot()) to a backend-agnostic scene description: a
+#              list of draw operations which can be replayed by the wx panel
+#              (railwayPanelMap) or by the offscreen raster backend used by the
+#              headless frame exporter (railwayFrameExporter). This module must
+#              not import wx.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+""" Scene draw operations format (all positions are map pixels):
+        ('rect', x, y, w, h, pen, brush)
+        ('line', x1, y1, x2, y2, pen)
+        ('lines', points, pen)
+        ('circle', x, y, radius, pen, brush)
+        ('text', x, y, text, color, font)
+        ('bitmap', x, y, iconKey)
+        ('screen',) : the following operations (the HUD: time and PLC/RTU state)
+                      are in the panel (screen) pixels, reset the view transform.
+    pen: (color, width, style), brush: fill color or None (transparent),
+    font: (pointSize, boldFlag), color: color name, '#RRGGBB' or (r, g, b).
+
+    If the snapshot has a 'view' (x0, y0, x1, y1) map area, the items outside the
+    view are culled before any draw operation is created, and the 'zoom' level
+    selects the level of detail (LOD) of the labels and trains. If the snapshot is
+    'culled' (MapMgr.getSnapshot(view=...) spatial index query with CULL_MARGIN),
+    it only has the visible agents and the per agent view checks are skipped.
+"""
+
+import time
+import railwayPWSimuGlobal as gv
+
+PEN_SOLID = 'solid'
+PEN_DASH = 'dash'
+
+BG_COLOR = (30, 40, 62)
+DEF_PEN = ('BLACK', 1, PEN_SOLID)
+
+# Level of detail: the min zoom level to show the details.
+LOD_LABEL_ZOOM = 0.8        # sensor ID and signal ID labels.
+LOD_TRAIN_DETAIL_ZOOM = 0.5 # train carriages (else the train is drawn as one line).
+LOD_TRAIN_INFO_ZOOM = 1.0   # train RTU information block (gv.gShowTrainRWInfo).
+LOD_STATION_LABEL_ZOOM = 0.4
+CULL_MARGIN = 100           # view extend distance of the snapshot culling (max item draw size).
+
+#-----------------------------------------------------------------------------
+def _inView(view, x, y, margin=0):
+    """ Check whether the point (x, y) is inside the view area (with margin)."""
+    if view is None: return True
+    return view[0]-margin <= x <= view[2]+margin and view[1]-margin <= y <= view[3]+margin
+
+def _lineInView(view, fromPt, toPt, margin=0):
+    """ Check whether the line bounding box overlaps the view area."""
+    if view is None: return True
+    return (min(fromPt[0], toPt[0]) <= view[2]+margin and max(fromPt[0], toPt[0]) >= view[0]-margin
+            and min(fromPt[1], toPt[1]) <= view[3]+margin and max(fromPt[1], toPt[1]) >= view[1]-margin)
+
+def _getAgentView(snapshot):
+    """ Return the view area to check the agents, None if the snapshot is culled."""
+    return None if snapshot.get('culled') else snapshot['view']
+
+#-----------------------------------------------------------------------------
+def _addRailWay(scene, snapshot, panelSize):
+    """ Add the background and the railway."""
+    view = snapshot['view']
+    if view is None:
+        scene.append(('rect', 0, 0, panelSize[0], panelSize[1], DEF_PEN, BG_COLOR))
+    else:
+        scene.append(('rect', view[0], view[1], view[2]-view[0], view[3]-view[1], DEF_PEN, BG_COLOR))
+    for key, (color, trackPts, trackType) in snapshot['tracks'].items():
+        pen = (color, 4, PEN_SOLID)
+        segments = [(trackPts[i], trackPts[i+1]) for i in range(len(trackPts)-1)]
+        # Connect the head and tail if the track is a circle:
+        if trackType == gv.RAILWAY_TYPE_CYCLE and trackPts: segments.append((trackPts[0], trackPts[-1]))
+        for fromPt, toPt in segments:
+            if _lineInView(view, fromPt, toPt, 4):
+                scene.append(('line', fromPt[0], fromPt[1], toPt[0], toPt[1], pen))
+    # Draw the switch connectors between the tracks (solid if the switch diverges).
+    for switchID, fromPt, toPt, state in snapshot.get('switches', ()):
+        if _lineInView(view, fromPt, toPt, 4):
+            pen = ('WHITE', 2, PEN_SOLID) if state else ('GRAY', 2, PEN_DASH)
+            scene.append(('line', fromPt[0], fromPt[1], toPt[0], toPt[1], pen))
+
+#-----------------------------------------------------------------------------
+def _addJunction(scene, snapshot):
+    """ Add the junctions."""
+    view = _getAgentView(snapshot)
+    for pos, collision in snapshot['junctions']:
+        if not _inView(view, pos[0], pos[1], 20): continue
+        if collision and not gv.gCollAvoid:
+            if snapshot['toggle']:
+                scene.append(('bitmap', pos[0]-15, pos[1]-15, 'alert'))
+            else:
+                scene.append(('rect', pos[0]-10, pos[1]-10, 20, 20, ('RED', 1, PEN_SOLID), 'RED'))
+        else:
+            scene.append(('rect', pos[0]-10, pos[1]-10, 20, 20, ('GREEN', 1, PEN_SOLID), None))
+
+#-----------------------------------------------------------------------------
+def _addTrains(scene, snapshot):
+    """ Add the trains and the train RTU information."""
+    view, zoom = _getAgentView(snapshot), snapshot['zoom']
+    for key, val in snapshot['trains'].items():
+        for i, trainState in enumerate(val):
+            if trainState is None: continue # culled.
+            trainPos, speed, emgStop, collsionFlg, powerState, trainInfo = trainState
+            if not any(_inView(view, pt[0], pt[1], 60) for pt in (trainPos[0], trainPos[-1])): continue
+            trainColor = '#CE8349' if speed == 0 else 'GREEN'
+            if emgStop:
+                trainColor = 'RED'
+            if zoom >= LOD_TRAIN_DETAIL_ZOOM:
+                for point in trainPos:
+                    scene.append(('rect', point[0]-5, point[1]-5, 10, 10, DEF_PEN, trainColor))
+            else:
+                scene.append(('lines', trainPos, (trainColor, 10, PEN_SOLID)))
+            pos = trainPos[0]
+            # Draw the collsion Icon if collision happens.
+            if snapshot['toggle'] and collsionFlg:
+                scene.append(('bitmap', pos[0]-20, pos[1]-20, 'alert'))
+            scene.append(('text', pos[0]+5, pos[1]+5, key+'-'+str(i), trainColor, (10, False)))
+            if gv.gShowTrainRWInfo and zoom >= LOD_TRAIN_INFO_ZOOM:
+                font = (8, False)
+                infoLines = ('- power: %s' %str('on' if powerState else 'off'),
+                             '- speed: %s km/h' %str(trainInfo['speed']),
+                             '- voltage: %s V' %str(trainInfo['voltage']),
+                             '- current: %s A' %str(trainInfo['current']),
+                             '- fsensor: %s' %str('detected' if trainInfo['fsensor'] else 'none'))
+                for j, text in enumerate(infoLines):
+                    scene.append(('text', pos[0]+5, pos[1]+15+10*j, text, trainColor, font))
+
+#-----------------------------------------------------------------------------
+def _addSensors(scene, snapshot):
+    """ Add the sensors and their ID labels."""
+    font = (7, False)
+    view, labelFlg = _getAgentView(snapshot), snapshot['zoom'] >= LOD_LABEL_ZOOM
+    for sensorId, sensorPos, sensorState in snapshot['sensors']:
+        for i, pos in enumerate(sensorPos):
+            if pos is None or not _inView(view, pos[0], pos[1], 40): continue
+            if labelFlg: scene.append(('text', pos[0]+3, pos[1]+5, sensorId+"-s"+str(i), 'WHITE', font))
+            color = ('YELLOW' if snapshot['toggle'] else 'BLUE') if sensorState[i] else 'GRAY'
+            scene.append(('rect', pos[0]-4, pos[1]-4, 8, 8, DEF_PEN, color))
+
+#-----------------------------------------------------------------------------
+def _addSignals(scene, snapshot):
+    """ Add the signals and their ID labels."""
+    font = (7, False)
+    view, labelFlg = _getAgentView(snapshot), snapshot['zoom'] >= LOD_LABEL_ZOOM
+    for id, pos, state, dir in snapshot['signals']:
+        if not _inView(view, pos[0], pos[1], 40): continue
+        color = 'RED' if state else 'GREEN'
+        pen = (color, 2, PEN_SOLID)
+        x, y = pos[0], pos[1]
+        if dir == gv.LAY_U:
+            y -= 15
+        elif dir == gv.LAY_D:
+            y += 15
+        elif dir == gv.LAY_L:
+            x -= 15
+        elif dir == gv.LAY_R:
+            x += 15
+        scene.append(('line', pos[0], pos[1], x, y, pen))
+        if labelFlg: scene.append(('text', x-10, y-25, "S-"+str(id), 'WHITE', font))
+        scene.append(('rect', x-5, y-5, 10, 10, pen, color))
+
+#-----------------------------------------------------------------------------
+def _addStations(scene, snapshot):
+    """ Add the stations with their docking and signal state."""
+    font = (10, False)
+    view, labelFlg = _getAgentView(snapshot), snapshot['zoom'] >= LOD_STATION_LABEL_ZOOM
+    for key, stations in snapshot['stations'].items():
+        colorCode = snapshot['tracks'][key][0]
+        for id, pos, labelPos, dockState, layout, signalState in stations:
+            x, y = pos[0], pos[1]
+            if not _inView(view, x, y, 100): continue
+            (x1, y1) = labelPos
+            if labelFlg: scene.append(('text', x+x1, y+y1, str(id), colorCode, font))
+            color = 'BLUE' if dockState else colorCode
+            scene.append(('circle', x, y, 8, DEF_PEN, color))
+            pen = (color, 1, PEN_SOLID if dockState else PEN_DASH)
+            if layout == gv.LAY_H:
+                scene.append(('rect', x-35, y-7, 70, 14, pen, None))
+            else:
+                scene.append(('rect', x-7, y-35, 14, 70, pen, None))
+            # Draw station signal if some train is docking.
+            if signalState:
+                if layout == gv.LAY_H:
+                    scene.append(('rect', x-40, y-6, 8, 12, DEF_PEN, 'RED'))
+                    scene.append(('rect', x+30, y-6, 8, 12, DEF_PEN, 'RED'))
+                else:
+                    scene.append(('rect', x-6, y-40, 12, 8, DEF_PEN, 'RED'))
+                    scene.append(('rect', x-6, y+30, 12, 8, DEF_PEN, 'RED'))
+
+#-----------------------------------------------------------------------------
+def _addEnvItems(scene, snapshot):
+    """ Add the environment items."""
+    view = snapshot['view']
+    for id, pos, itemType, size, color, link in snapshot['envItems']:
+        if not _inView(view, pos[0], pos[1], max(size)+20): continue
+        x, y = pos[0]-size[0]//2, pos[1]-size[1]//2
+        if itemType == gv.ENV_TYPE:
+            scene.append(('bitmap', x, y, id))
+            scene.append(('text', x, y-15, str(id), 'WHITE', (10, False)))
+        elif itemType == gv.LABEL_TYPE:
+            pen = DEF_PEN
+            if link:
+                pen = (color, 2, PEN_SOLID)
+                scene.append(('lines', tuple(link), pen))
+            scene.append(('rect', x, y, size[0], size[1], pen, color))
+            scene.append(('text', x+6, y+6, str(id), 'WHITE', (12, True)))
+
+#-----------------------------------------------------------------------------
+def _addHud(scene, snapshot):
+    """ Add the date time and the PLC/RTU connection state in the screen pixels."""
+    scene.append(('screen',))
+    # Draw the current date and time
+    timeStr = time.strftime("%b %d %Y %H:%M:%S", time.localtime(snapshot.get('time', time.time())))
+    scene.append(('text', 1300, 40, timeStr, 'GREEN', (14, True)))
+    # Draw the PLC/RTU state:
+    plcStateDict, rtuStateDict = snapshot.get('plcState'), snapshot.get('rtuState')
+    if plcStateDict:
+        font = (10, False)
+        stateCfg = (('- [ PLC-00, PLC-01, PLC-02 ]', plcStateDict['sensors'], (90, 760)),
+                    ('- [ PLC-03, PLC-04, PLC-05 ]', plcStateDict['stations'], (90, 840)),
+                    ('- [ PLC-06, PLC-07 ]', plcStateDict['trains'], (350, 760)),
+                    ('- [ RTU-01-10 ]', rtuStateDict['trains'], (1140, 760)),
+                    ('- [ PLC-08, PLC-09 ]', plcStateDict['blocks'], (350, 840)))
+        for title, (timeStr, state), (x, y) in stateCfg:
+            textColor = 'GREEN' if state else 'RED'
+            connState = 'online' if state else 'offline'
+            scene.append(('text', x, y, title, textColor, font))
+            scene.append(('text', x, y+17, '- Last Update Time: '+str(timeStr), textColor, font))
+            scene.append(('text', x, y+34, '- Connection State: '+str(connState), textColor, font))
+
+#-----------------------------------------------------------------------------
+def buildScene(snapshot, panelSize):
+    """ Build the scene draw operations list of the whole map.
+        Args:
+            snapshot (dict): map state from MapMgr.getSnapshot() with the optional
+                'toggle' (flash state), 'time', 'plcState', 'rtuState', 'view' 
+                (visible map area, None for no culling) and 'zoom' keys.
+            panelSize (tuple): (width, height) of the map.
+        Returns:
+            list: scene draw operations in paint order.
+    """
+    snapshot.setdefault('toggle', False)
+    snapshot.setdefault('view', None)
+    snapshot.setdefault('zoom', 1.0)
+    scene = []
+    _addRailWay(scene, snapshot, panelSize)
+    _addJunction(scene, snapshot)
+    _addTrains(scene, snapshot)
+    _addSensors(scene, snapshot)
+    _addSignals(scene, snapshot)
+    _addStations(scene, snapshot)
+    _addEnvItems(scene, snapshot)
+    _addHud(scene, snapshot)
+    return scene
@@ -1,336 +1,679 @@
-#!/usr/bin/python
-#-----------------------------------------------------------------------------
-# Name:        railWayPanelMap.py
-#
-# Purpose:     This module is used to display the state animation of the railway 
-#              system, such as trains movement, sensors detection state, station
-#              docking state and singal changes ...
-# 
-# Author:      Yuancheng Liu
-#
-# Version:     v0.1.2
-# Created:     2023/06/01
-# Copyright:   Copyright (c) 2023 LiuYuancheng
-# License:     MIT License
-#-----------------------------------------------------------------------------
-
-import os
-import time
-
-import wx
-import railwayPWSimuGlobal as gv
-
-DEF_PNL_SIZE = (1600, 920)
-
-#-----------------------------------------------------------------------------
-#-----------------------------------------------------------------------------
-class PanelMap(wx.Panel):
-    """ RailWay system map panel."""
-    def __init__(self, parent, panelSize=DEF_PNL_SIZE):
-        wx.Panel.__init__(self, parent, size=panelSize)
-        self.bgColor = wx.Colour(30, 40, 62)
-        self.SetBackgroundColour(self.bgColor)
-        self.panelSize = panelSize
-        self.bitMaps = self._loadBitMaps()
-        self.toggle = False
-        # Paint the map
-        self.Bind(wx.EVT_PAINT, self.onPaint)
-        # self.Bind(wx.EVT_LEFT_DOWN, self.onLeftClick)
-        # Set the panel double buffer to void the panel flash during update.
-        self.SetDoubleBuffered(True)
-
-#-----------------------------------------------------------------------------
-    def _loadBitMaps(self):
-        """ Load the internal usage pictures as bitmaps."""
-        imgDict = {}
-        imgPath = os.path.join(gv.IMG_FD, 'alert.png')
-        if os.path.exists(imgPath):
-            png = wx.Image(imgPath, wx.BITMAP_TYPE_ANY).ConvertToBitmap()
-            imgDict['alert'] = png
-        return imgDict
-
-#-----------------------------------------------------------------------------
-# Define all the _draw() map components paint functions.
-    
-    def _drawEnvItems(self, dc):
-        """ Draw the environment items."""
-        dc.SetPen(self.dcDefPen)
-        dc.SetTextForeground(wx.Colour('White'))
-        for item in gv.iMapMgr.getEnvItems():
-            id = item.getID()
-            pos = item.getPos()
-            bitmap = item.getWxBitmap()
-            size = item.getSize()
-            if item.getType() == gv.ENV_TYPE:
-                dc.SetFont(wx.Font(10, wx.DEFAULT, wx.NORMAL, wx.NORMAL))
-                dc.DrawBitmap(bitmap, pos[0]-size[0]//2, pos[1]-size[1]//2)
-                dc.DrawText(str(id), pos[0]-size[0]//2, pos[1]-size[1]//2-15)
-            elif item.getType() == gv.LABEL_TYPE:
-                color, link = item.getColor(), item.getLink()
-                if link:
-                    dc.SetPen(wx.Pen(color, width=2, style=wx.PENSTYLE_SOLID))
-                    dc.DrawLines(link)
-                dc.SetFont(wx.Font(12, wx.DEFAULT, wx.NORMAL, wx.BOLD))
-                dc.SetBrush(wx.Brush(color))
-                dc.DrawRectangle(pos[0]-size[0]//2, pos[1]-size[1]//2, size[0], size[1])
-                dc.DrawText(str(id), pos[0]-size[0]//2+6, pos[1]-size[1]//2+6)
-        # Draw the current date and time
-        dc.SetFont(wx.Font(14, wx.DEFAULT, wx.NORMAL, wx.BOLD))
-        dc.SetTextForeground(wx.Colour('GREEN'))
-        dc.DrawText(time.strftime("%b %d %Y %H:%M:%S", time.localtime(time.time())), 1300, 40)
-        
-        # Draw the PLC state:
-        if gv.iDataMgr:
-            dc.SetFont(wx.Font(10, wx.DEFAULT, wx.NORMAL, wx.NORMAL))
-            plcStateDict = gv.iDataMgr.getLastPlcsConnectionState()
-            rtuStateDict = gv.iDataMgr.getLastRtusConnectionState()
-            # draw sensor plc state
-            timeStr, state = plcStateDict['sensors']
-            textColor = wx.Colour('GREEN') if state else wx.Colour('RED')
-            dc.SetTextForeground(textColor)
-            connState = 'online' if state else 'offline'
-            dc.DrawText('- [ PLC-00, PLC-01, PLC-02 ]', 90, 760)
-            dc.DrawText('- Last Update Time: '+str(timeStr), 90, 777)
-            dc.DrawText('- Connection State: '+str(connState), 90, 794)
-
-            # draw sensor plc state
-            timeStr, state = plcStateDict['stations']
-            textColor = wx.Colour('GREEN') if state else wx.Colour('RED')
-            dc.SetTextForeground(textColor)
-            connState = 'online' if state else 'offline'
-            dc.DrawText('- [ PLC-03, PLC-04, PLC-05 ]', 90, 840)
-            dc.DrawText('- Last Update Time: '+str(timeStr), 90, 857)
-            dc.DrawText('- Connection State: '+str(connState), 90, 874)
-
-            # draw trains plc state
-            timeStr, state = plcStateDict['trains']
-            textColor = wx.Colour('GREEN') if state else wx.Colour('RED')
-            dc.SetTextForeground(textColor)
-            connState = 'online' if state else 'offline'
-            dc.DrawText('- [ PLC-06, PLC-07 ]', 350, 760)
-            dc.DrawText('- Last Update Time: '+str(timeStr), 350, 777)
-            dc.DrawText('- Connection State: '+str(connState), 350, 794)
-
-           # draw trains rtu state
-            timeStr, state = rtuStateDict['trains']
-            textColor = wx.Colour('GREEN') if state else wx.Colour('RED')
-            dc.SetTextForeground(textColor)
-            connState = 'online' if state else 'offline'
-            dc.DrawText('- [ RTU-01-10 ]', 1140, 760)
-            dc.DrawText('- Last Update Time: '+str(timeStr), 1140, 777)
-            dc.DrawText('- Connection State: '+str(connState), 1140, 794)
-
-        # draw the time state
-        timeStr, state = plcStateDict['blocks']
-        textColor = wx.Colour('GREEN') if state else wx.Colour('RED')
-        dc.SetTextForeground(textColor)
-        connState = 'online' if state else 'offline'
-        dc.DrawText('- [ PLC-08, PLC-09 ]', 350, 840)
-        dc.DrawText('- Last Update Time: '+str(timeStr), 350, 857)
-        dc.DrawText('- Connection State: '+str(connState), 350, 874)
-
-#-----------------------------------------------------------------------------
-    def _drawJunction(self, dc):
-        """ Draw the junction 
-        """
-        dc.SetPen(self.dcDefPen)
-        for item in gv.iMapMgr.getJunction():
-            pos = item.getPos()
-            if item.getCollition() and not gv.gCollAvoid:
-                if self.toggle:
-                    dc.DrawBitmap(self.bitMaps['alert'], pos[0]-15, pos[1]-15)
-                else:
-                    dc.SetPen(wx.Pen('RED', width=1, style=wx.PENSTYLE_SOLID))
-                    dc.SetBrush(wx.Brush('RED'))
-                    dc.DrawRectangle(pos[0]-10, pos[1]-10, 20, 20)
-            else: 
-                dc.SetPen(wx.Pen('GREEN', width=1, style=wx.PENSTYLE_SOLID))
-                dc.SetBrush(wx.Brush('GREEN', wx.TRANSPARENT))
-                dc.DrawRectangle(pos[0]-10, pos[1]-10, 20, 20)
-
-#-----------------------------------------------------------------------------
-    def _drawRailWay(self, dc):
-        """ Draw the background and the railway."""
-        w, h = self.panelSize
-        dc.SetBrush(wx.Brush(self.bgColor))
-        dc.DrawRectangle(0, 0, w, h)
-        for key, trackInfo in gv.iMapMgr.getTracks().items():
-            dc.SetPen(wx.Pen(trackInfo['color'], width=4, style=wx.PENSTYLE_SOLID))
-            trackPts = trackInfo['points']
-            for i in range(len(trackPts)-1):
-                fromPt, toPt = trackPts[i], trackPts[i+1]
-                dc.DrawLine(fromPt[0], fromPt[1], toPt[0], toPt[1])
-            # Connect the head and tail if the track is a circle:
-            if trackInfo['type'] == gv.RAILWAY_TYPE_CYCLE: 
-                fromPt, toPt = trackPts[0], trackPts[-1]
-                dc.DrawLine(fromPt[0], fromPt[1], toPt[0], toPt[1])
-
-#--PanelMap--------------------------------------------------------------------
-    def _drawTrains_old(self, dc):
-        """ Draw the trains on the map."""
-        dc.SetPen(self.dcDefPen)
-        clashPt = None
-        # Draw the train1 on the map.
-        # dc.SetPen(wx.Pen(wx.Colour(52, 169, 129)))
-        # dirList = self.mapMgr.trainA.getDirs()
-        # #bitmap = wx.Bitmap(gv.gTrainImgB)
-        # gc = wx.GraphicsContext.Create(dc)
-        # gc.SetBrush(wx.Brush(trainColor))
-        # for i, point in enumerate( self.mapMgr.trainA.getPos()):
-        #      gc.PushState()
-        #      gc.Translate(point[0], point[1])
-        #      gc.Rotate(dirList[i])
-        #      gc.DrawRectangle(-5, -5, 10, 10)
-        #      if i == 0 or i == 4:
-        #          gc.DrawBitmap(wx.Bitmap(gv.gTrainImgB), -5, -5, 10, 10)
-        # #     else:
-        # #         gc.DrawBitmap(bitmap, -5, -5, 10, 10)
-        #      gc.PopState()
-        for point in self.mapMgr.trainA.getPos():
-            dc.DrawRectangle(point[0]-5, point[1]-5, 10, 10)
-        # Draw the train2 on the map.
-
-#-----------------------------------------------------------------------------
-    def _drawTrains(self, dc):
-        """ Draw the trains on the map."""
-        dc.SetPen(self.dcDefPen)
-        trainDict = gv.iMapMgr.getTrains()
-        for key, val in trainDict.items():
-            for i, train in enumerate(val):
-                trainColor = '#CE8349' if train.getTrainSpeed() == 0 else 'GREEN'
-                if train.getEmgStop():
-                    trainColor = 'RED'
-                dc.SetBrush(wx.Brush(trainColor))
-                for point in train.getPos():
-                    dc.DrawRectangle(point[0]-5, point[1]-5, 10, 10)
-                # draw the train ID:
-                dc.SetTextForeground(wx.Colour(trainColor))
-                pos = train.getTrainPos(idx=0)
-                # Draw the collsion Icon if collision happens.
-                if self.toggle and train.getCollsionFlg(): dc.DrawBitmap(self.bitMaps['alert'], pos[0]-20, pos[1]-20)
-                #dc.DrawText(key+'-'+str(i), pos[0]+5, pos[1]+5)
-                dc.DrawText(key+'-'+str(i), pos[0]+5, pos[1]+5)
-                if gv.gShowTrainRWInfo:
-                    trainInfo = train.getTrainRealInfo()
-                    dc.SetFont(wx.Font(8, wx.DEFAULT, wx.NORMAL, wx.NORMAL))
-                    dc.DrawText('- power: %s' %str('on' if train.getPowerState() else 'off'), pos[0]+5, pos[1]+15)
-                    dc.DrawText('- speed: %s km/h' %str(trainInfo['speed']), pos[0]+5, pos[1]+25)
-                    dc.DrawText('- voltage: %s V' %str(trainInfo['voltage']), pos[0]+5, pos[1]+35)
-                    dc.DrawText('- current: %s A' %str(trainInfo['current']), pos[0]+5, pos[1]+45)
-                    dc.DrawText('- fsensor: %s' %str('detected' if trainInfo['fsensor'] else 'none'), pos[0]+5, pos[1]+55)
-
-#-----------------------------------------------------------------------------
-    def _drawSensors(self, dc):
-        dc.SetPen(self.dcDefPen)
-        dc.SetFont(wx.Font(7, wx.DEFAULT, wx.NORMAL, wx.NORMAL))
-        dc.SetBrush(wx.Brush('GRAY'))
-        for key, sensorAgent in gv.iMapMgr.getSensors().items():
-            sensorId = sensorAgent.getID()
-            sensorPos = sensorAgent.getPos()
-            sensorState = sensorAgent.getSensorsState()
-            dc.SetTextForeground(wx.Colour('White'))
-            for i in range(sensorAgent.getSensorCount()):
-                pos = sensorPos[i]
-                dc.DrawText(sensorId+"-s"+str(i), pos[0]+3, pos[1]+5)
-                state = sensorState[i]
-                if state:
-                    color = 'YELLOW' if self.toggle else 'BLUE'
-                    dc.SetBrush(wx.Brush(color))
-                    dc.DrawRectangle(pos[0]-4, pos[1]-4, 8, 8)
-                    dc.SetBrush(wx.Brush('GRAY'))
-                else:
-                    dc.DrawRectangle(pos[0]-4, pos[1]-4, 8, 8)
-
-#-----------------------------------------------------------------------------
-    def _drawSignals(self, dc):
-        dc.SetPen(self.dcDefPen)
-        dc.SetFont(wx.Font(7, wx.DEFAULT, wx.NORMAL, wx.NORMAL))
-        dc.SetBrush(wx.Brush('Green'))
-        for key, signals in gv.iMapMgr.getSignals().items():
-            for signalAgent in signals:
-                id = signalAgent.getID()
-                pos = signalAgent.getPos()
-                state = signalAgent.getState()
-                dir = signalAgent.dir
-                color = 'RED' if state else 'GREEN'
-                dc.SetPen(wx.Pen(color, width=2, style=wx.PENSTYLE_SOLID))
-                x, y = pos[0], pos[1]
-                if dir == gv.LAY_U:
-                    y -= 15 
-                elif dir == gv.LAY_D:
-                    y += 15
-                elif dir == gv.LAY_L:
-                    x -= 15
-                elif dir == gv.LAY_R:
-                    x += 15
-                dc.DrawLine(pos[0], pos[1], x, y)
-                dc.DrawText("S-"+str(id), x-10, y-25)
-                dc.SetBrush(wx.Brush(color))
-                dc.DrawRectangle(x-5, y-5, 10, 10)
-
-#-----------------------------------------------------------------------------
-    def _drawStation(self, dc):
-        dc.SetPen(self.dcDefPen)
-        dc.SetFont(wx.Font(10, wx.DEFAULT, wx.NORMAL, wx.NORMAL))
-        for key, stations in gv.iMapMgr.getStations().items():
-            colorCode = gv.iMapMgr.getTracks(trackID=key)['color']
-            dc.SetTextForeground(colorCode)
-            for station in stations:
-                id = station.getID()
-                pos = station.getPos()
-                x, y = pos[0], pos[1]
-                dc.SetPen(self.dcDefPen)
-                dc.SetBrush(wx.Brush(colorCode))
-                (x1,y1) = station.getLabelPos()
-                dc.DrawText(str(id), x+x1, y+y1)
-                color = 'BLUE' if station.getDockState() else colorCode
-                line =wx.PENSTYLE_SOLID if station.getDockState() else wx.PENSTYLE_LONG_DASH
-                dc.SetBrush(wx.Brush(color))
-                dc.DrawCircle(x, y, 8)
-                dc.SetPen(wx.Pen(color, width=1, style=line))
-                dc.SetBrush(wx.Brush(color, wx.TRANSPARENT))
-                if station.getLayout() == gv.LAY_H:
-                    dc.DrawRectangle(x-35, y-7, 70, 14)
-                else: 
-                    dc.DrawRectangle(x-7, y-35, 14, 70)
-                # Draw station signal if some train is docking.
-                if station.getSignalState():
-                    dc.SetPen(self.dcDefPen)
-                    dc.SetBrush(wx.Brush('RED'))
-                    if station.getLayout() == gv.LAY_H:
-                        dc.DrawRectangle(x-40, y-6, 8, 12)
-                        dc.DrawRectangle(x+30, y-6, 8, 12)
-                    else: 
-                        dc.DrawRectangle(x-6, y-40, 12, 8)
-                        dc.DrawRectangle(x-6, y+30, 12, 8)
-                    pos = station.getSignalPos()
-                    #dc.DrawCircle(pos[0], pos[1], 10)
-
-    #--PanelMap--------------------------------------------------------------------
-    def onPaint(self, event):
-        """ Draw the whole panel by using the wx device context."""
-        dc = wx.PaintDC(self)
-        self.dcDefPen = dc.GetPen()
-        # Draw all the components
-        self._drawRailWay(dc)
-        self._drawJunction(dc)
-        self._drawTrains(dc)
-        self._drawSensors(dc)
-        self._drawSignals(dc)
-        self._drawStation(dc)
-        self._drawEnvItems(dc)
-
-    def updateDisplay(self, updateFlag=None):
-        """ Set/Update the display: if called as updateDisplay() the function will 
-            update the panel, if called as updateDisplay(updateFlag=?) the function
-            will set the self update flag.
-        """
-        self.Refresh(False)
-        self.Update()
-        self.toggle = not self.toggle
-
-#--PanelMap--------------------------------------------------------------------
-    def periodic(self , now):
-        """ periodicly call back to do needed calcualtion/panel update"""
-        # Call the onPaint to update the map display.
-        self.updateDisplay()
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railWayPanelMap.py
+#
+# Purpose:     This module is used to display the state animation of the railway 
+#              system, such as trains movement, sensors detection state, station
+#              docking state and singal changes ...
+# 
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1.2
+# Created:     2023/06/01
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import time
+import threading
+
+import wx
+import railwayPWSimuGlobal as gv
+import railwayMapScene as scene
+from railwayAssetLoader import AssetLoader
+from railwayRuntimeProfiler import gProfiler
+
+DEF_PNL_SIZE = (1600, 920)
+DEF_MIN_FPS = 2         # lowest display rate the adaptive render scheduler will drop to.
+MIN_ZOOM = 0.2
+MAX_ZOOM = 8.0
+ZOOM_STEP = 1.2         # zoom in/out scale of one mouse wheel step.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class RenderScheduler(object):
+    """ Frame scheduler to decouple the map display refresh from the simulation
+        tick. The scheduler decides when a frame is due based on the target FPS,
+        drops the frame slots which are covered by a slow paint and lowers the
+        display rate (not below minFps) when the paint time exceeds the frame
+        budget, then recovers back to the target FPS when the paint is fast again.
+    """
+    def __init__(self, targetFps, minFps=DEF_MIN_FPS):
+        self.targetFps = targetFps
+        self.minFpsCfg = minFps     # configured FPS floor, minFps is capped by the target.
+        self.minFps = min(minFps, targetFps)
+        self.crtFps = targetFps     # current (adaptive) display rate.
+        self.nextFrameT = 0         # time the next frame is due.
+        self.frameStartT = 0
+        self.paintTime = 0.0        # smoothed paint time (sec) of the recent frames.
+        self.simTicks = 0           # simulation ticks since the last frame.
+        self.simTicksPerFrame = 0
+        self.frameCount = 0
+        self.droppedFrames = 0
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getFrameBudget(self):
+        """ Return the time (sec) one frame is allowed to take at the current FPS."""
+        return 1.0/self.crtFps
+
+    def getStats(self):
+        return {
+            'targetFps': self.targetFps,
+            'fps': round(self.crtFps, 2),
+            'paintMs': round(self.paintTime*1000, 3),
+            'simTicksPerFrame': self.simTicksPerFrame,
+            'frames': self.frameCount,
+            'dropped': self.droppedFrames,
+        }
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setTargetFps(self, targetFps):
+        self.targetFps = targetFps
+        self.minFps = min(self.minFpsCfg, targetFps)
+        self.crtFps = targetFps
+
+#-----------------------------------------------------------------------------
+    def addSimTick(self):
+        """ Record one simulation tick, called from the sim periodic()."""
+        self.simTicks += 1
+
+    def checkFrameDue(self, now):
+        """ Check whether a frame needs to be painted at time <now> (sec), a quarter
+            frame tolerance is used to absorb the render timer jitter.
+        """
+        return now >= self.nextFrameT - 0.25*self.getFrameBudget()
+
+    def startFrame(self, now):
+        """ Mark a frame start, the frame slots missed since the last due time are
+            counted as dropped.
+        """
+        interval = self.getFrameBudget()
+        if self.frameCount and now - self.nextFrameT >= interval:
+            self.droppedFrames += int((now - self.nextFrameT)/interval)
+        self.frameStartT = now
+        self.simTicksPerFrame = self.simTicks
+        self.simTicks = 0
+
+    def endFrame(self, now):
+        """ Mark a frame end, schedule the next frame and adapt the display rate
+            with the paint time.
+        """
+        paintT = now - self.frameStartT
+        self.paintTime = paintT if self.frameCount == 0 else 0.8*self.paintTime + 0.2*paintT
+        self.frameCount += 1
+        interval = self.getFrameBudget()
+        # skip the frame slots the paint has already run over.
+        slots = int(paintT/interval) + 1
+        self.droppedFrames += slots - 1
+        self.nextFrameT = self.frameStartT + slots*interval
+        # adapt the display rate to the paint time.
+        if self.paintTime > 0.8*interval and self.crtFps > self.minFps:
+            self.crtFps = max(self.minFps, self.crtFps*0.8)
+        elif self.paintTime < 0.4*interval and self.crtFps < self.targetFps:
+            self.crtFps = min(self.targetFps, self.crtFps + 1)
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class _GcPainter(object):
+    """ Adapter to provide the wx.DC draw functions used by drawScene() on
+        a wx.GraphicsContext, so the map can be drawn on a wx.Image in a non-UI 
+        thread.
+    """
+    def __init__(self, gc):
+        self.gc = gc
+        self.font = wx.NORMAL_FONT
+        self.textColor = wx.Colour('Black')
+        self.gcBitmaps = {} # graphics bitmaps created from the wx.Image icons.
+        self.scale = (1.0, 1.0)
+        self.origin = (0, 0)
+
+    def _setTransform(self):
+        """ Set the transform same as the wx.DC: device = (logical - origin)*scale."""
+        (sx, sy), (ox, oy) = self.scale, self.origin
+        self.gc.SetTransform(self.gc.CreateMatrix(sx, 0.0, 0.0, sy, -ox*sx, -oy*sy))
+
+    def SetPen(self, pen):
+        self.gc.SetPen(pen)
+
+    def SetBrush(self, brush):
+        self.gc.SetBrush(brush)
+
+    def SetFont(self, font):
+        self.font = font
+
+    def SetTextForeground(self, color):
+        self.textColor = wx.Colour(color)
+
+    def SetUserScale(self, xScale, yScale):
+        self.scale = (xScale, yScale)
+        self._setTransform()
+
+    def SetLogicalOrigin(self, x, y):
+        self.origin = (x, y)
+        self._setTransform()
+
+    def DrawBitmap(self, image, x, y):
+        key = id(image)
+        if key not in self.gcBitmaps:
+            self.gcBitmaps[key] = self.gc.CreateBitmapFromImage(image)
+        self.gc.DrawBitmap(self.gcBitmaps[key], x, y, image.GetWidth(), image.GetHeight())
+
+    def DrawCircle(self, x, y, radius):
+        self.gc.DrawEllipse(x-radius, y-radius, 2*radius, 2*radius)
+
+    def DrawLine(self, x1, y1, x2, y2):
+        self.gc.StrokeLine(x1, y1, x2, y2)
+
+    def DrawLines(self, points):
+        self.gc.StrokeLines([wx.Point2D(*pt) for pt in points])
+
+    def DrawRectangle(self, x, y, w, h):
+        self.gc.DrawRectangle(x, y, w, h)
+
+    def DrawText(self, text, x, y):
+        self.gc.SetFont(self.font, self.textColor)
+        self.gc.DrawText(text, x, y)
+
+#-----------------------------------------------------------------------------
+def drawScene(dc, sceneOps, gdiDict, icons, zoom=1.0, origin=(0, 0)):
+    """ Replay the scene draw operations (railwayMapScene) on the input DC, this
+        function only reads its inputs so it can run in the frame composer thread.
+        Args:
+            dc (wx.DC or _GcPainter): paint DC or the composer's image painter.
+            sceneOps (list): operations from railwayMapScene.buildScene().
+            gdiDict (dict): wx pens/brushes/fonts of all the scene operations, from
+                PanelMap._prepareGdi() (created in the UI thread).
+            icons (dict): icons from PanelMap._getIcons().
+            zoom (float, optional): view zoom level. Defaults to 1.0.
+            origin (tuple, optional): map position shown at the top left. Defaults to (0, 0).
+    """
+    crtPen = crtBrush = crtFont = crtColor = None
+    transFlg = zoom != 1.0 or tuple(origin) != (0, 0)
+    if transFlg:
+        dc.SetUserScale(zoom, zoom)
+        dc.SetLogicalOrigin(*origin)
+    for op in sceneOps:
+        opType = op[0]
+        if opType == 'screen':
+            # the HUD is drawn in the panel pixels.
+            if transFlg:
+                dc.SetUserScale(1.0, 1.0)
+                dc.SetLogicalOrigin(0, 0)
+                transFlg = False
+            continue
+        if opType == 'text':
+            _, x, y, text, color, font = op
+            if font != crtFont: 
+                crtFont = font
+                dc.SetFont(gdiDict[('font', font)])
+            if color != crtColor:
+                crtColor = color
+                dc.SetTextForeground(wx.Colour(color))
+            dc.DrawText(text, x, y)
+            continue
+        if opType == 'bitmap':
+            _, x, y, key = op
+            if key in icons: dc.DrawBitmap(icons[key], x, y)
+            continue
+        pen = op[-2] if opType in ('rect', 'circle') else op[-1]
+        if pen != crtPen:
+            crtPen = pen
+            dc.SetPen(gdiDict[pen])
+        if opType == 'line':
+            dc.DrawLine(*op[1:5])
+        elif opType == 'lines':
+            dc.DrawLines(op[1])
+        else:
+            if op[-1] != crtBrush:
+                crtBrush = op[-1]
+                dc.SetBrush(gdiDict[('brush', crtBrush)])
+            if opType == 'rect':
+                dc.DrawRectangle(*op[1:5])
+            else:
+                dc.DrawCircle(*op[1:4])
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class FrameComposer(threading.Thread):
+    """ Worker thread to compose the map frames into a wx.Image from the frame 
+        jobs prepared by the UI thread (scene operations, wx GDI objects and the
+        view state), the UI thread only need to blit the finished frame in onPaint().
+        The composer does not access the panel or create any wx GDI object. Only
+        the latest submitted job is composed, the older ones are dropped if the
+        composer can not catch up.
+    """
+    def __init__(self, panel, icons, frameSize):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.panel = panel      # only used to post the frame ready call back.
+        self.icons = icons
+        self.frameSize = frameSize
+        self.terminate = False
+        self.job = None
+        self.jobCond = threading.Condition()
+        self.frame = None       # last finished frame (wx.Image).
+        self.frameLock = threading.Lock()
+        self.composeTime = 0    # time (sec) used to compose the last frame.
+
+    def getComposeTime(self):
+        return self.composeTime
+
+    def getFrame(self):
+        with self.frameLock:
+            return self.frame
+
+    def submit(self, job):
+        """ Submit a frame job (sceneOps, gdiDict, zoom, origin) to compose the 
+            next frame, see drawScene().
+        """
+        with self.jobCond:
+            self.job = job
+            self.jobCond.notify()
+
+    def run(self):
+        """ Thread run() function will be called by start(). """
+        w, h = self.frameSize
+        while not self.terminate:
+            gProfiler.poll()
+            with self.jobCond:
+                while self.job is None and not self.terminate:
+                    self.jobCond.wait()
+                job, self.job = self.job, None
+            if self.terminate: break
+            startT = time.perf_counter()
+            image = wx.Image(w, h)
+            gc = wx.GraphicsContext.Create(image)
+            sceneOps, gdiDict, zoom, origin = job
+            drawScene(_GcPainter(gc), sceneOps, gdiDict, self.icons, zoom=zoom, origin=origin)
+            gc = None  # the image is updated when the graphics context is released.
+            self.composeTime = time.perf_counter() - startT
+            with self.frameLock:
+                self.frame = image
+            wx.CallAfter(self.panel.onFrameReady)
+
+    def stop(self):
+        """ Stop the thread."""
+        self.terminate = True
+        with self.jobCond:
+            self.jobCond.notify()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class AgentInfoPopup(wx.PopupTransientWindow):
+    """ Popup window to show the live state of the agent clicked on the map, the
+        popup is closed when user clicks outside of it.
+    """
+    def __init__(self, parent):
+        wx.PopupTransientWindow.__init__(self, parent, flags=wx.BORDER_SIMPLE)
+        self.SetBackgroundColour(wx.Colour(240, 240, 240))
+        self.infoTxt = wx.StaticText(self, -1, '', pos=(8, 8))
+
+    def OnDismiss(self):
+        """ Overwrite the popup dismiss call back to release the inspect target."""
+        wx.CallAfter(self.GetParent().closeInspect, popup=self)
+
+    def updateInfo(self, infoDict):
+        """ Update the shown state with a {name: value} dict."""
+        text = '\n'.join(['%s: %s' % (key, str(val)) for key, val in infoDict.items()])
+        if text == self.infoTxt.GetLabel(): return
+        self.infoTxt.SetLabel(text)
+        w, h = self.infoTxt.GetBestSize()
+        self.SetSize((w+16, h+16))
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class PanelMap(wx.Panel):
+    """ RailWay system map panel."""
+    def __init__(self, parent, panelSize=DEF_PNL_SIZE, renderFps=None):
+        """ Init the map panel.
+            Args:
+                parent (wx.Frame): parent frame.
+                panelSize (tuple, optional): panel size. Defaults to DEF_PNL_SIZE.
+                renderFps (int, optional): if set, the map is repainted by its own
+                    render timer at this target FPS instead of on every simulation
+                    periodic() call. Defaults to None.
+        """
+        wx.Panel.__init__(self, parent, size=panelSize)
+        self.bgColor = wx.Colour(*scene.BG_COLOR)
+        self.SetBackgroundColour(self.bgColor)
+        self.panelSize = panelSize
+        # Decode the icon images in the background, collected by the 1st paint.
+        self.assetLoader = AssetLoader()
+        self.iconImages = None
+        self._loadBitMaps()
+        self.toggle = False
+        # Paint the map
+        self.Bind(wx.EVT_PAINT, self.onPaint)
+        # Click on the map to inspect the train/sensor/signal/station/junction state.
+        self.Bind(wx.EVT_LEFT_DOWN, self.onLeftClick)
+        self.inspectItem = None
+        self.inspectPopup = None
+        # Zoom with the mouse wheel and pan by dragging with the mouse right key.
+        self.zoom = 1.0
+        self.viewOrigin = (0, 0)    # map position shown at the panel top left corner.
+        self.dragStart = None
+        self.Bind(wx.EVT_MOUSEWHEEL, self.onMouseWheel)
+        self.Bind(wx.EVT_RIGHT_DOWN, self.onRightDown)
+        self.Bind(wx.EVT_RIGHT_UP, self.onRightUp)
+        self.Bind(wx.EVT_RIGHT_DCLICK, lambda event: self.resetView())
+        self.Bind(wx.EVT_MOTION, self.onMouseMove)
+        # Set the panel double buffer to void the panel flash during update.
+        self.SetDoubleBuffered(True)
+        # Init the independent render scheduler if a display FPS is set.
+        self.scheduler = None
+        self.renderTimer = None
+        if renderFps: self.setRenderFps(renderFps)
+        # Frame composer worker thread, None: draw the map in onPaint directly.
+        self.iconsCache = {}
+        self.gdiCache = {}  # wx pens/brushes/fonts used by the scene draw operations.
+        self.gdiFrozen = {} # copy of the gdiCache handed to the composer thread.
+        self.composer = None
+
+#-----------------------------------------------------------------------------
+    def _loadBitMaps(self):
+        """ Start loading the internal usage pictures and the env items' icons (scaled
+            to the item size) in the asset loader's thread pool.
+        """
+        self.assetLoader.submit('alert', os.path.join(gv.IMG_FD, 'alert.png'))
+        if gv.iMapMgr:
+            for item in gv.iMapMgr.getEnvItems():
+                self.assetLoader.submit(item.getID(), item.getImgPath(), item.getSize())
+
+    def _getImages(self):
+        """ Wait for the background loading finished and return the icon wx.Image dict."""
+        if self.iconImages is None:
+            self._loadBitMaps() # env items created after the panel init.
+            self.iconImages = self.assetLoader.getImages()
+            self.assetLoader.close()
+        return self.iconImages
+
+#-----------------------------------------------------------------------------
+    def _getIcons(self, imageFlg=False):
+        """ Get the alert/env item icons used by the drawMap() function, the icons 
+            are wx.Bitmap for the paint DC and wx.Image for the frame composer 
+            worker thread (wx.Bitmap can only be used in the UI thread).
+            Args:
+                imageFlg (bool, optional): return wx.Image icons. Defaults to False.
+        """
+        cacheKey = 'image' if imageFlg else 'bitmap'
+        if cacheKey not in self.iconsCache:
+            images = self._getImages()
+            if imageFlg:
+                icons = dict(images)
+            else:
+                icons = {key: image.ConvertToBitmap() for key, image in images.items()}
+                for item in gv.iMapMgr.getEnvItems():
+                    if item.getID() in icons: item.setWxBitmap(icons[item.getID()])
+            self.iconsCache[cacheKey] = icons
+        return self.iconsCache[cacheKey]
+
+    def _getSnapshot(self):
+        """ Get the map state snapshot with the PLC/RTU connection state."""
+        snapshot = gv.iMapMgr.getSnapshot(view=self.getViewArea(), margin=scene.CULL_MARGIN)
+        snapshot['plcState'] = gv.iDataMgr.getLastPlcsConnectionState() if gv.iDataMgr else None
+        snapshot['rtuState'] = gv.iDataMgr.getLastRtusConnectionState() if gv.iDataMgr else None
+        snapshot['toggle'] = self.toggle
+        snapshot['time'] = time.time()
+        snapshot['zoom'] = self.zoom
+        return snapshot
+
+    def _submitFrame(self):
+        """ Build the scene and its wx GDI objects of the current state in the UI 
+            thread and hand them with the view state to the frame composer.
+        """
+        snapshot = self._getSnapshot()
+        sceneOps = scene.buildScene(snapshot, self.panelSize)
+        if self._prepareGdi(sceneOps): self.gdiFrozen = dict(self.gdiCache)
+        self.composer.submit((sceneOps, self.gdiFrozen, snapshot['zoom'], snapshot['view'][:2]))
+
+    def _refreshView(self):
+        """ Repaint the map after the view (zoom/pan) changed."""
+        if self.composer:
+            self._submitFrame()
+        else:
+            self.Refresh(False)
+
+#-----------------------------------------------------------------------------
+# Define all the _draw() map components paint functions.
+
+    def _getPen(self, pen):
+        """ Get the (cached) wx.Pen of a scene pen (color, width, style)."""
+        if pen not in self.gdiCache:
+            color, width, style = pen
+            penStyle = wx.PENSTYLE_LONG_DASH if style == scene.PEN_DASH else wx.PENSTYLE_SOLID
+            self.gdiCache[pen] = wx.Pen(wx.Colour(color), width=width, style=penStyle)
+        return self.gdiCache[pen]
+
+    def _getBrush(self, color):
+        """ Get the (cached) wx.Brush of a scene fill color, None for transparent."""
+        key = ('brush', color)
+        if key not in self.gdiCache:
+            self.gdiCache[key] = wx.Brush(wx.Colour(color)) if color else wx.TRANSPARENT_BRUSH
+        return self.gdiCache[key]
+
+    def _getFont(self, font):
+        """ Get the (cached) wx.Font of a scene font (pointSize, boldFlag)."""
+        key = ('font', font)
+        if key not in self.gdiCache:
+            size, bold = font
+            self.gdiCache[key] = wx.Font(size, wx.DEFAULT, wx.NORMAL, wx.BOLD if bold else wx.NORMAL)
+        return self.gdiCache[key]
+
+    def _prepareGdi(self, sceneOps):
+        """ Create (in the UI thread) the wx pens/brushes/fonts of all the scene
+            operations which are not in the gdiCache yet.
+            Returns:
+                bool: True if any new GDI object is created.
+        """
+        cacheSize = len(self.gdiCache)
+        for op in sceneOps:
+            opType = op[0]
+            if opType == 'text':
+                self._getFont(op[5])
+            elif opType in ('rect', 'circle'):
+                self._getPen(op[-2])
+                self._getBrush(op[-1])
+            elif opType in ('line', 'lines'):
+                self._getPen(op[-1])
+        return len(self.gdiCache) != cacheSize
+
+#--PanelMap--------------------------------------------------------------------
+    def _drawTrains_old(self, dc):
+        """ Draw the trains on the map."""
+        dc.SetPen(self.dcDefPen)
+        clashPt = None
+        # Draw the train1 on the map.
+        # dc.SetPen(wx.Pen(wx.Colour(52, 169, 129)))
+        # dirList = self.mapMgr.trainA.getDirs()
+        # #bitmap = wx.Bitmap(gv.gTrainImgB)
+        # gc = wx.GraphicsContext.Create(dc)
+        # gc.SetBrush(wx.Brush(trainColor))
+        # for i, point in enumerate( self.mapMgr.trainA.getPos()):
+        #      gc.PushState()
+        #      gc.Translate(point[0], point[1])
+        #      gc.Rotate(dirList[i])
+        #      gc.DrawRectangle(-5, -5, 10, 10)
+        #      if i == 0 or i == 4:
+        #          gc.DrawBitmap(wx.Bitmap(gv.gTrainImgB), -5, -5, 10, 10)
+        # #     else:
+        # #         gc.DrawBitmap(bitmap, -5, -5, 10, 10)
+        #      gc.PopState()
+        for point in self.mapMgr.trainA.getPos():
+            dc.DrawRectangle(point[0]-5, point[1]-5, 10, 10)
+        # Draw the train2 on the map.
+
+#-----------------------------------------------------------------------------
+    def drawMap(self, dc, snapshot, icons):
+        """ Draw all the map components from a state snapshot on the paint DC by 
+            replaying the scene draw operations (railwayMapScene) in the UI thread.
+            Args:
+                dc (wx.DC): paint DC.
+                snapshot (dict): map state from _getSnapshot().
+                icons (dict): icons from _getIcons().
+        """
+        sceneOps = scene.buildScene(snapshot, self.panelSize)
+        self._prepareGdi(sceneOps)
+        drawScene(dc, sceneOps, self.gdiCache, icons, zoom=snapshot['zoom'], origin=snapshot['view'][:2])
+
+    #--PanelMap--------------------------------------------------------------------
+    def onPaint(self, event):
+        """ Draw the whole panel by using the wx device context."""
+        gProfiler.poll()
+        dc = wx.PaintDC(self)
+        self.dcDefPen = dc.GetPen()
+        if self.composer:
+            # Only blit the last frame finished by the composer thread.
+            frame = self.composer.getFrame()
+            if frame: dc.DrawBitmap(wx.Bitmap(frame), 0, 0)
+            return
+        # Draw all the components
+        self.drawMap(dc, self._getSnapshot(), self._getIcons())
+
+    def onFrameReady(self):
+        """ Call back (in UI thread) when the composer finished one frame."""
+        self.Refresh(False)
+
+    def updateDisplay(self, updateFlag=None):
+        """ Set/Update the display: if called as updateDisplay() the function will 
+            update the panel, if called as updateDisplay(updateFlag=?) the function
+            will set the self update flag.
+        """
+        if self.composer:
+            # Hand the current frame job to the composer, the panel will be 
+            # refreshed by onFrameReady() when the frame is finished.
+            self._submitFrame()
+        else:
+            self.Refresh(False)
+            self.Update()
+        self.toggle = not self.toggle
+        if self.inspectItem: self.updateInspect()
+
+#--PanelMap--------------------------------------------------------------------
+    def getViewArea(self):
+        """ Return the visible map area (x0, y0, x1, y1)."""
+        w, h = self.GetClientSize()
+        x0, y0 = self.viewOrigin
+        return (x0, y0, x0 + int(w/self.zoom), y0 + int(h/self.zoom))
+
+    def mapToPanel(self, pos):
+        """ Convert a map position to the panel (screen) position."""
+        return (int((pos[0]-self.viewOrigin[0])*self.zoom), int((pos[1]-self.viewOrigin[1])*self.zoom))
+
+    def panelToMap(self, pos):
+        """ Convert a panel (screen) position to the map position."""
+        return (int(self.viewOrigin[0] + pos[0]/self.zoom), int(self.viewOrigin[1] + pos[1]/self.zoom))
+
+    def setView(self, zoom, viewOrigin):
+        """ Set the zoom level and the map position shown at the panel top left."""
+        self.zoom = min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+        self.viewOrigin = (int(viewOrigin[0]), int(viewOrigin[1]))
+        self._refreshView()
+
+    def resetView(self):
+        self.setView(1.0, (0, 0))
+
+#--PanelMap--------------------------------------------------------------------
+    def onLeftClick(self, event):
+        """ Show the live state of the agent under the mouse in a popup window."""
+        pos = event.GetPosition()
+        x, y = self.panelToMap(pos)
+        # keep the hit distance about the same on the screen when zoomed.
+        item = gv.iMapMgr.getAgentAt(x, y, threshold=max(3, int(10/self.zoom)))
+        self.closeInspect()
+        if item is None: return
+        self.inspectItem = item
+        self.inspectPopup = AgentInfoPopup(self)
+        self.updateInspect()
+        self.inspectPopup.Position(self.ClientToScreen(pos), (10, 10))
+        self.inspectPopup.Popup()
+
+    def updateInspect(self):
+        """ Refresh the inspect popup with the agent's current state."""
+        if self.inspectPopup:
+            self.inspectPopup.updateInfo(gv.iMapMgr.getAgentInfo(self.inspectItem))
+
+    def closeInspect(self, popup=None):
+        """ Close the inspect popup, if <popup> is set only close it if it is still
+            the current one.
+        """
+        if popup and popup is not self.inspectPopup: return
+        if self.inspectPopup: self.inspectPopup.Destroy()
+        self.inspectPopup = None
+        self.inspectItem = None
+
+    def onMouseWheel(self, event):
+        """ Zoom in/out the map around the mouse position."""
+        pos = event.GetPosition()
+        mapPos = self.panelToMap(pos)
+        zoom = self.zoom*ZOOM_STEP if event.GetWheelRotation() > 0 else self.zoom/ZOOM_STEP
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+        self.setView(zoom, (mapPos[0] - pos[0]/zoom, mapPos[1] - pos[1]/zoom))
+
+    def onRightDown(self, event):
+        self.dragStart = (event.GetPosition(), self.viewOrigin)
+
+    def onRightUp(self, event):
+        self.dragStart = None
+
+    def onMouseMove(self, event):
+        """ Pan the map when the mouse right key is dragging."""
+        if self.dragStart and event.RightIsDown():
+            (x0, y0), (ox, oy) = self.dragStart
+            x, y = event.GetPosition()
+            self.setView(self.zoom, (ox - (x-x0)/self.zoom, oy - (y-y0)/self.zoom))
+
+#--PanelMap--------------------------------------------------------------------
+    def setComposeMode(self, composeFlg):
+        """ Turn on/off the off-UI-thread frame composition mode.
+            Args:
+                composeFlg (bool): True to compose the frames in a worker thread, 
+                    False to draw the map directly in onPaint().
+        """
+        if composeFlg and self.composer is None:
+            self.composer = FrameComposer(self, self._getIcons(imageFlg=True), self.panelSize)
+            self.composer.start()
+        elif not composeFlg and self.composer:
+            self.composer.stop()
+            self.composer = None
+
+#--PanelMap--------------------------------------------------------------------
+    def getRenderStats(self):
+        """ Return the render scheduler state (fps, paint time, sim ticks per
+            frame, dropped frames), None if the map is repainted every tick.
+        """
+        return self.scheduler.getStats() if self.scheduler else None
+
+    def setRenderFps(self, renderFps):
+        """ Set the display target FPS, the render timer fires at the target FPS
+            and the scheduler decides whether the frame is painted or dropped.
+        """
+        if self.scheduler is None:
+            self.scheduler = RenderScheduler(renderFps)
+            self.renderTimer = wx.Timer(self)
+            self.Bind(wx.EVT_TIMER, self.onRenderTimer, self.renderTimer)
+        else:
+            self.scheduler.setTargetFps(renderFps)
+        self.renderTimer.Start(max(1, int(1000/renderFps)))
+
+    def onRenderTimer(self, event):
+        """ Render timer call back to paint the map if a frame is due."""
+        now = time.perf_counter()
+        if not self.scheduler.checkFrameDue(now): return
+        self.scheduler.startFrame(now)
+        self.updateDisplay()
+        self.scheduler.endFrame(time.perf_counter())
+
+#--PanelMap--------------------------------------------------------------------
+    def periodic(self , now):
+        """ periodicly call back to do needed calcualtion/panel update"""
+        if self.scheduler:
+            # The map is repainted by the render timer, only count the sim tick.
+            self.scheduler.addSimTick()
+            return
+        # Call the onPaint to update the map display.
+        self.updateDisplay()
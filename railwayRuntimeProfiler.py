@@ -0,0 +1,331 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayRuntimeProfiler.py
+#
+# Purpose:     This module provides the profilers which can be started/stopped
+#              at runtime (by the DataManager's POST;profiler request) without
+#              restarting the simulator:
+#                - sampling: a thread samples all threads' stacks every interval,
+#                  saved as collapsed stacks text (flame graph input).
+#                - deterministic: cProfile saved as pstats. From python 3.12 the
+#                  cProfile is process wide (sys.monitoring), one profiler covers
+#                  all the threads. Before 3.12 it is per thread, the profiler of a
+#                  thread is enabled/disabled at the thread's poll point (sim tick,
+#                  UI paint, frame composer loop and UDP message handler).
+#                - tracemalloc: allocation snapshot grouped by the agent types in
+#                  railwayAgent.py, saved as text report and the raw snapshot.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import inspect
+import threading
+import tracemalloc
+
+import railwayAgent as agent
+
+MODE_SAMPLING = 'sampling'
+MODE_DETERMINISTIC = 'deterministic'
+MODE_TRACEMALLOC = 'tracemalloc'
+
+DEF_OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+DEF_SAMPLE_INTERVAL = 0.005 # sampling profiler interval (sec).
+DEF_STOP_TIMEOUT = 5.0      # max time (sec) to wait the threads' poll() to save the profile.
+MAX_STACK_DEPTH = 64
+PROCESS_WIDE = sys.version_info >= (3, 12) # True: one cProfile profiles all the threads.
+TRACE_FRAMES = 16           # tracemalloc traceback depth to find the agent frame.
+AGENT_CLASSES = (agent.AgentTrain, agent.AgentSensors, agent.AgentSignal,
+                 agent.AgentStation, agent.AgentJunction, agent.agentEnv)
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class _StackSampler(threading.Thread):
+    """ Thread to sample the stacks of all the other threads."""
+    def __init__(self, interval):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.interval = interval
+        self.terminate = False
+        self.stacks = {}    # (threadName, frame1, frame2...) -> sample count.
+        self.samples = 0
+
+    def run(self):
+        """ Thread run() function will be called by start(). """
+        ownID = threading.get_ident()
+        while not self.terminate:
+            names = {th.ident: th.name for th in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == ownID: continue
+                stack = []
+                while frame and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append('%s:%s' % (os.path.basename(code.co_filename), code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                key = tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        """ Stop the thread."""
+        self.terminate = True
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class _ThreadStats(object):
+    """ The stats of one thread's cProfile.Profile taken without disabling it
+        (the profile of a finished or quiet thread can not be disabled from another
+        thread), used as the pstats.Stats input.
+    """
+    def __init__(self, prof):
+        prof.snapshot_stats()
+        self.stats = prof.stats
+
+    def create_stats(self):
+        pass
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class RuntimeProfiler(object):
+    """ Runtime start/stop profiler shared by all the threads."""
+    def __init__(self, outDir=DEF_OUT_DIR):
+        self.outDir = outDir
+        self.lock = threading.Lock()
+        self.mode = None
+        self.startT = 0
+        self.outFile = None
+        self.lastFile = None
+        self.sampler = None
+        self.pollFlg = False    # True: the threads need to handle the profiler at poll().
+        self.running = False    # True: the deterministic profiler is collecting.
+        self.processProf = None # the process wide cProfile.Profile (python 3.12+).
+        self.threadProfs = {}   # thread name -> (thread, cProfile.Profile enabled in the thread).
+        self.doneProfs = []     # finished threads' _ThreadStats
+        self.staleProfs = {}    # thread name -> (thread, saved profile to disable at its poll()).
+        self.savePending = False    # True: deterministic profile stopped but not saved.
+        self.saveTimer = None
+        self.errThreads = set() # names of the threads failed to enable their profile.
+        self.lastError = None
+        self.agentRanges = None
+
+    def _getOutFile(self, ext):
+        if not os.path.exists(self.outDir): os.makedirs(self.outDir)
+        name = 'profile_%s_%s.%s' % (self.mode, time.strftime('%Y%m%d_%H%M%S'), ext)
+        return os.path.join(self.outDir, name)
+
+    def _getAgentRanges(self):
+        """ Return list of (startLine, endLine, className) of the agent classes."""
+        if self.agentRanges is None:
+            self.agentRanges = []
+            for cls in AGENT_CLASSES:
+                lines, startLine = inspect.getsourcelines(cls)
+                self.agentRanges.append((startLine, startLine+len(lines)-1, cls.__name__))
+        return self.agentRanges
+
+#-----------------------------------------------------------------------------
+    def poll(self):
+        """ Poll point called by each profiled thread's loop, the deterministic
+            profiler of the calling thread is started/stopped here (before python
+            3.12). The profiler error is recorded in the state, never raised to
+            the caller.
+        """
+        if not self.pollFlg: return
+        try:
+            self._poll()
+        except Exception as err:
+            self.lastError = 'poll(): %s' % str(err)
+
+    def _poll(self):
+        thread = threading.current_thread()
+        name = thread.name
+        with self.lock:
+            stale = self.staleProfs.pop(name, None)
+            if stale and stale[0] is thread: stale[1].disable()
+            entry = self.threadProfs.get(name)
+            if entry and entry[0] is not thread:
+                # the profiled thread exited and a new thread reused its name.
+                del self.threadProfs[name]
+                self.doneProfs.append(_ThreadStats(entry[1]))
+                entry = None
+            if self.running and entry is None and name not in self.errThreads:
+                prof = cProfile.Profile()
+                try:
+                    prof.enable()
+                    self.threadProfs[name] = (thread, prof)
+                except ValueError as err:
+                    # another profiling tool is active in this thread.
+                    self.errThreads.add(name)
+                    self.lastError = 'thread %s: %s' % (name, str(err))
+            elif not self.running and entry:
+                entry[1].disable()
+                del self.threadProfs[name]
+                self.doneProfs.append(_ThreadStats(entry[1]))
+            for staleName, (staleThread, _) in list(self.staleProfs.items()):
+                if not staleThread.is_alive(): del self.staleProfs[staleName]
+            if self.savePending: self._checkPending()
+            elif not self.running and not self.staleProfs: self.pollFlg = False
+
+    def _checkPending(self, force=False):
+        """ Collect the profiles of the exited threads (and of all the pending 
+            threads if force) and save the pstats file if no thread is pending.
+        """
+        for name, (thread, prof) in list(self.threadProfs.items()):
+            if force or not thread.is_alive():
+                del self.threadProfs[name]
+                self.doneProfs.append(_ThreadStats(prof))
+                if thread.is_alive(): self.staleProfs[name] = (thread, prof)
+        if not self.threadProfs: self._saveDeterministic()
+
+    def _saveDeterministic(self):
+        """ Merge all the threads' profile to the output pstats file."""
+        self.savePending = False
+        self.pollFlg = bool(self.staleProfs)
+        if self.saveTimer:
+            self.saveTimer.cancel()
+            self.saveTimer = None
+        if self.doneProfs:
+            stats = pstats.Stats(self.doneProfs[0])
+            for prof in self.doneProfs[1:]: stats.add(prof)
+            stats.dump_stats(self.lastFile)
+        self.doneProfs = []
+
+    def _onSaveTimeout(self):
+        """ Save the profiles collected so far if some threads did not poll in time."""
+        with self.lock:
+            if self.savePending: self._checkPending(force=True)
+
+    def isActive(self):
+        return self.mode is not None
+
+    def getState(self):
+        return {
+            'mode': self.mode,
+            'elapsed': round(time.time() - self.startT, 3) if self.mode else 0,
+            'file': self.outFile if self.mode else self.lastFile,
+            'pendingThreads': list(self.threadProfs.keys()),
+            'error': self.lastError
+        }
+
+#-----------------------------------------------------------------------------
+    def start(self, mode, interval=DEF_SAMPLE_INTERVAL):
+        """ Start the profiler in <mode>.
+            Returns:
+                bool: False if a profiler is already running or unknown mode.
+        """
+        with self.lock:
+            if self.savePending: self._checkPending()
+            if self.mode or self.savePending: return False
+            if mode == MODE_SAMPLING:
+                self.sampler = _StackSampler(interval)
+                self.sampler.start()
+            elif mode == MODE_DETERMINISTIC:
+                self.errThreads, self.lastError = set(), None
+                if PROCESS_WIDE:
+                    prof = cProfile.Profile()
+                    try:
+                        prof.enable()
+                    except ValueError as err:
+                        self.lastError = str(err)
+                        return False
+                    self.processProf = prof
+                else:
+                    self.running = self.pollFlg = True
+            elif mode == MODE_TRACEMALLOC:
+                if not tracemalloc.is_tracing(): tracemalloc.start(TRACE_FRAMES)
+            else:
+                return False
+            self.mode = mode
+            self.startT = time.time()
+            self.outFile = self._getOutFile({MODE_SAMPLING: 'txt', MODE_DETERMINISTIC: 'pstats',
+                                             MODE_TRACEMALLOC: 'txt'}[mode])
+        return True
+
+    def stop(self, timeout=DEF_STOP_TIMEOUT):
+        """ Stop the running profiler and save the result file.
+            Args:
+                timeout (float, optional): max time (sec) to wait for the profiled
+                    threads' next poll point, the profiles collected so far are
+                    saved after the timeout. Defaults to DEF_STOP_TIMEOUT.
+            Returns:
+                str: the output file path (the per thread deterministic profile
+                    file is saved after all the live threads passed their next poll
+                    point or the timeout), None if no profiler is running.
+        """
+        with self.lock:
+            mode, self.mode = self.mode, None
+            if mode is None: return None
+            self.lastFile = self.outFile
+            if mode == MODE_SAMPLING:
+                self.sampler.stop()
+                self.sampler.join()
+                with open(self.outFile, 'w') as fh:
+                    fh.write('# %d samples, interval %s sec\n' % (self.sampler.samples, self.sampler.interval))
+                    for stack, count in sorted(self.sampler.stacks.items(), key=lambda x: -x[1]):
+                        fh.write('%s %d\n' % (';'.join(stack), count))
+                self.sampler = None
+            elif mode == MODE_DETERMINISTIC and self.processProf:
+                self.processProf.disable()
+                self.doneProfs.append(_ThreadStats(self.processProf))
+                self.processProf = None
+                self._saveDeterministic()
+            elif mode == MODE_DETERMINISTIC:
+                self.running = False
+                # finish the calling thread's profile now, the others at their poll().
+                entry = self.threadProfs.pop(threading.current_thread().name, None)
+                if entry:
+                    entry[1].disable()
+                    self.doneProfs.append(_ThreadStats(entry[1]))
+                self.savePending = True
+                self._checkPending()
+                if self.savePending:
+                    self.saveTimer = threading.Timer(timeout, self._onSaveTimeout)
+                    self.saveTimer.daemon = True
+                    self.saveTimer.start()
+            elif mode == MODE_TRACEMALLOC:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                snapshot.dump(self.outFile.replace('.txt', '.tmsnap'))
+                self._saveAllocReport(snapshot)
+        return self.lastFile
+
+    def _saveAllocReport(self, snapshot):
+        """ Save the tracemalloc allocation sizes grouped by agent type, the
+            allocation is counted to the innermost agent class frame in its traceback.
+        """
+        agentFile = os.path.abspath(agent.__file__)
+        ranges = self._getAgentRanges()
+        groups = {}     # type -> [size, count]
+        for stat in snapshot.statistics('traceback'):
+            owner = 'other'
+            for frame in reversed(stat.traceback):  # innermost frame 1st.
+                if os.path.abspath(frame.filename) != agentFile: continue
+                for startLine, endLine, clsName in ranges:
+                    if startLine <= frame.lineno <= endLine:
+                        owner = clsName
+                        break
+                break
+            group = groups.setdefault(owner, [0, 0])
+            group[0] += stat.size
+            group[1] += stat.count
+        with open(self.outFile, 'w') as fh:
+            fh.write('# tracemalloc allocations by agent type (traced %.1f sec)\n' % (time.time() - self.startT))
+            fh.write('%-16s %14s %10s\n' % ('type', 'size(bytes)', 'blocks'))
+            for owner, (size, count) in sorted(groups.items(), key=lambda x: -x[1][0]):
+                fh.write('%-16s %14d %10d\n' % (owner, size, count))
+            fh.write('\n# top 20 allocation lines\n')
+            for stat in snapshot.statistics('lineno')[:20]:
+                fh.write('%s\n' % str(stat))
+
+# The profiler instance used by all the modules.
+gProfiler = RuntimeProfiler()
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwaySpatialIndex.py
+#
+# Purpose:     This module provides a uniform grid spatial index to look up the
+#              agents on the railway map by position (map click hit test and the
+#              display view culling). The static agents (sensors, signals,
+#              stations, junctions) are inserted once, the trains are updated
+#              incrementally: a train is only moved between the grid cells when its
+#              covered cell range changed.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+DEF_CELL_SIZE = 64  # grid cell size (pixel), about one train length.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class SpatialGrid(object):
+    """ Uniform grid spatial index, each item is registered with its bounding
+        box (x0, y0, x1, y1) in all the grid cells the box overlaps.
+    """
+    def __init__(self, cellSize=DEF_CELL_SIZE):
+        self.cellSize = cellSize
+        self.cells = {}     # (cellX, cellY) -> {key: item}
+        self.itemCells = {} # key -> cell range (cx0, cy0, cx1, cy1)
+        self.items = {}     # key -> item
+
+    def _getCellRange(self, bbox):
+        x0, y0, x1, y1 = bbox
+        size = self.cellSize
+        return (int(x0//size), int(y0//size), int(x1//size), int(y1//size))
+
+    def _addToCells(self, key, item, cellRange):
+        cx0, cy0, cx1, cy1 = cellRange
+        for cx in range(cx0, cx1+1):
+            for cy in range(cy0, cy1+1):
+                self.cells.setdefault((cx, cy), {})[key] = item
+
+    def _removeFromCells(self, key, cellRange):
+        cx0, cy0, cx1, cy1 = cellRange
+        for cx in range(cx0, cx1+1):
+            for cy in range(cy0, cy1+1):
+                cell = self.cells.get((cx, cy))
+                if cell is None: continue
+                cell.pop(key, None)
+                if not cell: del self.cells[(cx, cy)]
+
+#-----------------------------------------------------------------------------
+    def clear(self):
+        self.cells.clear()
+        self.itemCells.clear()
+        self.items.clear()
+
+    def insert(self, key, bbox, item):
+        """ Insert (or replace) an item with its bounding box."""
+        if key in self.itemCells: self.remove(key)
+        cellRange = self._getCellRange(bbox)
+        self.items[key] = item
+        self.itemCells[key] = cellRange
+        self._addToCells(key, item, cellRange)
+
+    def remove(self, key):
+        cellRange = self.itemCells.pop(key, None)
+        if cellRange is None: return
+        self.items.pop(key, None)
+        self._removeFromCells(key, cellRange)
+
+    def update(self, key, bbox):
+        """ Update the bounding box of an inserted item, the grid cells are only
+            changed if the item moved to another cell range.
+            Returns:
+                bool: True if the item changed cells.
+        """
+        cellRange = self._getCellRange(bbox)
+        oldRange = self.itemCells.get(key)
+        if oldRange == cellRange or oldRange is None: return False
+        item = self.items[key]
+        self._removeFromCells(key, oldRange)
+        self._addToCells(key, item, cellRange)
+        self.itemCells[key] = cellRange
+        return True
+
+    def query(self, x, y, radius=0):
+        """ Return the list of the (key, item) registered in the cells overlapping
+            the square (x-radius, y-radius, x+radius, y+radius).
+        """
+        result = {}
+        cx0, cy0, cx1, cy1 = self._getCellRange((x-radius, y-radius, x+radius, y+radius))
+        for cx in range(cx0, cx1+1):
+            for cy in range(cy0, cy1+1):
+                cell = self.cells.get((cx, cy))
+                if cell: result.update(cell)
+        return list(result.items())
+
+    def queryRect(self, bbox):
+        """ Return the list of the (key, item) registered in the cells overlapping
+            the area bbox (x0, y0, x1, y1).
+        """
+        result = {}
+        cx0, cy0, cx1, cy1 = self._getCellRange(bbox)
+        for cx in range(cx0, cx1+1):
+            for cy in range(cy0, cy1+1):
+                cell = self.cells.get((cx, cy))
+                if cell: result.update(cell)
+        return list(result.items())
+
+    def getItemCount(self):
+        return len(self.items)
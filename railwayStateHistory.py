@@ -0,0 +1,204 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayStateHistory.py
+#
+# Purpose:     This module provides a fixed memory ring buffer to record the map
+#              components state (sensors, signals and trains real world info)
+#              every simulation tick, and the downsampled trend query of the last
+#              N seconds. The record of one tick is a flat int16 array, its layout
+#              is built from the map so the buffer size is constant after init. The
+#              sensors packed bitset bytes and the trains RTU data array are copied
+#              into the record directly (no per sensor/train loop).
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import sys
+import time
+import threading
+from array import array
+from collections import OrderedDict
+
+from railwayTrainRtu import RTU_FIELDS
+
+DEF_CAPACITY = 6000     # number of tick records kept (10 min if tick is 0.1 sec).
+DEF_POINTS = 100        # default number of the downsampled points returned.
+REC_TYPE = 'h'          # int16 record elements.
+TRAIN_FIELDS = ('speed', 'voltage', 'current', 'fsensor', 'power') # trend fields.
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _getSensorBit(idx):
+    """ Return (word offset, bit shift) of the sensor <idx> in the int16 words of
+        the copied bitset bytes (sensor idx is bit idx%8 of byte idx//8).
+    """
+    byteIdx = idx >> 3
+    highByte = byteIdx & 1 if sys.byteorder == 'little' else not byteIdx & 1
+    return (byteIdx >> 1, (8 if highByte else 0) + (idx & 7))
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class StateHistory(object):
+    """ Ring buffer of the per tick map state records. Record layout (each line in
+        the map manager's track order):
+            [sensors bitset bytes of all lines (as int16 words)][signals state of all lines]
+            [RTU_FIELDS of each train slot of all lines (the trains RTU data)]
+        The trains running on a dispatch route are recorded as 0, the train power
+        state is the voltage > 0 (the RTU data is 0 if the train is powered off).
+    """
+    def __init__(self, mapMgr, capacity=DEF_CAPACITY):
+        self.mapMgr = mapMgr
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.layout = None
+        self.recLen = 0
+        self.reset()
+
+    def _buildLayout(self):
+        """ Build the record layout from the current map components, the layout is
+            an OrderedDict: lineKey -> {'sensors': (offset, num, words), 'signals': 
+            (offset, num), 'trains': (offset, [trainID, ...])}.
+        """
+        layout = OrderedDict()
+        offset = 0
+        for key, sensorAgent in self.mapMgr.getSensors().items():
+            words = len(sensorAgent.getSensorsView())//array(REC_TYPE).itemsize
+            layout[key] = {'sensors': (offset, sensorAgent.getSensorCount(), words)}
+            offset += words
+        for key, val in self.mapMgr.getSignals().items():
+            layout.setdefault(key, {})['signals'] = (offset, len(val))
+            offset += len(val)
+        for key, val in self.mapMgr.getTrainSlots().items():
+            layout.setdefault(key, {})['trains'] = (offset, [train.getID() for train in val])
+            offset += len(val)*len(RTU_FIELDS)
+        return layout, offset
+
+#-----------------------------------------------------------------------------
+    def reset(self):
+        """ Rebuild the record layout and clear the buffer (call after the map
+            components are changed).
+        """
+        with self.lock:
+            self.layout, self.recLen = self._buildLayout()
+            self.data = array(REC_TYPE, bytes(self.capacity*self.recLen*array(REC_TYPE).itemsize))
+            self.times = array('d', bytes(self.capacity*8))
+            self.count = 0  # total number of records added.
+
+    def record(self, now=None):
+        """ Add the current map state as one record.
+            Returns:
+                tuple: (recordTime, record array) or None if the record is not added.
+        """
+        rec = array(REC_TYPE)
+        for sensorAgent in self.mapMgr.getSensors().values():
+            rec.frombytes(sensorAgent.getSensorsView())
+        for signals in self.mapMgr.getSignals().values():
+            rec.extend([1 if signal.getState() else 0 for signal in signals])
+        trainsOffset = len(rec)
+        rec.extend(self.mapMgr.getTrainsRtu().getData())
+        if len(rec) != self.recLen: return None # map changed and history not reset yet.
+        fieldNum = len(RTU_FIELDS)
+        for info in self.mapMgr.getRouteTrains():
+            idx = trainsOffset
+            for trains in self.mapMgr.getTrainSlots().values():
+                if info['train'] in trains:
+                    idx += trains.index(info['train'])*fieldNum
+                    rec[idx:idx+fieldNum] = array(REC_TYPE, [0]*fieldNum)
+                    break
+                idx += len(trains)*fieldNum
+        if now is None: now = time.time()
+        with self.lock:
+            idx = self.count % self.capacity
+            self.data[idx*self.recLen:(idx+1)*self.recLen] = rec
+            self.times[idx] = now
+            self.count += 1
+        return (now, rec)
+
+#-----------------------------------------------------------------------------
+    def _getWindow(self, startT):
+        """ Return the records (time array, data array) in time order after startT."""
+        with self.lock:
+            num = min(self.count, self.capacity)
+            head = self.count % self.capacity if self.count > self.capacity else 0
+            times = self.times[head:num] + self.times[:head]
+            data = self.data[head*self.recLen:num*self.recLen] + self.data[:head*self.recLen]
+        # the records are time ordered, skip the records before startT.
+        lo, hi = 0, len(times)
+        while lo < hi:
+            mid = (lo+hi)//2
+            if times[mid] < startT: lo = mid+1
+            else: hi = mid
+        return times[lo:], data[lo*self.recLen:]
+
+    def getColumnNames(self):
+        """ Return the name of each record element, format: <line>.sensor.<idx>, 
+            <line>.sensorWord.<idx> (16 sensors packed bits), <line>.signal.<idx>
+            or <line>.<trainID>.<field>.
+        """
+        names = [None]*self.recLen
+        for key, info in self.layout.items():
+            if 'sensors' in info:
+                offset, _, words = info['sensors']
+                for i in range(words): names[offset+i] = '%s.sensorWord.%d' % (key, i)
+            if 'signals' in info:
+                offset, count = info['signals']
+                for i in range(count): names[offset+i] = '%s.signal.%d' % (key, i)
+            if 'trains' in info:
+                offset, trainIDs = info['trains']
+                for i, trainID in enumerate(trainIDs):
+                    for j, field in enumerate(RTU_FIELDS):
+                        names[offset + i*len(RTU_FIELDS) + j] = '%s.%s.%s' % (key, trainID, field)
+        return names
+
+    def getRecordCount(self):
+        return min(self.count, self.capacity)
+
+    def getHistory(self, seconds=None, points=DEF_POINTS, lines=None):
+        """ Return the downsampled history of the last <seconds> (all if None) as
+            <points> buckets, each bucket value is the mean of the records in it
+            (so sensor/signal values are the occupancy/on ratio).
+        """
+        now = time.time()
+        times, data = self._getWindow(now - seconds if seconds else 0)
+        num = len(times)
+        points = max(1, min(points, num))
+        bounds = [num*i//points for i in range(points+1)]
+        recLen = self.recLen
+
+        def series(col, func=None):
+            column = data[col::recLen] # strided copy of one field.
+            if func: column = [func(val) for val in column]
+            return [round(sum(column[bounds[i]:bounds[i+1]])/(bounds[i+1]-bounds[i]), 3)
+                    for i in range(points)] if num else []
+
+        result = {
+            'records': num,
+            'time': [round(times[bounds[i]], 3) for i in range(points)] if num else [],
+            'lines': {}
+        }
+        for key, info in self.layout.items():
+            if lines and key not in lines: continue
+            lineInfo = result['lines'][key] = {}
+            if 'sensors' in info:
+                offset, count, _ = info['sensors']
+                lineInfo['sensors'] = []
+                for i in range(count):
+                    word, shift = _getSensorBit(i)
+                    lineInfo['sensors'].append(series(offset+word, lambda val: (val >> shift) & 1))
+            if 'signals' in info:
+                offset, count = info['signals']
+                lineInfo['signals'] = [series(offset+i) for i in range(count)]
+            if 'trains' in info:
+                offset, trainIDs = info['trains']
+                lineInfo['trains'] = OrderedDict()
+                for i, trainID in enumerate(trainIDs):
+                    cols = {field: offset + i*len(RTU_FIELDS) + j for j, field in enumerate(RTU_FIELDS)}
+                    lineInfo['trains'][trainID] = {field: series(cols['voltage'], lambda val: 1 if val > 0 else 0)
+                                                   if field == 'power' else series(cols[field])
+                                                   for field in TRAIN_FIELDS}
+        return result
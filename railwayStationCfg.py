@@ -0,0 +1,155 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayStationCfg.py
+#
+# Purpose:     This module provides the station configuration file cache and the
+#              file watcher used by the MapMgr:
+#                - StationCfgCache: parse and validate each station json file only
+#                  once, the parsed result is cached by file path and (mtime, size),
+#                  so the map manager rebuild (such as resetTrainsPos()) or multiple
+#                  map managers in one process do not read the file again.
+#                - StationCfgWatcher: thread to poll the lines' station files and
+#                  collect the changed lines, the MapMgr applies the changes in
+#                  its simulation step (without rebuilding the other agents).
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import json
+import threading
+
+import railwayPWSimuGlobal as gv
+
+DEF_WATCH_INTERVAL = 1.0    # station file check interval (sec).
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _checkPoint(val, name, stationID):
+    if not (isinstance(val, (list, tuple)) and len(val) == 2 and
+            all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in val)):
+        raise ValueError("station %s: '%s' must be [x, y], got %s" % (stationID, name, str(val)))
+    return tuple(val)
+
+def validateStationCfg(cfg):
+    """ Validate the station list loaded from the json file.
+        Args:
+            cfg (list): [{'id': , 'pos': , 'layout': , 'signalLayout': , 'labelPos': }, ...]
+        Returns:
+            list: station info dicts with the default layout/signalLayout filled
+                and the points converted to tuple.
+        Raises:
+            ValueError: if the config does not match the schema.
+    """
+    layouts = (gv.LAY_U, gv.LAY_D, gv.LAY_L, gv.LAY_R, gv.LAY_H, gv.LAY_V)
+    if not isinstance(cfg, list): raise ValueError("station config must be a list")
+    stationList, idSet = [], set()
+    for info in cfg:
+        if not isinstance(info, dict): raise ValueError("station config item must be a dict: %s" % str(info))
+        stationID = info.get('id')
+        if not isinstance(stationID, str) or not stationID:
+            raise ValueError("station 'id' must be a non empty string: %s" % str(info))
+        if stationID in idSet: raise ValueError("duplicate station id: %s" % stationID)
+        idSet.add(stationID)
+        station = {'id': stationID, 'pos': _checkPoint(info.get('pos'), 'pos', stationID),
+                   'layout': info.get('layout', gv.LAY_H),
+                   'signalLayout': info.get('signalLayout', gv.LAY_L)}
+        for key in ('layout', 'signalLayout'):
+            if station[key] not in layouts:
+                raise ValueError("station %s: invalid '%s' %s" % (stationID, key, str(station[key])))
+        if 'labelPos' in info: station['labelPos'] = _checkPoint(info['labelPos'], 'labelPos', stationID)
+        stationList.append(station)
+    return stationList
+
+#-----------------------------------------------------------------------------
+def getFileStamp(filePath):
+    """ Return the (mtime, size) of the file, None if the file is not exist."""
+    try:
+        stat = os.stat(filePath)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class StationCfgCache(object):
+    """ Parsed and validated station config cache keyed by file path and stamp."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cache = {}     # file path -> ((mtime, size), station list)
+
+    def load(self, filePath):
+        """ Return the validated station list of the file (parsed only if the file
+            changed since the last load).
+            Raises:
+                OSError: file not exist or can not be read.
+                ValueError: json or schema error.
+        """
+        stamp = getFileStamp(filePath)
+        if stamp is None: raise OSError("station config file not exist: %s" % filePath)
+        with self.lock:
+            cached = self.cache.get(filePath)
+            if cached and cached[0] == stamp: return cached[1]
+        with open(filePath) as fh:
+            stationList = validateStationCfg(json.load(fh))
+        with self.lock:
+            self.cache[filePath] = (stamp, stationList)
+        return stationList
+
+    def clear(self):
+        with self.lock:
+            self.cache = {}
+
+gStationCfgCache = StationCfgCache()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class StationCfgWatcher(threading.Thread):
+    """ Thread to poll the station config files and collect the changed lines."""
+    def __init__(self, fileDict, interval=DEF_WATCH_INTERVAL):
+        """ Init the watcher.
+            Args:
+                fileDict (dict): line key -> station config file path.
+                interval (float, optional): file check interval (sec).
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.fileDict = dict(fileDict)
+        self.interval = interval
+        self.stamps = {key: getFileStamp(path) for key, path in self.fileDict.items()}
+        self.changed = set()
+        self.lock = threading.Lock()
+        self.stopEvent = threading.Event()
+
+    def run(self):
+        """ Thread run() function will be called by start(). """
+        while not self.stopEvent.wait(self.interval):
+            self.checkFiles()
+
+    def checkFiles(self):
+        """ Check all the files once, return the changed line keys."""
+        changed = []
+        for key, path in self.fileDict.items():
+            stamp = getFileStamp(path)
+            if stamp != self.stamps[key]:
+                self.stamps[key] = stamp
+                if stamp: changed.append(key)
+        if changed:
+            with self.lock:
+                self.changed.update(changed)
+        return changed
+
+    def popChanged(self):
+        """ Return and clear the changed line keys."""
+        if not self.changed: return ()
+        with self.lock:
+            changed, self.changed = self.changed, set()
+        return sorted(changed)
+
+    def stop(self):
+        self.stopEvent.set()
@@ -0,0 +1,274 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwaySweepRunner.py
+#
+# Purpose:     This module is used to run a parameter grid of simulation scenarios
+#              headless in a process pool for the capacity and headway analysis.
+#              Each scenario sets the train count and length of the lines, the
+#              station dock time and the collision/junction avoidance flags, then
+#              runs the map manager for a number of ticks and collects: station
+#              throughput (trains per hour per station), mean and p95 headway, mean
+#              dwell time, time waiting at signals, collision and emergency stop
+#              counts. All the results are saved in one CSV table,
+#              each scenario result is cached (by the scenario hash) so a rerun only
+#              simulates the new scenarios. Each scenario runs with the global
+#              default settings restored and the random generators seeded from the
+#              scenario hash, so a result does not depend on the pool worker (or the
+#              scenarios run before it in the same worker process).
+#
+#              Usage: python railwaySweepRunner.py -g grid.json -t 36000 -o sweep.csv
+#              grid.json example (every key is a list of values to sweep):
+#                {"trains": [{"weline": 2, "ccline": 2}, {"weline": 4}],
+#                 "dockTime": [3, 5], "collAvoid": [true], "trainLen": [4, 5]}
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import csv
+import json
+import hashlib
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import railwayPWSimuGlobal as gv
+
+SWEEP_VERSION = 2       # change to invalidate the cached results.
+DEF_TICK_TIME = 0.1     # simulation time (sec) of one MapMgr.periodic() call.
+DEF_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sweepCache')
+CARRIAGE_DIST = 10      # AgentTrain._buildTrainPos() carriage distance.
+PLACE_STEP = 10         # train head placing search step (pixel).
+
+# scenario parameter -> default value (None: keep the map manager's default).
+PARAM_DEFAULTS = {
+    'trains': None,         # dict {trackID: train count}
+    'trainLen': None,
+    'dockTime': None,
+    'collAvoid': None,
+    'juncAvoid': None,
+}
+# scenario parameter -> global setting in railwayPWSimuGlobal.
+GV_PARAMS = {
+    'dockTime': 'gDockTime',
+    'collAvoid': 'gCollAvoid',
+    'juncAvoid': 'gJuncAvoid',
+}
+METRIC_FIELDS = ('throughput', 'headwayMean', 'headwayP95', 'dwellMean', 'signalWait',
+                 'collisions', 'emgStops', 'stuckTrains')
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _percentile(vals, pct):
+    if not vals: return None
+    vals = sorted(vals)
+    return round(vals[min(len(vals)-1, int(round(pct/100.0*(len(vals)-1))))], 3)
+
+def _mean(vals):
+    return round(sum(vals)/len(vals), 3) if vals else None
+
+def getScenarioKey(scenario, ticks, tickTime):
+    """ Return the hash of one scenario run used as the result cache key."""
+    data = json.dumps({'scenario': scenario, 'ticks': ticks, 'tickTime': tickTime,
+                       'version': SWEEP_VERSION}, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def getScenarios(grid):
+    """ Expand the parameter grid {param: [values]} to the scenario dict list."""
+    for key in grid.keys():
+        if key not in PARAM_DEFAULTS: raise ValueError("Unknown sweep parameter: %s" % key)
+    keys = sorted(grid.keys())
+    scenarios = []
+    for vals in itertools.product(*[grid[key] for key in keys]):
+        scenario = dict(PARAM_DEFAULTS)
+        scenario.update(zip(keys, vals))
+        scenarios.append(scenario)
+    return scenarios
+
+#-----------------------------------------------------------------------------
+def getTrainsCfg(trackID, trackPts, count, trainLen):
+    """ Build the config of <count> trains evenly placed on the track. A train head
+        is placed on an axis aligned track segment (the carriages are built straight
+        behind the head) which is also found by AgentTrain._getDestList().
+        Returns:
+            list: train config [{'id': , 'head': , 'len': }, ...]
+    """
+    segs = []   # (arc start, segment idx, length)
+    total = 0
+    for idx in range(len(trackPts)-1):
+        (x1, y1), (x2, y2) = trackPts[idx], trackPts[idx+1]
+        length = abs(x2-x1) + abs(y2-y1)
+        if (x1 == x2 or y1 == y2) and length:
+            # AgentTrain._getDestList() returns the 1st segment on the same axis line.
+            for j in range(idx):
+                (a1, b1), (a2, b2) = trackPts[j], trackPts[j+1]
+                if (x1 == a1 == a2 and x1 == x2) or (y1 == b1 == b2 and y1 == y2): break
+            else:
+                segs.append((total, idx, length))
+        total += abs(x2-x1) + abs(y2-y1)
+    trainsCfg = []
+    minOffset = CARRIAGE_DIST*(trainLen-1)
+    for i in range(count):
+        target = total*i/count
+        for arcStart, idx, length in sorted(segs, key=lambda seg: (seg[0] + seg[2] < target, seg[0])):
+            offset = max(minOffset, target - arcStart)
+            if offset >= length: continue
+            offset -= offset % PLACE_STEP
+            (x1, y1), (x2, y2) = trackPts[idx], trackPts[idx+1]
+            dx, dy = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+            head = (x1 + dx*int(offset), y1 + dy*int(offset))
+            if head not in [cfg['head'] for cfg in trainsCfg]: break
+        else:
+            gv.gDebugPrint("getTrainsCfg(): no place for train %s on %s" % (str(i), trackID),
+                           logType=gv.LOG_WARN)
+            continue
+        trainsCfg.append({'id': '%s%02d' % (trackID[:2], i+1), 'head': head, 'len': trainLen})
+    return trainsCfg
+
+#-----------------------------------------------------------------------------
+def runScenario(scenario, ticks, tickTime=DEF_TICK_TIME):
+    """ Run one scenario and return its metrics dict. This function runs in the
+        sweep runner's process pool workers (a worker runs many scenarios), the
+        global settings are restored after the run.
+    """
+    savedVals = {name: getattr(gv, name) for name in GV_PARAMS.values()}
+    try:
+        for param, name in GV_PARAMS.items():
+            if scenario[param] is not None: setattr(gv, name, scenario[param])
+        # the station random dock time (gDockTime is None) and the trains RTU data
+        # use the seed of the scenario.
+        seed = int(getScenarioKey(scenario, ticks, tickTime)[:16], 16)
+        random.seed(seed)
+        return _runScenario(scenario, ticks, tickTime, seed)
+    finally:
+        for name, val in savedVals.items(): setattr(gv, name, val)
+
+def _runScenario(scenario, ticks, tickTime, seed):
+    import railwayMapMgr
+    mapMgr = gv.iMapMgr = railwayMapMgr.MapMgr(None)
+    mapMgr.setRtuSeed(seed)
+    counts, trainLen = scenario['trains'] or {}, scenario['trainLen']
+    if counts or trainLen is not None:
+        trainDict = {}
+        for key, trains in mapMgr.getTrains().items():
+            count = counts.get(key, len(trains))
+            length = trainLen if trainLen is not None else \
+                (trains[0].getTrainLength() if trains else 5)
+            trainDict[key] = getTrainsCfg(key, mapMgr.getTracks(trackID=key)['points'], count, length)
+        mapMgr.resetTrainsPos(trainDict)
+    # observe the stations and trains state every tick.
+    stations = [station for val in mapMgr.getStations().values() for station in val]
+    trains = [train for val in mapMgr.getTrains().values() for train in val]
+    arrivals = [[] for _ in stations]
+    dwells, headways = [], []
+    dockStart = [None]*len(stations)
+    collFlags = [False]*len(trains)
+    emgFlags = [False]*len(trains)
+    lastPos = [None]*len(trains)
+    idleTicks = [0]*len(trains)
+    signalWait = collisions = emgStops = 0
+    for tick in range(ticks):
+        mapMgr.periodic(tick*tickTime)
+        for i, station in enumerate(stations):
+            docked = station.getDockState()
+            if docked and dockStart[i] is None:
+                dockStart[i] = tick
+                if arrivals[i]: headways.append((tick - arrivals[i][-1])*tickTime)
+                arrivals[i].append(tick)
+            elif not docked and dockStart[i] is not None:
+                dwells.append((tick - dockStart[i])*tickTime)
+                dockStart[i] = None
+        for i, train in enumerate(trains):
+            emgStop, collision = train.getEmgStop(), train.getCollsionFlg()
+            if collision and not collFlags[i]: collisions += 1
+            if emgStop and not emgFlags[i]: emgStops += 1
+            collFlags[i], emgFlags[i] = collision, emgStop
+            # stopped outside station, not by the front train: waiting at the signal.
+            if train.getTrainSpeed() == 0 and train.getDockCount() == 0 and not emgStop \
+                    and not train.getWaitingState() and not train.getFrontSensorFlg():
+                signalWait += 1
+            head = train.getTrainPos(idx=0)
+            idleTicks[i] = idleTicks[i] + 1 if head == lastPos[i] else 0
+            lastPos[i] = head
+    hours = ticks*tickTime/3600.0
+    stuckTicks = min(ticks, int(60/tickTime))   # no move in the last 60 sec.
+    return {
+        'throughput': _mean([len(val)/hours for val in arrivals]),
+        'headwayMean': _mean(headways),
+        'headwayP95': _percentile(headways, 95),
+        'dwellMean': _mean(dwells),
+        'signalWait': round(signalWait*tickTime/len(trains), 3) if trains else None,
+        'collisions': collisions,
+        'emgStops': emgStops,
+        'stuckTrains': len([idle for idle in idleTicks if idle >= stuckTicks]),
+    }
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class SweepRunner(object):
+    """ Run the scenarios of a parameter grid in a process pool with the result cache."""
+    def __init__(self, cacheDir=DEF_CACHE_DIR, workers=None, tickTime=DEF_TICK_TIME):
+        self.cacheDir = cacheDir
+        self.workers = workers or os.cpu_count() or 1
+        self.tickTime = tickTime
+        if not os.path.exists(self.cacheDir): os.makedirs(self.cacheDir)
+
+    def _getCachePath(self, key):
+        return os.path.join(self.cacheDir, key + '.json')
+
+    def run(self, grid, ticks):
+        """ Run all the scenarios of the grid (cached results are reused).
+            Returns:
+                list: [(scenario dict, metrics dict), ...] in the grid order.
+        """
+        scenarios = getScenarios(grid)
+        results = [None]*len(scenarios)
+        pending = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for i, scenario in enumerate(scenarios):
+                cachePath = self._getCachePath(getScenarioKey(scenario, ticks, self.tickTime))
+                if os.path.exists(cachePath):
+                    with open(cachePath) as fh:
+                        results[i] = json.load(fh)
+                else:
+                    pending[i] = (cachePath, executor.submit(runScenario, scenario, ticks, self.tickTime))
+            for i, (cachePath, future) in pending.items():
+                results[i] = future.result()
+                with open(cachePath, 'w') as fh:
+                    json.dump(results[i], fh)
+        gv.gDebugPrint("Sweep finished: %s scenarios, %s simulated" % (str(len(scenarios)), str(len(pending))),
+                       logType=gv.LOG_INFO)
+        return list(zip(scenarios, results))
+
+    def saveTable(self, results, filePath):
+        """ Save the sweep results as one CSV table."""
+        with open(filePath, 'w', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(list(PARAM_DEFAULTS.keys()) + list(METRIC_FIELDS))
+            for scenario, metrics in results:
+                row = [json.dumps(scenario[key], sort_keys=True) if isinstance(scenario[key], dict)
+                       else scenario[key] for key in PARAM_DEFAULTS.keys()]
+                writer.writerow(row + [metrics[field] for field in METRIC_FIELDS])
+
+#-----------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description='Run a parameter grid of railway simulation scenarios.')
+    parser.add_argument('-g', '--grid', required=True, help='parameter grid json file.')
+    parser.add_argument('-t', '--ticks', type=int, default=36000, help='number of simulation ticks per scenario.')
+    parser.add_argument('-o', '--out', default='sweep.csv', help='output CSV table.')
+    parser.add_argument('-c', '--cache', default=DEF_CACHE_DIR, help='scenario result cache folder.')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='number of simulation processes.')
+    args = parser.parse_args()
+    with open(args.grid) as fh:
+        grid = json.load(fh)
+    runner = SweepRunner(cacheDir=args.cache, workers=args.workers)
+    runner.saveTable(runner.run(grid, args.ticks), args.out)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayTelemetry.py
+#
+# Purpose:     This module records the DataManager's UDP request telemetry (per
+#              client and per request type counters, error counts and latency
+#              histograms) and exports them in the Prometheus text exposition
+#              format through a loopback HTTP listener (http://127.0.0.1:<port>/metrics).
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEF_HOST = '127.0.0.1'  # only listen on loopback, the metrics are not for the PLCs.
+DEF_PORT = 9108
+METRIC_PREFIX = 'railway_datamgr'
+# Latency histogram bucket upper bounds (unit: second).
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+UNKNOWN_CLIENT = 'unknown'
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _escapeLabel(val):
+    return str(val).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _formatLabels(names, vals):
+    return '{%s}' % ','.join(['%s="%s"' % (n, _escapeLabel(v)) for n, v in zip(names, vals)])
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class RequestTelemetry(object):
+    """ Thread safe request counters and latency histograms."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}  # (client, reqKey, reqType, status) -> count
+        self.latency = {}   # (reqKey, reqType) -> [bucket counts..., +Inf count, sum]
+        self.bytesIn = {}   # client -> bytes
+        self.bytesOut = {}  # client -> bytes
+
+    def addRequest(self, client, reqKey, reqType, status, latency, sizeIn=0, sizeOut=0):
+        """ Record one handled request.
+            Args:
+                client (str): client IP address (UNKNOWN_CLIENT if not available).
+                reqKey (str): GET/POST.
+                reqType (str): request data type.
+                status (str): ok / error (fetch/set function failed) / denied.
+                latency (float): processing time (unit: second).
+        """
+        client = client or UNKNOWN_CLIENT
+        with self.lock:
+            key = (client, reqKey, reqType, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            hist = self.latency.get((reqKey, reqType))
+            if hist is None:
+                hist = self.latency[(reqKey, reqType)] = [0]*(len(LATENCY_BUCKETS)+2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += latency
+            self.bytesIn[client] = self.bytesIn.get(client, 0) + sizeIn
+            self.bytesOut[client] = self.bytesOut.get(client, 0) + sizeOut
+
+    def reset(self):
+        with self.lock:
+            self.requests.clear()
+            self.latency.clear()
+            self.bytesIn.clear()
+            self.bytesOut.clear()
+
+#-----------------------------------------------------------------------------
+    def getExposition(self):
+        """ Return all the metrics in the Prometheus text exposition format (v0.0.4)."""
+        with self.lock:
+            requests = sorted(self.requests.items())
+            latency = sorted((key, list(val)) for key, val in self.latency.items())
+            bytesIn = sorted(self.bytesIn.items())
+            bytesOut = sorted(self.bytesOut.items())
+        lines = []
+        name = METRIC_PREFIX + '_requests_total'
+        lines.append('# HELP %s Handled requests by client, request key/type and status.' % name)
+        lines.append('# TYPE %s counter' % name)
+        for key, val in requests:
+            lines.append('%s%s %d' % (name, _formatLabels(('client', 'key', 'type', 'status'), key), val))
+        name = METRIC_PREFIX + '_request_latency_seconds'
+        lines.append('# HELP %s Request processing time.' % name)
+        lines.append('# TYPE %s histogram' % name)
+        for (reqKey, reqType), hist in latency:
+            count = 0
+            for bound, num in zip(LATENCY_BUCKETS + ('+Inf',), hist[:-1]):
+                count += num
+                labels = _formatLabels(('key', 'type', 'le'), (reqKey, reqType, bound))
+                lines.append('%s_bucket%s %d' % (name, labels, count))
+            labels = _formatLabels(('key', 'type'), (reqKey, reqType))
+            lines.append('%s_sum%s %.9f' % (name, labels, hist[-1]))
+            lines.append('%s_count%s %d' % (name, labels, count))
+        for suffix, data, desc in (('received', bytesIn, 'Request bytes received'),
+                                   ('sent', bytesOut, 'Reply bytes sent')):
+            name = '%s_bytes_%s_total' % (METRIC_PREFIX, suffix)
+            lines.append('# HELP %s %s by client.' % (name, desc))
+            lines.append('# TYPE %s counter' % name)
+            for client, val in data:
+                lines.append('%s%s %d' % (name, _formatLabels(('client',), (client,)), val))
+        return '\n'.join(lines) + '\n'
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """ HTTP handler to reply the GET /metrics scrape request."""
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.telemetry.getExposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass    # do not print every scrape request.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class TelemetryServer(threading.Thread):
+    """ Loopback HTTP listener thread to export the telemetry metrics."""
+    def __init__(self, telemetry, port=DEF_PORT, host=DEF_HOST):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.telemetry = telemetry
+
+    def getPort(self):
+        return self.httpd.server_address[1]
+
+    def run(self):
+        """ Thread run() function will be called by start(). """
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """ Stop the thread."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,228 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayTelemetryStore.py
+#
+# Purpose:     This module provides an append-only on disk telemetry store for the
+#              long (soak test) runs. Every tick's state record (same layout as the
+#              railwayStateHistory record) is written in a memory-mapped segment
+#              file, the segment is rotated every day (UTC) or when the record
+#              layout changed. Files of one segment <name>:
+#                <name>.dat  : fixed size records, rows x recLen int16.
+#                <name>.idx  : tick index, rows x (int64 tick, float64 time).
+#                <name>.json : header with the record columns and row count.
+#              and index.json in the store folder lists all the segments with their
+#              tick/time range. The header and index are flushed every FLUSH_ROWS
+#              rows or FLUSH_INTERVAL seconds, so a reader (or a crashed run) sees
+#              at most that many rows less than written. The analysis tool can map a segment without loading
+#              it, such as:
+#                data = np.memmap('<name>.dat', dtype=hdr['dtype'], mode='r').reshape(-1, hdr['recLen'])
+#                idx = np.memmap('<name>.idx', dtype=[('tick', '<i8'), ('time', '<f8')], mode='r')
+#              (only the first hdr['rows'] rows are valid, rows with tick 0 are not
+#              written yet).
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import calendar
+
+GROW_ROWS = 65536       # segment file growing step (rows).
+IDX_FMT = '<qd'         # tick index row: int64 tick, float64 time.
+IDX_SIZE = struct.calcsize(IDX_FMT)
+INDEX_FILE = 'index.json'
+FLUSH_ROWS = 6000       # flush the header/index every N rows (10 min if tick is 0.1 sec).
+FLUSH_INTERVAL = 60     # or every N seconds (wall clock).
+REC_DTYPE = ('<' if sys.byteorder == 'little' else '>') + 'i2'
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _writeJson(filePath, data):
+    """ Write the json file atomically (reader never sees a half written file)."""
+    tmpPath = filePath + '.tmp'
+    with open(tmpPath, 'w') as fh:
+        json.dump(data, fh, indent=1)
+    os.replace(tmpPath, filePath)
+
+def _getDayEnd(now):
+    """ Return the UTC midnight timestamp after <now>."""
+    tm = time.gmtime(now)
+    return calendar.timegm((tm.tm_year, tm.tm_mon, tm.tm_mday, 0, 0, 0)) + 86400
+
+#-----------------------------------------------------------------------------
+def loadIndex(storeDir):
+    """ Return the segment header list saved in the store's index.json."""
+    indexPath = os.path.join(storeDir, INDEX_FILE)
+    if not os.path.exists(indexPath): return []
+    with open(indexPath) as fh:
+        return json.load(fh)
+
+def readSegment(storeDir, name):
+    """ Map one segment read-only without loading it (no numpy needed).
+        Returns:
+            tuple: (header dict, index memoryview (rows x 2 as bytes, unpack with
+                IDX_FMT), data memoryview cast to int16 with rows*recLen elements).
+    """
+    with open(os.path.join(storeDir, name + '.json')) as fh:
+        header = json.load(fh)
+    rows, recLen = header['rows'], header['recLen']
+    maps = []
+    for ext in ('.idx', '.dat'):
+        with open(os.path.join(storeDir, name + ext), 'rb') as fh:
+            maps.append(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+    idxView = memoryview(maps[0])[:rows*IDX_SIZE]
+    dataView = memoryview(maps[1])[:rows*recLen*2].cast('h')
+    return header, idxView, dataView
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class _Segment(object):
+    """ One memory-mapped segment (data + tick index files) open for append."""
+    def __init__(self, storeDir, name, recLen, columns, startT):
+        self.storeDir = storeDir
+        self.name = name
+        self.recLen = recLen
+        self.recBytes = recLen*2
+        self.rows = 0
+        self.capRows = 0
+        self.header = {
+            'name': name,
+            'dtype': REC_DTYPE,
+            'recLen': recLen,
+            'columns': columns,
+            'idxFormat': IDX_FMT,
+            'rows': 0,
+            'firstTick': None, 'lastTick': None,
+            'firstTime': startT, 'lastTime': startT,
+            'closed': False
+        }
+        self.dataFh = open(self._getPath('.dat'), 'w+b')
+        self.idxFh = open(self._getPath('.idx'), 'w+b')
+        self.dataMm = self.idxMm = None
+        self._grow()
+
+    def _getPath(self, ext):
+        return os.path.join(self.storeDir, self.name + ext)
+
+    def _grow(self):
+        """ Extend the files by GROW_ROWS rows and remap them."""
+        if self.dataMm: self.dataMm.close()
+        if self.idxMm: self.idxMm.close()
+        self.capRows += GROW_ROWS
+        self.dataFh.truncate(self.capRows*self.recBytes)
+        self.idxFh.truncate(self.capRows*IDX_SIZE)
+        self.dataMm = mmap.mmap(self.dataFh.fileno(), 0)
+        self.idxMm = mmap.mmap(self.idxFh.fileno(), 0)
+        if self.rows: self.saveHeader()
+
+    def append(self, tick, now, rec):
+        if self.rows == self.capRows: self._grow()
+        offset = self.rows*self.recBytes
+        self.dataMm[offset:offset+self.recBytes] = memoryview(rec).cast('B')
+        struct.pack_into(IDX_FMT, self.idxMm, self.rows*IDX_SIZE, tick, now)
+        if self.header['firstTick'] is None:
+            self.header['firstTick'], self.header['firstTime'] = tick, now
+        self.header['lastTick'], self.header['lastTime'] = tick, now
+        self.rows += 1
+
+    def flush(self):
+        """ Flush the mapped rows to the files and save the header."""
+        self.dataMm.flush()
+        self.idxMm.flush()
+        self.saveHeader()
+
+    def saveHeader(self):
+        self.header['rows'] = self.rows
+        _writeJson(self._getPath('.json'), self.header)
+
+    def close(self):
+        """ Flush, cut the files to the written rows and close the segment."""
+        self.dataMm.flush()
+        self.idxMm.flush()
+        self.dataMm.close()
+        self.idxMm.close()
+        self.dataFh.truncate(self.rows*self.recBytes)
+        self.idxFh.truncate(self.rows*IDX_SIZE)
+        self.dataFh.close()
+        self.idxFh.close()
+        self.header['closed'] = True
+        self.saveHeader()
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class TelemetryStore(object):
+    """ Append-only telemetry store with daily segment rotation."""
+    def __init__(self, storeDir, columnsFunc=None):
+        """ Init the store.
+            Args:
+                storeDir (str): folder to save the segment files.
+                columnsFunc (callable, optional): function returns the record column
+                    names for the segment header. Defaults to None.
+        """
+        self.storeDir = storeDir
+        if not os.path.exists(storeDir): os.makedirs(storeDir)
+        self.columnsFunc = columnsFunc
+        self.segments = loadIndex(storeDir)
+        # continue the tick number after the existing segments.
+        self.tick = max([seg['lastTick'] or 0 for seg in self.segments] + [0])
+        self.segment = None
+        self.segEndT = 0
+        self.flushRows = 0  # rows appended since the last flush.
+        self.flushT = time.time()
+
+    def _rotate(self, now, recLen):
+        """ Close the current segment and open a new one."""
+        self._closeSegment()
+        day = time.strftime('%Y%m%d', time.gmtime(now))
+        seq = len([seg for seg in self.segments if seg['name'].startswith(day)])
+        name = '%s_%03d' % (day, seq)
+        columns = self.columnsFunc() if self.columnsFunc else None
+        self.segment = _Segment(self.storeDir, name, recLen, columns, now)
+        self.segEndT = _getDayEnd(now)
+        self.segments.append(self.segment.header)
+        self.segment.saveHeader()
+        self._saveIndex()
+
+    def _closeSegment(self):
+        if self.segment:
+            self.segment.close()
+            self.segment = None
+
+    def _saveIndex(self):
+        _writeJson(os.path.join(self.storeDir, INDEX_FILE),
+                   [{key: val for key, val in seg.items() if key != 'columns'} for seg in self.segments])
+
+#-----------------------------------------------------------------------------
+    def append(self, now, rec):
+        """ Append one tick record (array of int16)."""
+        if self.segment is None or now >= self.segEndT or len(rec) != self.segment.recLen:
+            self._rotate(now, len(rec))
+        self.tick += 1
+        self.segment.append(self.tick, now, rec)
+        self.flushRows += 1
+        if self.flushRows >= FLUSH_ROWS or time.time() - self.flushT >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """ Flush the current segment (rows and header) and save the store index."""
+        if self.segment:
+            self.segment.flush()
+            self._saveIndex()
+        self.flushRows = 0
+        self.flushT = time.time()
+
+    def close(self):
+        self._closeSegment()
+        self._saveIndex()
+
+    def getTick(self):
+        return self.tick
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayTickProfiler.py
+#
+# Purpose:     This module provides a low overhead phase level profiler for the
+#              map manager's periodic() simulation tick. The time used by each
+#              phase (per railway line if needed) is measured by perf_counter_ns
+#              and saved in a rolling window, the histogram/percentiles are only
+#              calculated when the metrics are queried.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import time
+from array import array
+
+DEF_WINDOW = 1000   # number of the latest ticks kept for the rolling metrics.
+# Histogram bucket upper bounds (unit: microsecond), the last bucket is +Inf.
+HIST_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+TICK_KEY = 'tick'   # metrics key of the whole periodic() tick.
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class RollingSamples(object):
+    """ Fixed size ring buffer of int64 samples (unit: ns)."""
+    def __init__(self, size=DEF_WINDOW):
+        self.size = size
+        self.samples = array('q', bytes(8*size))
+        self.count = 0  # total number of the added samples.
+
+    def add(self, val):
+        self.samples[self.count % self.size] = val
+        self.count += 1
+
+    def getSamples(self):
+        """ Return the samples in the current window (not ordered)."""
+        return self.samples[:min(self.count, self.size)]
+
+    def getStats(self):
+        """ Return the window statistics (unit: microsecond) with the histogram
+            as a list of the bucket counts match HIST_BUCKETS_US (+ the +Inf bucket).
+        """
+        data = sorted(self.getSamples())
+        num = len(data)
+        if num == 0: return {'count': 0}
+        hist = [0]*(len(HIST_BUCKETS_US)+1)
+        bIdx = 0
+        for val in data:
+            while bIdx < len(HIST_BUCKETS_US) and val > HIST_BUCKETS_US[bIdx]*1000: bIdx += 1
+            hist[bIdx] += 1
+        pct = lambda p: round(data[min(num-1, int(num*p))]/1000, 2)
+        return {
+            'count': num,
+            'total': self.count,
+            'mean': round(sum(data)/num/1000, 2),
+            'p50': pct(0.5),
+            'p90': pct(0.9),
+            'p99': pct(0.99),
+            'max': round(data[-1]/1000, 2),
+            'hist': hist
+        }
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class TickProfiler(object):
+    """ Phase profiler of one simulation tick, usage in the tick loop:
+            prof.startTick()
+            ... phase A code ...
+            prof.lap('phaseA')          # time since last lap/startTick -> phaseA
+            ... phase B code on line ...
+            prof.lap('phaseB', 'weline') # -> phaseB/weline
+            prof.endTick()
+        The laps of the same phase in one tick are summed before saved in the
+        rolling window.
+    """
+    def __init__(self, window=DEF_WINDOW):
+        self.window = window
+        self.metrics = {}       # metrics key -> RollingSamples
+        self.tickSum = {}       # metrics key -> ns used in the current tick.
+        self.tickStartT = 0
+        self.lastT = 0
+
+    def _getKey(self, phase, line):
+        return phase if line is None else '/'.join((phase, line))
+
+#-----------------------------------------------------------------------------
+    def startTick(self):
+        self.tickSum.clear()
+        self.tickStartT = self.lastT = time.perf_counter_ns()
+
+    def lap(self, phase, line=None):
+        """ Add the time passed since the last lap() to the phase."""
+        now = time.perf_counter_ns()
+        key = self._getKey(phase, line)
+        self.tickSum[key] = self.tickSum.get(key, 0) + now - self.lastT
+        self.lastT = now
+
+    def endTick(self):
+        """ Save the phase time of the current tick to the rolling windows."""
+        self.tickSum[TICK_KEY] = time.perf_counter_ns() - self.tickStartT
+        for key, val in self.tickSum.items():
+            if key not in self.metrics: self.metrics[key] = RollingSamples(self.window)
+            self.metrics[key].add(val)
+
+    def reset(self):
+        self.metrics = {}
+        self.tickSum.clear()
+
+#-----------------------------------------------------------------------------
+    def getMetrics(self):
+        """ Return the rolling metrics of all phases as a json serializable dict."""
+        return {
+            'unit': 'us',
+            'window': self.window,
+            'buckets': list(HIST_BUCKETS_US) + ['+Inf'],
+            'phases': {key: val.getStats() for key, val in sorted(self.metrics.items())}
+        }
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayTrackGraph.py
+#
+# Purpose:     This module provides the track topology graph used to route the
+#              trains between the lines (such as sending a train to the maintenance
+#              line mtline and back). The graph nodes are (track ID, point) of the
+#              track points and the switch points, the directed edges follow the
+#              track running direction (increasing point index) and the switches
+#              connect a point of one track to a point of another track. The all
+#              pairs route tables (distance and first hop of every node pair) are
+#              computed once per blocked sections set and cached, so a dispatch or
+#              a reroute around a blocked section is a table lookup.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import math
+import heapq
+
+SWITCH_STRAIGHT = 0     # switch state: train stays on its track.
+SWITCH_DIVERGE = 1      # switch state: train goes to the switch's other track.
+MAX_TABLES = 16         # max number of cached route tables (blocked sections sets).
+
+# Define all the local untility functions here:
+#-----------------------------------------------------------------------------
+def _getDist(p1, p2):
+    return math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2)
+
+def _onSegment(pt, p1, p2):
+    """ Check whether the point is on the segment p1-p2 (excluding p1)."""
+    if pt == p1: return False
+    cross = (p2[0]-p1[0])*(pt[1]-p1[1]) - (p2[1]-p1[1])*(pt[0]-p1[0])
+    if cross != 0: return False
+    return min(p1[0], p2[0]) <= pt[0] <= max(p1[0], p2[0]) and \
+        min(p1[1], p2[1]) <= pt[1] <= max(p1[1], p2[1])
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class TrackGraph(object):
+    """ Track topology graph with switches and the cached all pairs route tables."""
+    def __init__(self):
+        self.tracks = {}    # track ID -> (points list, closed flag)
+        self.switches = {}  # switch ID -> {'from': node, 'to': node, 'state': }
+        self.nodes = []     # node list, node: (track ID, (x, y))
+        self.edges = {}     # node -> [(next node, length, owner), ...], owner: track/switch ID
+        self.segNodes = {}  # (track ID, segment idx) -> nodes on the segment in running order.
+        self.nodeSegs = {}  # node -> idx of the track segment the node is on.
+        self.tables = {}    # frozenset of blocked edges -> (dist dict, first hop dict)
+        self.routes = {}    # (src, dst, blocked) -> route nodes tuple.
+        self.entries = {}   # (src, track ID, blocked) -> nearest node of the track.
+
+    def _getSegNodes(self, key, idx):
+        """ Return the nodes on the track segment idx (the end point not included)."""
+        points, _ = self.tracks[key]
+        p1, p2 = points[idx], points[(idx+1) % len(points)]
+        extra = [sw[end][1] for sw in self.switches.values() for end in ('from', 'to')
+                 if sw[end][0] == key and sw[end][1] != p2 and _onSegment(sw[end][1], p1, p2)]
+        return [(key, pt) for pt in [p1] + sorted(set(extra), key=lambda pt: _getDist(p1, pt))]
+
+    def _getTables(self, blocked):
+        """ Return the (dist, firstHop) all pairs route tables without the blocked
+            edges, the tables are computed by Dijkstra from each node and cached.
+        """
+        tables = self.tables.get(blocked)
+        if tables: return tables
+        distTable, hopTable = {}, {}
+        for src in self.nodes:
+            dist, hops = {src: 0}, {src: None}
+            queue = [(0, 0, src)]
+            count = 1 # tie breaker, the nodes are not compared.
+            while queue:
+                d, _, node = heapq.heappop(queue)
+                if d > dist[node]: continue
+                for nextNode, length, _ in self.edges[node]:
+                    if (node, nextNode) in blocked: continue
+                    nd = d + length
+                    if nextNode not in dist or nd < dist[nextNode]:
+                        dist[nextNode] = nd
+                        hops[nextNode] = nextNode if node == src else hops[node]
+                        heapq.heappush(queue, (nd, count, nextNode))
+                        count += 1
+            distTable[src], hopTable[src] = dist, hops
+        if len(self.tables) >= MAX_TABLES:
+            self.tables.pop(next(iter(self.tables)))
+            self.routes, self.entries = {}, {}
+        self.tables[blocked] = tables = (distTable, hopTable)
+        return tables
+
+#-----------------------------------------------------------------------------
+    def addTrack(self, key, points, closed=True):
+        """ Add one track (call build() after all the tracks and switches are added)."""
+        self.tracks[key] = (list(points), closed)
+
+    def addSwitch(self, switchID, fromKey, fromPos, toKey, toPos):
+        """ Add one switch from a point on the track <fromKey> to a point on the
+            track <toKey>, the switch is straight by default.
+        """
+        for key, pos in ((fromKey, fromPos), (toKey, toPos)):
+            points, closed = self.tracks[key]
+            num = len(points) if closed else len(points) - 1
+            if not any(pos == points[i] or _onSegment(pos, points[i], points[(i+1) % len(points)])
+                       for i in range(num)):
+                raise ValueError("switch %s: point %s is not on track %s" % (switchID, str(pos), key))
+        self.switches[switchID] = {'from': (fromKey, tuple(fromPos)), 'to': (toKey, tuple(toPos)),
+                                   'state': SWITCH_STRAIGHT}
+
+    def build(self):
+        """ Build the graph nodes and edges and the route table without blocked section."""
+        self.nodes, self.edges, self.segNodes, self.nodeSegs = [], {}, {}, {}
+        for key, (points, closed) in self.tracks.items():
+            num = len(points) if closed else len(points) - 1
+            trackNodes = []
+            for idx in range(num):
+                self.segNodes[(key, idx)] = segNodes = self._getSegNodes(key, idx)
+                for node in segNodes: self.nodeSegs[node] = idx
+                trackNodes.extend(segNodes)
+            if not closed and points:
+                trackNodes.append((key, tuple(points[-1])))
+                self.nodeSegs[trackNodes[-1]] = len(points) - 1
+            for node in trackNodes:
+                if node not in self.edges:
+                    self.nodes.append(node)
+                    self.edges[node] = []
+            for i in range(len(trackNodes) - (0 if closed else 1)):
+                node, nextNode = trackNodes[i], trackNodes[(i+1) % len(trackNodes)]
+                self.edges[node].append((nextNode, _getDist(node[1], nextNode[1]), key))
+        for switchID, sw in self.switches.items():
+            self.edges[sw['from']].append((sw['to'], _getDist(sw['from'][1], sw['to'][1]), switchID))
+        self.tables, self.routes, self.entries = {}, {}, {}
+        self._getTables(frozenset())
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getDistance(self, src, dst, blocked=frozenset()):
+        """ Return the route length from node src to node dst, None if no route."""
+        return self._getTables(blocked)[0][src].get(dst)
+
+    def getEdge(self, key, pos):
+        """ Return the directed edge (node, next node) of the track <key> which
+            contains the position, None if the position is not on the track.
+        """
+        for node in self.nodes:
+            if node[0] != key: continue
+            for nextNode, _, owner in self.edges[node]:
+                if owner == key and (pos == node[1] or _onSegment(pos, node[1], nextNode[1])):
+                    return (node, nextNode)
+        return None
+
+    def getNextNode(self, key, segIdx, pos):
+        """ Return the 1st node ahead of the position on the track segment <segIdx>
+            (the position is moving to the segment end point), None if the next
+            node is the segment end point.
+        """
+        segNodes = self.segNodes.get((key, segIdx), [])
+        start = segNodes[0][1] if segNodes else pos
+        for node in segNodes[1:]:
+            if _getDist(start, node[1]) > _getDist(start, pos): return node
+        return None
+
+    def getNodeSegment(self, node):
+        """ Return the idx of the track segment the node is on (the node is the
+            segment start point or on the segment), None if not a graph node.
+        """
+        return self.nodeSegs.get(node)
+
+    def getRoute(self, src, dst, blocked=frozenset()):
+        """ Return the tuple of the route nodes from node src to node dst (both
+            included), None if no route.
+            Args:
+                src (tuple): (track ID, point) start node.
+                dst (tuple): (track ID, point) destination node.
+                blocked (frozenset, optional): blocked edges (node, next node).
+        """
+        routeKey = (src, dst, blocked)
+        if routeKey in self.routes: return self.routes[routeKey]
+        distTable, hopTable = self._getTables(blocked)
+        route = None
+        if dst in distTable.get(src, {}):
+            route, node = [src], src
+            while node != dst:
+                node = hopTable[node][dst]
+                route.append(node)
+            route = tuple(route)
+        self.routes[routeKey] = route
+        return route
+
+    def getRouteSwitches(self, route):
+        """ Return the IDs of the switches the route passes."""
+        switchIDs = []
+        for node, nextNode in zip(route, route[1:]):
+            for switchID, sw in self.switches.items():
+                if sw['from'] == node and sw['to'] == nextNode: switchIDs.append(switchID)
+        return switchIDs
+
+    def getSwitches(self):
+        return self.switches
+
+    def getSwitchState(self, switchID):
+        """ Return the switch state, None if the switch is not in the graph."""
+        return self.switches[switchID]['state'] if switchID in self.switches else None
+
+    def getTrackEntry(self, src, dstKey, blocked=frozenset()):
+        """ Return the nearest node of the track <dstKey> reachable from src (not
+            on the track <dstKey>), None if the track is not reachable.
+        """
+        entryKey = (src, dstKey, blocked)
+        if entryKey in self.entries: return self.entries[entryKey]
+        dist = self._getTables(blocked)[0].get(src, {})
+        entry = None
+        for node in self.nodes:
+            if node[0] == dstKey and node in dist and (entry is None or dist[node] < dist[entry]):
+                entry = node
+        self.entries[entryKey] = entry
+        return entry
+
+#-----------------------------------------------------------------------------
+# Define all the set() functions here:
+
+    def setSwitchState(self, switchID, state):
+        if switchID in self.switches: self.switches[switchID]['state'] = state
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+#-----------------------------------------------------------------------------
+# Name:        railwayTrainRtu.py
+#
+# Purpose:     This module provides the batched generator of the trains' real world
+#              (RTU) data: front sensor, speed, voltage and current. All the trains'
+#              values of one tick are generated in one pass from a seeded random
+#              generator (one getrandbits() call for all the trains, each train's
+#              random values are taken from its own 32 bits) and written to a flat
+#              int16 array [fsensor, speed, voltage, current] per train in the map
+#              trains order (copied directly to the state history record), which is served directly to the DataManager. The line
+#              slices and the data array of one tick are published as one tuple so
+#              a reader thread never pairs the slices with another tick's data. The
+#              same seed gives the same data for the same trains state sequence.
+#
+# Author:      Yuancheng Liu
+#
+# Version:     v0.1
+# Created:     2026/10/19
+# Copyright:   Copyright (c) 2023 LiuYuancheng
+# License:     MIT License
+#-----------------------------------------------------------------------------
+
+import random
+from array import array
+
+RTU_FIELDS = ('fsensor', 'speed', 'voltage', 'current')
+RTU_TYPE = 'h'  # int16 data elements, same as the state history record.
+RAND_BITS = 32  # random bits used by one train per tick.
+
+# (min, max) of the random ranges of the trains' real world data.
+STOP_SPEED = (0, 5)
+RUN_SPEED = (56, 100)
+VOLTAGE_DROP = (0, 20)
+STOP_CURRENT = (10, 30)
+RUN_CURRENT = (150, 200)
+BASE_VOLTAGE = 750
+
+# train stopped flag -> (speed count, speed min, current count, current min)
+_RANGES = {
+    True: (STOP_SPEED[1]-STOP_SPEED[0]+1, STOP_SPEED[0], STOP_CURRENT[1]-STOP_CURRENT[0]+1, STOP_CURRENT[0]),
+    False: (RUN_SPEED[1]-RUN_SPEED[0]+1, RUN_SPEED[0], RUN_CURRENT[1]-RUN_CURRENT[0]+1, RUN_CURRENT[0])
+}
+_DROP_NUM = VOLTAGE_DROP[1] - VOLTAGE_DROP[0] + 1
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+class TrainRtuGenerator(object):
+    """ Generate all the trains' RTU data of one tick in one batch."""
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # (lineSlices, data): lineSlices is track ID -> (start train idx, train count),
+        # the tuple is replaced (never changed in place) every update.
+        self.frame = ({}, array(RTU_TYPE))
+
+    def _getLayout(self, trainsDict):
+        """ Return ({track ID: (start train idx, train count)}, total trains)."""
+        lineSlices, start = {}, 0
+        for key, trains in trainsDict.items():
+            lineSlices[key] = (start, len(trains))
+            start += len(trains)
+        return (lineSlices, start)
+
+#-----------------------------------------------------------------------------
+    def update(self, trainsDict):
+        """ Generate the RTU data of all the trains and save to the trains.
+            Args:
+                trainsDict (dict): track ID -> list of <AgentTrain>.
+        """
+        lineSlices, num = self._getLayout(trainsDict)
+        bits = self.rng.getrandbits(RAND_BITS*num) if num else 0
+        vals = []
+        for trains in trainsDict.values():
+            for train in trains:
+                val = bits & 0xFFFFFFFF
+                bits >>= RAND_BITS
+                speed = voltage = current = 0
+                if train.getPowerState():
+                    spdNum, spdMin, crtNum, crtMin = _RANGES[train.getTrainSpeed() == 0]
+                    val, speed = divmod(val, spdNum)
+                    val, drop = divmod(val, _DROP_NUM)
+                    speed += spdMin
+                    voltage = BASE_VOLTAGE - drop - VOLTAGE_DROP[0]
+                    current = val % crtNum + crtMin
+                fsensor = train.setRealWordInfo(speed, voltage, current)
+                vals.extend((1 if fsensor else 0, speed, voltage, current))
+        self.frame = (lineSlices, array(RTU_TYPE, vals))
+
+    def reset(self, trainsDict=None, seed=None):
+        """ Restart the random sequence (with a new seed if given) and clear the data."""
+        if seed is not None: self.seed = seed
+        self.rng.seed(self.seed)
+        lineSlices, num = self._getLayout(trainsDict or {})
+        self.frame = (lineSlices, array(RTU_TYPE, [0])*(len(RTU_FIELDS)*num))
+
+#-----------------------------------------------------------------------------
+# Define all the get() functions here:
+
+    def getData(self):
+        """ Return the flat int16 array of all the trains' RTU_FIELDS."""
+        return self.frame[1]
+
+    def getLineRows(self, key):
+        """ Return the [[fsensor, speed, voltage, current], ...] of one line's trains."""
+        lineSlices, data = self.frame
+        start, count = lineSlices.get(key, (0, 0))
+        rows = []
+        for i in range(start*4, min(start+count, len(data)//4)*4, 4):
+            rows.append([bool(data[i]), data[i+1], data[i+2], data[i+3]])
+        return rows
+
+    def getSeed(self):
+        return self.seed